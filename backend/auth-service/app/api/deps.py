@@ -5,7 +5,9 @@ from shared.auth import (
     init_firebase,
     verify_firebase_token,
     get_current_user,
+    get_current_user_async,
     get_optional_user,
+    get_optional_user_async,
     UserClaims,
 )
 
@@ -14,6 +16,8 @@ __all__ = [
     "init_firebase",
     "verify_firebase_token", 
     "get_current_user",
+    "get_current_user_async",
     "get_optional_user",
+    "get_optional_user_async",
     "UserClaims",
 ]
@@ -2,17 +2,17 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr, Field
 import httpx
 
-from app.api.deps import get_current_user
-from app.core.config import settings
+from app.api.deps import get_current_user_async
+from app.core.http import get_http_client, identity_toolkit_post
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.get("/me")
-def me(user=Depends(get_current_user)):
+def me(user=Depends(get_current_user_async)):
     return user
 
 @router.post("/verify")
-def verify(user=Depends(get_current_user)):
+def verify(user=Depends(get_current_user_async)):
     return {
         "uid": user.get("uid"),
         "email": user.get("email"),
@@ -24,16 +24,14 @@ class RegisterBody(BaseModel):
     password: str = Field(min_length=6, max_length=128)
 
 @router.post("/dev/register")
-async def dev_register(body: RegisterBody):
-    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={settings.FIREBASE_WEB_API_KEY}"
+async def dev_register(body: RegisterBody, client: httpx.AsyncClient = Depends(get_http_client)):
     payload = {
         "email": body.email,
         "password": body.password,
         "returnSecureToken": True,
     }
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.post(url, json=payload)
+    r = await identity_toolkit_post(client, "signUp", payload)
 
     data = r.json()
     if r.status_code != 200:
@@ -54,16 +52,14 @@ class LoginBody(BaseModel):
     password: str = Field(min_length=6, max_length=128)
 
 @router.post("/dev/login")
-async def dev_login(body: LoginBody):
-    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={settings.FIREBASE_WEB_API_KEY}"
+async def dev_login(body: LoginBody, client: httpx.AsyncClient = Depends(get_http_client)):
     payload = {
         "email": body.email,
         "password": body.password,
         "returnSecureToken": True,
     }
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.post(url, json=payload)
+    r = await identity_toolkit_post(client, "signInWithPassword", payload)
 
     data = r.json()
     if r.status_code != 200:
@@ -8,4 +8,13 @@ class Settings(BaseSettings):
     SERVICE_NAME: str = "auth-service"
     API_PREFIX: str = "/api"
 
+    # Identity Toolkit (override to point at a local stub in tests/benchmarks)
+    IDENTITY_TOOLKIT_URL: str = "https://identitytoolkit.googleapis.com/v1"
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_RETRIES: int = 2  # connection failures only
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP2_ENABLED: bool = True
+
 settings = Settings()
@@ -1,7 +1,7 @@
 """
 Firebase initialization - uses shared auth module.
 """
-from shared.auth import init_firebase, verify_firebase_token
+from shared.auth import init_firebase, start_key_refresh, verify_firebase_token
 
 # Re-export for backwards compatibility
-__all__ = ["init_firebase", "verify_firebase_token"]
+__all__ = ["init_firebase", "start_key_refresh", "verify_firebase_token"]
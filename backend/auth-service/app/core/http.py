@@ -0,0 +1,82 @@
+"""
+Shared HTTP client for outbound calls (Identity Toolkit).
+
+One pooled AsyncClient per process, opened on startup and closed on shutdown,
+so logins reuse keep-alive (and HTTP/2 when `h2` is installed) connections
+instead of paying a TLS handshake per request.
+"""
+import logging
+from typing import Any, Dict
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("h2 not installed, Identity Toolkit client falls back to HTTP/1.1")
+        return False
+
+
+def create_http_client() -> httpx.AsyncClient:
+    http2 = _http2_available()
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.IDENTITY_TOOLKIT_URL,
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        ),
+        # retries del transporte: solo fallos de conexión, seguro también para signUp
+        transport=httpx.AsyncHTTPTransport(
+            http2=http2, limits=limits, retries=settings.HTTP_RETRIES
+        ),
+    )
+
+
+def register_http_client(app: FastAPI) -> None:
+    """Attach startup/shutdown handlers that own the pooled client."""
+
+    @app.on_event("startup")
+    async def _open_http_client():
+        app.state.http_client = create_http_client()
+
+    @app.on_event("shutdown")
+    async def _close_http_client():
+        client = getattr(app.state, "http_client", None)
+        if client is not None:
+            await client.aclose()
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the pooled client (created lazily if needed)."""
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
+        client = request.app.state.http_client = create_http_client()
+    return client
+
+
+async def identity_toolkit_post(
+    client: httpx.AsyncClient,
+    method: str,
+    payload: Dict[str, Any],
+    timeout: float = None,
+) -> httpx.Response:
+    """POST /accounts:<method> with the web API key."""
+    return await client.post(
+        f"/accounts:{method}",
+        params={"key": settings.FIREBASE_WEB_API_KEY},
+        json=payload,
+        timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+    )
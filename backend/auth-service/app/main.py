@@ -2,8 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from app.core.config import settings
-from app.core.firebase import init_firebase
+from app.core.firebase import init_firebase, start_key_refresh
+from app.core.http import register_http_client
 from app.api.routes import router as auth_router
+from shared.metrics import install_metrics
+from shared.tracing import install_tracing
 
 def create_app() -> FastAPI:
     app = FastAPI(title=settings.SERVICE_NAME, version="0.1.0")
@@ -17,10 +20,15 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    install_metrics(app, settings.SERVICE_NAME)
+    install_tracing(app, settings.SERVICE_NAME)
 
     @app.on_event("startup")
     def _startup():
         init_firebase()
+        start_key_refresh()
+
+    register_http_client(app)
 
     @app.get("/health", tags=["health"])
     def health():
@@ -1,5 +1,6 @@
 # tests/conftest.py
 """Test fixtures for auth-service."""
+import importlib.util
 import os
 import sys
 from pathlib import Path
@@ -12,6 +13,16 @@ THIS = Path(__file__).resolve()
 APP_DIR = THIS.parents[1]
 sys.path.insert(0, str(APP_DIR))
 
+# shared.auth is mocked below; shared.metrics and shared.tracing are pure
+# Python and used for real (loaded by path: `shared` is not a package on the
+# CI PYTHONPATH)
+SHARED_DIR = THIS.parents[2] / "shared"
+for _name in ("metrics", "tracing"):
+    _spec = importlib.util.spec_from_file_location(f"shared.{_name}", SHARED_DIR / f"{_name}.py")
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_spec.name] = _module
+    _spec.loader.exec_module(_module)
+
 # Set required environment variables
 os.environ.setdefault("FIREBASE_SERVICE_ACCOUNT_PATH", "/fake/path.json")
 os.environ.setdefault("FIREBASE_WEB_API_KEY", "fake-api-key")
@@ -0,0 +1,53 @@
+# tests/test_dev_auth.py
+"""Tests for dev register/login against a stubbed Identity Toolkit."""
+import httpx
+
+from app.core.http import get_http_client
+
+
+def _stub_client(handler):
+    return httpx.AsyncClient(
+        base_url="http://identity-stub/v1",
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_dev_login_uses_pooled_client(app_client):
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(request)
+        return httpx.Response(200, json={
+            "localId": "uid-1",
+            "email": "a@example.com",
+            "idToken": "id-token",
+            "refreshToken": "refresh",
+            "expiresIn": "3600",
+        })
+
+    client = _stub_client(handler)
+    app_client.app.dependency_overrides[get_http_client] = lambda: client
+
+    for _ in range(2):
+        response = app_client.post(
+            "/api/auth/dev/login", json={"email": "a@example.com", "password": "secret1"}
+        )
+        assert response.status_code == 200
+        assert response.json()["uid"] == "uid-1"
+
+    assert [r.url.path for r in seen] == ["/v1/accounts:signInWithPassword"] * 2
+    assert seen[0].url.params["key"] == "fake-api-key"
+
+
+def test_dev_register_maps_errors(app_client):
+    def handler(request: httpx.Request):
+        return httpx.Response(400, json={"error": {"message": "EMAIL_EXISTS"}})
+
+    client = _stub_client(handler)
+    app_client.app.dependency_overrides[get_http_client] = lambda: client
+
+    response = app_client.post(
+        "/api/auth/dev/register", json={"email": "a@example.com", "password": "secret1"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "EMAIL_EXISTS"
@@ -9,3 +9,12 @@ def test_health(app_client):
     data = response.json()
     assert data["status"] == "ok"
     assert "service" in data
+
+
+def test_metrics_endpoint(app_client):
+    """Requests are counted per route template and exposed for Prometheus."""
+    app_client.get("/health")
+    response = app_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/health",status="200"' in response.text
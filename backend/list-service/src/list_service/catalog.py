@@ -0,0 +1,120 @@
+"""
+Local Bloom filter of the catalog's manga IDs.
+
+Loaded from the snapshot manga-service publishes (MANGA_ID_FILTER_URL,
+e.g. http://manga-service:8000/api/mangas:id-filter) and refreshed in a
+background thread with a conditional GET, so checking an item costs no
+round trip. A negative answer may just mean the manga is newer than the
+snapshot: callers confirm those against Firestore and `add()` the ones
+that exist.
+
+Configuration (env):
+    MANGA_ID_FILTER_URL       Snapshot URL (unset: no filter, always look up)
+    MANGA_ID_FILTER_REFRESH   Seconds between refreshes (default 300)
+"""
+from typing import Callable, Optional, Set, Tuple
+import logging
+import os
+import threading
+import urllib.error
+import urllib.request
+
+from shared.bloom import BloomFilter
+from shared.tracing import inject_headers, span
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.getenv("MANGA_ID_FILTER_REFRESH", "300"))
+MAX_LOCAL_ADDS = 10_000
+
+# (etag) -> (snapshot bytes, etag), or None if unchanged (304)
+Fetcher = Callable[[Optional[str]], Optional[Tuple[bytes, Optional[str]]]]
+
+
+def fetch_snapshot(etag: Optional[str], url: Optional[str] = None, timeout: float = 10):
+    """Default fetcher: conditional GET of the manga-service snapshot."""
+    url = url or os.environ["MANGA_ID_FILTER_URL"]
+    with span("catalog.fetch_snapshot", **{"http.url": url}):
+        headers = inject_headers({"If-None-Match": etag} if etag else {})
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                return resp.read(), resp.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+
+class MangaIdFilter:
+    """Catalog ID filter kept fresh by a daemon thread."""
+
+    def __init__(self, fetcher: Fetcher = fetch_snapshot, interval: float = REFRESH_INTERVAL):
+        self._fetcher = fetcher
+        self.interval = interval
+        self._bloom: Optional[BloomFilter] = None
+        self._etag: Optional[str] = None
+        self._local: Set[str] = set()  # confirmadas desde el último snapshot
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._bloom is not None
+
+    def refresh(self) -> bool:
+        """Fetch the snapshot if it changed. Returns True when a new one was loaded."""
+        result = self._fetcher(self._etag)
+        if result is None:
+            return False
+        body, etag = result
+        bloom = BloomFilter.from_bytes(body)
+        with self._lock:
+            for manga_id in self._local:
+                bloom.add(manga_id)
+            self._bloom = bloom
+            self._etag = etag
+        logger.info("Loaded manga ID filter (%d ids)", len(bloom))
+        return True
+
+    def might_contain(self, manga_id: str) -> Optional[bool]:
+        """True: probably in the catalog. False: not in the snapshot. None: no filter loaded."""
+        bloom = self._bloom
+        if bloom is None:
+            return None
+        return manga_id in bloom
+
+    def add(self, manga_id: str) -> None:
+        """Record a manga confirmed to exist after the snapshot was taken."""
+        with self._lock:
+            if len(self._local) < MAX_LOCAL_ADDS:
+                self._local.add(manga_id)
+            if self._bloom is not None:
+                self._bloom.add(manga_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Seguir con el filtro anterior
+                logger.warning(f"Manga ID filter refresh failed: {e}")
+
+    def start(self) -> None:
+        """Load now (best effort) and keep refreshing in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Initial manga ID filter fetch failed: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="manga-id-filter-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+manga_ids = MangaIdFilter()
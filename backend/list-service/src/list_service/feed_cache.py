@@ -0,0 +1,200 @@
+"""
+Cache for the first pages of the public lists feed.
+
+Pages are stored already serialized (JSON bytes) so a hit skips Firestore
+and pydantic entirely. Every write that can change the feed calls
+`invalidate()`, which bumps a version number: entries of older versions are
+never served again. The TTL is only a safety net for writes made by other
+replicas when there is no shared store.
+
+With a shared store (L2, e.g. Redis via LISTS_FEED_REDIS_URL) the version
+and the pages live there too, so an invalidation on one replica is seen by
+all of them. `InMemoryStore` implements the same interface for tests.
+
+Configuration (env):
+    LISTS_FEED_CACHE_PAGES   Pages cached per page size (default 5, 0 disables)
+    LISTS_FEED_CACHE_TTL     Seconds a page is served (default 15)
+    LISTS_FEED_REDIS_URL     Optional shared store (requires the `redis` package)
+"""
+from typing import Callable, Dict, Hashable, Optional, Protocol, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "lists:feed:version"
+
+
+class SharedStore(Protocol):
+    """Minimal key/value interface the feed cache needs from an L2 store."""
+
+    def get(self, key: str) -> Optional[bytes]: ...
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+    def incr(self, key: str) -> int: ...
+
+
+class InMemoryStore:
+    """SharedStore kept in process memory (tests, single replica)."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            current = self._data.get(key)
+            value = int(current[1]) + 1 if current else 1
+            self._data[key] = (float("inf"), str(value).encode())
+            return value
+
+
+class RedisStore:
+    """SharedStore backed by Redis."""
+
+    def __init__(self, url: str):
+        import redis  # dependencia opcional
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+
+class FeedCache:
+    """Versioned cache of serialized feed pages with single-flight loading."""
+
+    def __init__(self, max_pages: int = 5, ttl: float = 15, store: Optional[SharedStore] = None):
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.store = store
+        self._version = 0
+        self._pages: Dict[Tuple[int, Hashable], Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "FeedCache":
+        store = None
+        url = os.getenv("LISTS_FEED_REDIS_URL")
+        if url:
+            try:
+                store = RedisStore(url)
+            except ImportError:
+                logger.warning("LISTS_FEED_REDIS_URL set but redis is not installed; feed cache is local only")
+        return cls(
+            max_pages=int(os.getenv("LISTS_FEED_CACHE_PAGES", "5")),
+            ttl=float(os.getenv("LISTS_FEED_CACHE_TTL", "15")),
+            store=store,
+        )
+
+    def cacheable(self, page: int, cursor: Optional[str]) -> bool:
+        return cursor is None and 1 <= page <= self.max_pages
+
+    def _current_version(self) -> int:
+        if self.store is not None:
+            try:
+                raw = self.store.get(VERSION_KEY)
+                return int(raw) if raw else 0
+            except Exception as e:
+                logger.warning(f"Feed cache store unavailable: {e}")
+        return self._version
+
+    def _lookup(self, version: int, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._pages.get((version, key))
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+        if self.store is not None:
+            try:
+                body = self.store.get(f"lists:feed:v{version}:{key}")
+            except Exception:
+                body = None
+            if body is not None:
+                self._remember(version, key, body)
+                return body
+        return None
+
+    def _remember(self, version: int, key: Hashable, body: bytes) -> None:
+        with self._lock:
+            # Las versiones anteriores ya no se sirven: se descartan al guardar
+            self._pages = {k: v for k, v in self._pages.items() if k[0] == version}
+            self._pages[(version, key)] = (time.monotonic() + self.ttl, body)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], bytes]) -> bytes:
+        """
+        Cached page for `key`, or `loader()` stored under the current version.
+        Concurrent misses for the same key wait for a single load.
+        """
+        version = self._current_version()
+        body = self._lookup(version, key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            body = self._lookup(version, key)
+            if body is not None:
+                self.hits += 1
+                return body
+            self.misses += 1
+            body = loader()
+            # Si hubo una invalidación durante la carga, no guardar la página
+            if self._current_version() == version:
+                self._remember(version, key, body)
+                if self.store is not None:
+                    try:
+                        self.store.set(f"lists:feed:v{version}:{key}", body, self.ttl)
+                    except Exception as e:
+                        logger.warning(f"Feed cache store write failed: {e}")
+            return body
+
+    def invalidate(self) -> None:
+        """Drop every cached page, here and (with a shared store) on all replicas."""
+        with self._lock:
+            self._version += 1
+            self._pages.clear()
+        if self.store is not None:
+            try:
+                self.store.incr(VERSION_KEY)
+            except Exception as e:
+                logger.warning(f"Feed cache invalidation not shared: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "pages": len(self._pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "shared": self.store is not None,
+        }
+
+
+public_feed = FeedCache.from_env()
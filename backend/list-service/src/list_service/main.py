@@ -3,26 +3,52 @@ List Service - Public Lists API
 
 Allows authenticated users to create and manage public manga lists.
 """
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status, Query
 from fastapi.middleware.cors import CORSMiddleware
+from firebase_admin import firestore as admin_firestore
+from google.api_core import exceptions as gexc
 import os
 import logging
+from typing import Optional
 
-from shared.auth import init_firebase, get_current_user, get_optional_user
+from shared.auth import init_firebase, get_current_user_async, get_optional_user_async, start_key_refresh
+from shared.metrics import install_metrics, register_cache
+from shared.tracing import install_tracing
 
 from .models import (
     CreateListRequest,
     UpdateListRequest,
     AddItemRequest,
+    BatchItemsRequest,
+    BatchItemsResponse,
     ListResponse,
+    ListItemsResponse,
+    ListReactionsResponse,
     ListsResponse,
     MessageResponse,
+    TrendingResponse,
     UserListSummary,
 )
-from .repository import FirestoreListRepo
+from .catalog import manga_ids
+from .feed_cache import public_feed
+from . import repository
+from .repository import FirestoreListRepo, ListPermissionError, ITEMS_PAGE_SIZE, MAX_BATCH_ITEMS
+from .trending import trending_board
 
 logger = logging.getLogger(__name__)
 
+# Response header with the Firestore documents read while serving the request
+READS_HEADER = "X-Firestore-Reads"
+
+# Reject items whose manga_id is not in the catalog
+VALIDATE_MANGA_IDS = os.getenv("LISTS_VALIDATE_MANGA_IDS", "true").lower() != "false"
+
+# ?expand=manga joins catalog metadata into each item
+EXPAND_QUERY = Query(None, pattern="^manga$", description="'manga' to include manga metadata")
+
+# Offset pagination re-reads every skipped document; deeper pages use cursors
+MAX_OFFSET_PAGE = 50
+
 app = FastAPI(
     title="List Service",
     description="Public manga lists API",
@@ -37,7 +63,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READS_HEADER],
 )
+install_metrics(app, "list-service")
+install_tracing(app, "list-service")
+register_cache("lists_public_feed", public_feed.stats)
+register_cache("lists_my_lists", lambda: repository._owner_lists.stats())
+register_cache("lists_manga", lambda: repository._manga_cache.stats())
+register_cache("lists_reaction_totals", lambda: repository._reaction_totals.stats())
+
+
+@app.middleware("http")
+async def firestore_reads_header(request: Request, call_next):
+    response = await call_next(request)
+    repo = getattr(request.state, "list_repo", None)
+    reads = getattr(repo, "reads", None)
+    if isinstance(reads, int):
+        response.headers[READS_HEADER] = str(reads)
+    return response
 
 
 @app.on_event("startup")
@@ -47,11 +90,17 @@ def startup():
         logger.info("Firebase initialized for list-service")
     except Exception as e:
         logger.warning(f"Firebase init failed (may retry on first request): {e}")
+    start_key_refresh()
+    if os.getenv("MANGA_ID_FILTER_URL"):
+        manga_ids.start()
+    trending_board.start(admin_firestore.client)
 
 
-# Dependency to get repository
-def get_repo() -> FirestoreListRepo:
-    return FirestoreListRepo()
+# Dependency to get repository (one unit of work per request)
+def get_repo(request: Request) -> FirestoreListRepo:
+    repo = FirestoreListRepo()
+    request.state.list_repo = repo
+    return repo
 
 
 # Health check
@@ -76,18 +125,60 @@ def root():
     summary="Get public lists",
 )
 def get_public_lists(
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(
+        1, ge=1, le=MAX_OFFSET_PAGE,
+        description="Page number (offset pagination, prefer cursor)",
+    ),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
-    """Get paginated list of all public lists."""
-    lists, total = repo.get_public(page=page, page_size=page_size)
-    return ListsResponse(
-        lists=lists,
-        total=total,
-        page=page,
-        page_size=page_size,
+    """
+    Get paginated list of all public lists.
+    
+    The first pages (without cursor) are served pre-serialized from the
+    feed cache, which every list write invalidates.
+    """
+    def render() -> ListsResponse:
+        try:
+            lists, total, next_cursor = repo.get_public(page=page, page_size=page_size, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ListsResponse(
+            lists=lists,
+            total=total,
+            page=page,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+    
+    if not public_feed.cacheable(page, cursor):
+        return render()
+    body = public_feed.get_or_load(
+        f"{page}:{page_size}", lambda: render().model_dump_json().encode()
     )
+    return Response(content=body, media_type="application/json")
+
+
+@app.get(
+    "/api/lists/trending-mangas",
+    response_model=TrendingResponse,
+    tags=["lists"],
+    summary="Get trending mangas",
+)
+def get_trending_mangas(
+    limit: int = Query(20, ge=1, le=100, description="Mangas to return"),
+    expand: Optional[str] = EXPAND_QUERY,
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """
+    Mangas added to lists the most, recent additions weighing more. Served
+    from the in-memory ranking, refreshed every TRENDING_REFRESH seconds.
+    """
+    mangas = trending_board.top(limit)
+    if expand == "manga":
+        repo.expand_mangas(mangas)
+    return TrendingResponse(mangas=mangas, refreshed_at=trending_board.refreshed_at)
 
 
 # ============================================
@@ -101,7 +192,7 @@ def get_public_lists(
     summary="Get my lists",
 )
 def get_my_lists(
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Get all lists owned by the current user."""
@@ -126,27 +217,63 @@ def get_my_lists(
 )
 def get_list(
     list_id: str,
+    expand: Optional[str] = EXPAND_QUERY,
     repo: FirestoreListRepo = Depends(get_repo),
 ):
-    """Get a specific list with all items."""
-    lst = repo.get_by_id(list_id)
+    """
+    Get a specific list with its items. Lists stored in the items
+    subcollection return the first page; use /items for the rest.
+    """
+    lst = repo.get_by_id(list_id, with_items=True)
     if lst is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"List {list_id} not found",
         )
+    if expand == "manga":
+        repo.expand_mangas(lst.items)
     return ListResponse(
         id=lst.id,
         name=lst.name,
         owner_uid=lst.owner_uid,
         owner_name=lst.owner_name,
         items=lst.items,
-        item_count=len(lst.items),
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
         created_at=lst.created_at,
         updated_at=lst.updated_at,
     )
 
 
+@app.get(
+    "/api/lists/{list_id}/items",
+    response_model=ListItemsResponse,
+    tags=["lists"],
+    summary="Get list items (paginated)",
+)
+def get_list_items(
+    list_id: str,
+    limit: int = Query(ITEMS_PAGE_SIZE, ge=1, le=ITEMS_PAGE_SIZE, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    expand: Optional[str] = EXPAND_QUERY,
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Page through a list's items in the order they were added."""
+    try:
+        page = repo.get_items(list_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"List {list_id} not found",
+        )
+    items, next_cursor = page
+    if expand == "manga":
+        repo.expand_mangas(items)
+    return ListItemsResponse(items=items, next_cursor=next_cursor)
+
+
 @app.post(
     "/api/lists",
     response_model=ListResponse,
@@ -156,7 +283,7 @@ def get_list(
 )
 def create_list(
     request: CreateListRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Create a new list for the current user."""
@@ -169,7 +296,8 @@ def create_list(
         owner_uid=lst.owner_uid,
         owner_name=lst.owner_name,
         items=lst.items,
-        item_count=len(lst.items),
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
         created_at=lst.created_at,
         updated_at=lst.updated_at,
     )
@@ -180,7 +308,12 @@ def create_list(
 # ============================================
 
 def verify_owner(list_id: str, user_uid: str, repo: FirestoreListRepo):
-    """Verify user is owner of the list, raise 403 if not."""
+    """
+    Verify user is owner of the list, raise 403 if not.
+    
+    The document stays memoized in `repo`, so the mutation that follows
+    works on this same read.
+    """
     lst = repo.get_by_id(list_id)
     if lst is None:
         raise HTTPException(
@@ -195,6 +328,15 @@ def verify_owner(list_id: str, user_uid: str, repo: FirestoreListRepo):
     return lst
 
 
+def concurrent_update_error(list_id: str) -> HTTPException:
+    """409 for writes the repository gave up on after repeated conflicts (gexc.Aborted)."""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"List {list_id} is being modified concurrently, retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.post(
     "/api/lists/{list_id}/items",
     response_model=ListResponse,
@@ -204,13 +346,26 @@ def verify_owner(list_id: str, user_uid: str, repo: FirestoreListRepo):
 def add_item_to_list(
     list_id: str,
     request: AddItemRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Add a manga to a list. Only the owner can add items."""
-    verify_owner(list_id, user["uid"], repo)
-    
-    lst = repo.add_item(list_id, request.manga_id)
+    if VALIDATE_MANGA_IDS and not repo.manga_exists(request.manga_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Manga {request.manga_id} not found",
+        )
+    try:
+        lst = repo.add_item(list_id, request.manga_id, owner_uid=user["uid"])
+    except ListPermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to modify this list",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except gexc.Aborted:
+        raise concurrent_update_error(list_id)
     if lst is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -224,7 +379,8 @@ def add_item_to_list(
         owner_uid=lst.owner_uid,
         owner_name=lst.owner_name,
         items=lst.items,
-        item_count=len(lst.items),
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
         created_at=lst.created_at,
         updated_at=lst.updated_at,
     )
@@ -239,13 +395,21 @@ def add_item_to_list(
 def remove_item_from_list(
     list_id: str,
     manga_id: str,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Remove a manga from a list. Only the owner can remove items."""
-    verify_owner(list_id, user["uid"], repo)
-    
-    lst = repo.remove_item(list_id, manga_id)
+    try:
+        lst = repo.remove_item(list_id, manga_id, owner_uid=user["uid"])
+    except ListPermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to modify this list",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except gexc.Aborted:
+        raise concurrent_update_error(list_id)
     if lst is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -259,12 +423,185 @@ def remove_item_from_list(
         owner_uid=lst.owner_uid,
         owner_name=lst.owner_name,
         items=lst.items,
-        item_count=len(lst.items),
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
         created_at=lst.created_at,
         updated_at=lst.updated_at,
     )
 
 
+@app.post(
+    "/api/lists/{list_id}/items:batch",
+    response_model=BatchItemsResponse,
+    tags=["lists"],
+    summary="Add/remove many mangas",
+)
+def batch_items(
+    list_id: str,
+    request: BatchItemsRequest,
+    user: dict = Depends(get_current_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """
+    Apply up to MAX_BATCH_ITEMS adds and removes in a single write and return
+    the final list. Mangas that are not in the catalog are skipped and
+    reported in `not_found`. Only the owner can modify the list.
+    """
+    if len(request.add) + len(request.remove) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_ITEMS} items per batch",
+        )
+    add = request.add
+    not_found = []
+    if VALIDATE_MANGA_IDS and add:
+        existing = repo.existing_mangas(add)
+        not_found = [m for m in dict.fromkeys(add) if m not in existing]
+        add = [m for m in add if m in existing]
+    
+    try:
+        lst = repo.apply_items(list_id, add, request.remove, owner_uid=user["uid"])
+    except ListPermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to modify this list",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except gexc.Aborted:
+        raise concurrent_update_error(list_id)
+    if lst is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"List {list_id} not found",
+        )
+    
+    logger.info(
+        f"User {user['uid']} batch-updated list {list_id}: "
+        f"+{len(add)} -{len(request.remove)} ({len(not_found)} not found)"
+    )
+    return BatchItemsResponse(
+        id=lst.id,
+        name=lst.name,
+        owner_uid=lst.owner_uid,
+        owner_name=lst.owner_name,
+        items=lst.items,
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
+        created_at=lst.created_at,
+        updated_at=lst.updated_at,
+        not_found=not_found,
+    )
+
+
+@app.get(
+    "/api/lists/{list_id}/reactions",
+    response_model=ListReactionsResponse,
+    tags=["lists"],
+    summary="Get like / follow counts",
+)
+def get_list_reactions(
+    list_id: str,
+    user: Optional[dict] = Depends(get_optional_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Likes and followers of a list; `liked` / `following` when signed in."""
+    if repo.get_by_id(list_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"List {list_id} not found",
+        )
+    totals = repo.reaction_totals(list_id)
+    mine = repo.user_reactions(list_id, user["uid"]) if user else {}
+    return ListReactionsResponse(
+        list_id=list_id,
+        likes=totals["like"],
+        followers=totals["follow"],
+        liked=mine.get("like"),
+        following=mine.get("follow"),
+    )
+
+
+def set_reaction(list_id: str, kind: str, active: bool, user: dict, repo: FirestoreListRepo):
+    """Apply a like / follow change and return the updated counts."""
+    changed = repo.set_reaction(list_id, kind, user["uid"], active)
+    if changed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"List {list_id} not found",
+        )
+    if changed:
+        logger.info(f"User {user['uid']} {'set' if active else 'removed'} {kind} on list {list_id}")
+    totals = repo.reaction_totals(list_id)
+    return ListReactionsResponse(
+        list_id=list_id,
+        likes=totals["like"],
+        followers=totals["follow"],
+        liked=active if kind == "like" else None,
+        following=active if kind == "follow" else None,
+    )
+
+
+@app.put(
+    "/api/lists/{list_id}/like",
+    response_model=ListReactionsResponse,
+    tags=["lists"],
+    summary="Like list",
+)
+def like_list(
+    list_id: str,
+    user: dict = Depends(get_current_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Like a list. Repeating it is a no-op."""
+    return set_reaction(list_id, "like", True, user, repo)
+
+
+@app.delete(
+    "/api/lists/{list_id}/like",
+    response_model=ListReactionsResponse,
+    tags=["lists"],
+    summary="Unlike list",
+)
+def unlike_list(
+    list_id: str,
+    user: dict = Depends(get_current_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Remove your like from a list. No-op if you had not liked it."""
+    return set_reaction(list_id, "like", False, user, repo)
+
+
+@app.put(
+    "/api/lists/{list_id}/follow",
+    response_model=ListReactionsResponse,
+    tags=["lists"],
+    summary="Follow list",
+)
+def follow_list(
+    list_id: str,
+    user: dict = Depends(get_current_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Follow a list. Repeating it is a no-op."""
+    return set_reaction(list_id, "follow", True, user, repo)
+
+
+@app.delete(
+    "/api/lists/{list_id}/follow",
+    response_model=ListReactionsResponse,
+    tags=["lists"],
+    summary="Unfollow list",
+)
+def unfollow_list(
+    list_id: str,
+    user: dict = Depends(get_current_user_async),
+    repo: FirestoreListRepo = Depends(get_repo),
+):
+    """Stop following a list. No-op if you were not following it."""
+    return set_reaction(list_id, "follow", False, user, repo)
+
+
 @app.patch(
     "/api/lists/{list_id}",
     response_model=ListResponse,
@@ -274,7 +611,7 @@ def remove_item_from_list(
 def update_list(
     list_id: str,
     request: UpdateListRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Rename a list. Only the owner can rename."""
@@ -294,7 +631,8 @@ def update_list(
         owner_uid=lst.owner_uid,
         owner_name=lst.owner_name,
         items=lst.items,
-        item_count=len(lst.items),
+        item_count=lst.item_count,
+        next_items_cursor=lst.next_items_cursor,
         created_at=lst.created_at,
         updated_at=lst.updated_at,
     )
@@ -308,7 +646,7 @@ def update_list(
 )
 def delete_list(
     list_id: str,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     repo: FirestoreListRepo = Depends(get_repo),
 ):
     """Delete a list. Only the owner can delete."""
@@ -0,0 +1,166 @@
+"""
+Data migrations for the lists collection.
+
+Usage:
+    python -m list_service.migrations backfill-item-count
+    python -m list_service.migrations backfill-item-count --dry-run
+    python -m list_service.migrations migrate-items --min-items 1000
+
+Set FIRESTORE_EMULATOR_HOST to run against the Firestore emulator.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+from google.api_core import exceptions as gexc
+
+from .repository import COLLECTION, STORAGE_SUBCOLLECTION, FirestoreListRepo
+
+logger = logging.getLogger("list_service.migrations")
+
+BATCH_SIZE = 500  # límite de operaciones por WriteBatch
+
+
+@dataclass
+class MigrationStats:
+    scanned: int = 0
+    updated: int = 0
+    skipped: int = 0  # gave up after concurrent updates; re-run to retry
+
+
+def backfill_item_count(db, batch_size: int = BATCH_SIZE, dry_run: bool = False) -> MigrationStats:
+    """
+    Store `item_count` on every list that lacks it or has a stale value.
+
+    Walks the collection in pages ordered by document id, reading only the
+    fields it needs, and commits one batch per page. Lists in subcollection
+    storage are skipped. Safe to re-run: lists that are already correct are
+    not written.
+    """
+    stats = MigrationStats()
+    collection = db.collection(COLLECTION)
+    query = collection.select(["items", "item_count", "storage"]).order_by("__name__").limit(batch_size)
+
+    last = None
+    while True:
+        page = query.start_after(last) if last is not None else query
+        docs = list(page.stream())
+        if not docs:
+            break
+
+        batch = db.batch()
+        pending = 0
+        for doc in docs:
+            data = doc.to_dict() or {}
+            if data.get("storage") == STORAGE_SUBCOLLECTION:
+                continue  # item_count lo mantienen los incrementos
+            count = len(data.get("items", []))
+            if data.get("item_count") != count:
+                batch.update(doc.reference, {"item_count": count})
+                pending += 1
+        if pending and not dry_run:
+            batch.commit()
+
+        stats.scanned += len(docs)
+        stats.updated += pending
+        logger.info("%d lists scanned, %d updated", stats.scanned, stats.updated)
+
+        if len(docs) < batch_size:
+            break
+        last = docs[-1]
+
+    return stats
+
+
+def migrate_items(
+    db, min_items: int = 0, batch_size: int = BATCH_SIZE, dry_run: bool = False
+) -> MigrationStats:
+    """
+    Move the items of embedded lists with at least `min_items` items into
+    the items subcollection (see FirestoreListRepo.migrate_items_to_subcollection).
+
+    Walks every list by document id rather than filtering on item_count,
+    so lists created before that field existed are not skipped; their
+    size is read from the items array.
+    """
+    stats = MigrationStats()
+    query = (
+        db.collection(COLLECTION)
+        .select(["storage", "item_count"])
+        .order_by("__name__")
+        .limit(batch_size)
+    )
+
+    last = None
+    while True:
+        page = query.start_after(last) if last is not None else query
+        docs = list(page.stream())
+        if not docs:
+            break
+
+        repo = FirestoreListRepo(db)  # una unidad de trabajo por página
+        for doc in docs:
+            stats.scanned += 1
+            data = doc.to_dict() or {}
+            if data.get("storage") == STORAGE_SUBCOLLECTION:
+                continue
+            count = data.get("item_count")
+            if count is None:
+                # Lista antigua sin item_count: contar el array
+                count = len((doc.reference.get(["items"]).to_dict() or {}).get("items", []))
+            if count < min_items:
+                continue
+            if dry_run:
+                stats.updated += 1
+                continue
+            try:
+                if repo.migrate_items_to_subcollection(doc.id):
+                    stats.updated += 1
+            except gexc.Aborted as e:
+                # Lista muy activa: se deja embebida, basta con volver a ejecutar
+                stats.skipped += 1
+                logger.warning("Skipped list %s: %s", doc.id, e)
+        logger.info("%d lists scanned, %d migrated, %d skipped", stats.scanned, stats.updated, stats.skipped)
+
+        if len(docs) < batch_size:
+            break
+        last = docs[-1]
+
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="list-migrations", description="Lists collection migrations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill-item-count", help="Store item_count on existing lists")
+    backfill.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    backfill.add_argument("--dry-run", action="store_true", help="Report changes, write nothing")
+    migrate = sub.add_parser("migrate-items", help="Move embedded items into the items subcollection")
+    migrate.add_argument("--min-items", type=int, default=0, help="Only lists with at least this many items")
+    migrate.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    migrate.add_argument("--dry-run", action="store_true", help="Report changes, write nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    from firebase_admin import firestore as admin_firestore
+    from shared.auth import init_firebase
+
+    init_firebase()
+    command = backfill_item_count if args.command == "backfill-item-count" else migrate_items
+    kwargs = {"min_items": args.min_items} if args.command == "migrate-items" else {}
+    stats = command(
+        admin_firestore.client(),
+        batch_size=min(args.batch_size, BATCH_SIZE),
+        dry_run=args.dry_run,
+        **kwargs,
+    )
+    print(f"scanned={stats.scanned} updated={stats.updated} skipped={stats.skipped}{' (dry run)' if args.dry_run else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,28 @@
 Pydantic models for List Service.
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, List, Optional
 from pydantic import BaseModel, Field
 
+MangaId = Annotated[str, Field(min_length=1)]
+
+
+class MangaSummary(BaseModel):
+    """Catalog fields shown next to a list item (?expand=manga)."""
+    id: str
+    title: str = ""
+    cover_path: str = ""
+    cover_url: Optional[str] = None  # cover_path if a URL, else LISTS_COVER_BASE_URL + key
+    latest_chapter: Optional[int] = None
+
 
 class ListItem(BaseModel):
     """A manga item in a list."""
     manga_id: str = Field(..., description="ID from manga catalog")
     added_at: datetime = Field(default_factory=datetime.utcnow)
+    manga: Optional[MangaSummary] = Field(
+        None, description="Manga metadata, only with ?expand=manga (null if not in the catalog)"
+    )
 
 
 class UserList(BaseModel):
@@ -19,6 +33,9 @@ class UserList(BaseModel):
     owner_uid: str = Field(..., description="Firebase UID of owner")
     owner_name: Optional[str] = None
     items: List[ListItem] = Field(default_factory=list)
+    item_count: int = 0
+    storage: str = "embedded"
+    next_items_cursor: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -56,6 +73,12 @@ class AddItemRequest(BaseModel):
     manga_id: str = Field(..., min_length=1)
 
 
+class BatchItemsRequest(BaseModel):
+    """Request body for adding/removing many mangas at once (removes apply first)."""
+    add: List[MangaId] = Field(default_factory=list)
+    remove: List[MangaId] = Field(default_factory=list)
+
+
 class ListResponse(BaseModel):
     """Response for a single list."""
     id: str
@@ -64,16 +87,53 @@ class ListResponse(BaseModel):
     owner_name: Optional[str] = None
     items: List[ListItem]
     item_count: int
+    next_items_cursor: Optional[str] = Field(
+        None, description="Set when more items are available from /api/lists/{id}/items"
+    )
     created_at: datetime
     updated_at: datetime
 
 
+class BatchItemsResponse(ListResponse):
+    """Final list after a batch, plus the requested mangas that are not in the catalog."""
+    not_found: List[str] = Field(default_factory=list)
+
+
+class ListItemsResponse(BaseModel):
+    """One page of a list's items."""
+    items: List[ListItem]
+    next_cursor: Optional[str] = None
+
+
+class TrendingManga(BaseModel):
+    """A manga in the trending ranking."""
+    manga_id: str
+    score: float = Field(..., description="Time-decayed listings (one listing made now = 1.0)")
+    manga: Optional[MangaSummary] = None
+
+
+class TrendingResponse(BaseModel):
+    """Most-listed mangas, recent listings weighing more."""
+    mangas: List[TrendingManga]
+    refreshed_at: Optional[datetime] = None
+
+
+class ListReactionsResponse(BaseModel):
+    """Like / follow counts of a list, and the caller's own state when known."""
+    list_id: str
+    likes: int
+    followers: int
+    liked: Optional[bool] = None
+    following: Optional[bool] = None
+
+
 class ListsResponse(BaseModel):
     """Response for list of lists."""
     lists: List[UserListSummary]
     total: int
     page: int = 1
     page_size: int = 20
+    next_cursor: Optional[str] = None
 
 
 class MessageResponse(BaseModel):
@@ -1,187 +1,1018 @@
 """
 Firestore repository for lists.
 """
-from datetime import datetime
-from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import base64
+import json
 import logging
+import os
+import random
+import threading
+import time
 
 from firebase_admin import firestore as admin_firestore
+from google.api_core import exceptions as gexc
 from google.cloud.firestore_v1 import DocumentSnapshot
 
-from .models import UserList, UserListSummary, ListItem
+from shared.metrics import instrument_repo
+from shared.tracing import trace_repo
+
+from .cache import MISSING, TTLCache
+from .catalog import manga_ids
+from .feed_cache import public_feed
+from .models import UserList, UserListSummary, ListItem, MangaSummary
+from .trending import queue_item_events
 
 logger = logging.getLogger(__name__)
 
 COLLECTION = "lists"
+# Per-user index: user_lists/{uid} = {"lists": {list_id: summary fields}, "complete": bool}
+INDEX_COLLECTION = "user_lists"
+INDEX_FIELDS = ["name", "owner_name", "item_count", "created_at", "updated_at"]
+MANGAS_COLLECTION = "mangas"  # catálogo de manga-service (mismo proyecto Firestore)
+ITEMS_SUBCOLLECTION = "items"
+
+# Item storage modes. `embedded`: items array on the list document.
+# `subcollection`: one document per item in lists/{id}/items/{manga_id}.
+STORAGE_EMBEDDED = "embedded"
+STORAGE_SUBCOLLECTION = "subcollection"
+STORAGE_MODES = (STORAGE_EMBEDDED, STORAGE_SUBCOLLECTION)
+
+# Storage mode for new lists
+NEW_LIST_STORAGE = os.getenv("LISTS_ITEM_STORAGE", STORAGE_EMBEDDED)
+
+# Items returned with a list and per page of GET /api/lists/{id}/items
+ITEMS_PAGE_SIZE = int(os.getenv("LISTS_ITEMS_PAGE_SIZE", "100"))
+
+# Max writes per Firestore batch
+BATCH_LIMIT = 500
+
+# Max add + remove ids per items:batch call. Each id can take two writes (the item
+# and its trending shard), plus the list and index writes, in one Firestore batch.
+MAX_BATCH_ITEMS = 240
+
+# Fields fetched by summary queries (projection: the items array is never downloaded)
+SUMMARY_FIELDS = ["name", "owner_uid", "owner_name", "item_count", "created_at", "updated_at"]
+
+# Attempts for an optimistic item update before giving up under contention
+MAX_UPDATE_ATTEMPTS = 5
+
+# Likes / follows: kind -> (per-user records, counter shards), both subcollections of the list
+REACTIONS = {
+    "like": ("likes", "like_shards"),
+    "follow": ("followers", "follower_shards"),
+}
+
+# Counter shards per list and kind. Each shard takes ~1 sustained write/s
+COUNTER_SHARDS = int(os.getenv("LISTS_COUNTER_SHARDS", "100"))
+
+# Seconds the public lists total is served from memory
+TOTAL_CACHE_TTL = float(os.getenv("LISTS_TOTAL_CACHE_TTL", "30"))
+
+
+class CachedCount:
+    """
+    Process-wide cached counter with TTL.
+
+    Local creates/deletes adjust the cached value in place; the TTL bounds
+    drift from writes made by other replicas.
+    """
+
+    def __init__(self, ttl: float = TOTAL_CACHE_TTL):
+        self.ttl = ttl
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, loader: Callable[[], int]) -> int:
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+            # loader dentro del lock: una sola agregación aunque lleguen muchas peticiones
+            self._value = loader()
+            self._expires_at = time.monotonic() + self.ttl
+            return self._value
+
+    def adjust(self, delta: int) -> None:
+        with self._lock:
+            if self._value is not None:
+                self._value = max(0, self._value + delta)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+
+
+_public_total = CachedCount()
+
+# "My lists" per uid, dropped on this replica's writes; TTL bounds staleness from others
+_owner_lists = TTLCache(
+    max_size=int(os.getenv("LISTS_MY_LISTS_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("LISTS_MY_LISTS_CACHE_TTL", "10")),
+)
+
+# Manga metadata for ?expand=manga, keyed by manga id (None: not in the catalog)
+MANGA_FIELDS = ["title", "cover_path", "latest_chapter"]
+# Public base URL for cover keys (CDN / public bucket); unset: cover_url only for full URLs
+COVER_BASE_URL = os.getenv("LISTS_COVER_BASE_URL", "").rstrip("/")
+_manga_cache = TTLCache(
+    max_size=int(os.getenv("LISTS_MANGA_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("LISTS_MANGA_CACHE_TTL", "300")),
+)
+
+# Like / follow totals keyed by (list_id, kind); local writes adjust them in place
+_reaction_totals = TTLCache(
+    max_size=int(os.getenv("LISTS_COUNTER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("LISTS_COUNTER_CACHE_TTL", "5")),
+)
+
+
+class ListPermissionError(PermissionError):
+    """The user trying to modify a list is not its owner."""
+
+
+@dataclass
+class _CachedDoc:
+    """A list document as last read or written in this unit of work."""
+    data: Optional[Dict[str, Any]]  # None: the document does not exist
+    update_time: Any = None
+
+
+def encode_cursor(created_at: datetime, list_id: str) -> str:
+    """Opaque keyset cursor for the public feed: (created_at, id)."""
+    raw = json.dumps([created_at.isoformat(), list_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
 
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, list_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(list_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _sort_key(added_at: datetime, manga_id: str) -> Tuple[float, str]:
+    """Item order (added_at, manga_id), comparable for naive and aware datetimes."""
+    if added_at.tzinfo is None:
+        added_at = added_at.replace(tzinfo=timezone.utc)
+    return added_at.timestamp(), manga_id
+
+
+def _item_events(before: List[dict], after: List[dict]):
+    """Trending events (manga_id, added_at, ±1) for an embedded items change."""
+    old = {item.get("manga_id"): item for item in before}
+    new = {item.get("manga_id"): item for item in after}
+    events = [(m, item["added_at"], 1) for m, item in new.items() if m not in old and item.get("added_at")]
+    events += [(m, item["added_at"], -1) for m, item in old.items() if m not in new and item.get("added_at")]
+    return events
+
+
+def _storage(data: Dict[str, Any]) -> str:
+    return data.get("storage", STORAGE_EMBEDDED)
+
+
+@trace_repo("FirestoreListRepo")
+@instrument_repo("FirestoreListRepo")
 class FirestoreListRepo:
-    """Repository for user lists stored in Firestore."""
+    """
+    Repository for user lists stored in Firestore.
+    
+    An instance is a unit of work: it is created per request and memoizes
+    the list documents it reads, so an ownership check followed by a
+    mutation reads the document once. Writes update the memoized copy.
+    `reads` counts the documents read from Firestore by this instance.
+    """
     
     def __init__(self, db=None):
         if db is None:
             db = admin_firestore.client()
         self._db = db
         self._collection = self._db.collection(COLLECTION)
+        self._index = self._db.collection(INDEX_COLLECTION)
+        self._docs: Dict[str, _CachedDoc] = {}
+        self.reads = 0
     
-    def _doc_to_list(self, doc: DocumentSnapshot) -> Optional[UserList]:
-        """Convert Firestore document to UserList model."""
-        if not doc.exists:
-            return None
-        
-        data = doc.to_dict()
-        items = []
-        for item in data.get("items", []):
-            items.append(ListItem(
-                manga_id=item.get("manga_id", ""),
-                added_at=item.get("added_at", datetime.utcnow()),
-            ))
+    def _load(self, list_id: str, refresh: bool = False) -> _CachedDoc:
+        """Read a list document once per unit of work (or again if `refresh`)."""
+        cached = self._docs.get(list_id)
+        if cached is None or refresh:
+            doc = self._collection.document(list_id).get()
+            self.reads += 1
+            cached = _CachedDoc(
+                data=doc.to_dict() if doc.exists else None,
+                update_time=doc.update_time if doc.exists else None,
+            )
+            self._docs[list_id] = cached
+        return cached
+    
+    def _stored(self, list_id: str, changes: Dict[str, Any], result=None) -> Dict[str, Any]:
+        """Apply a successful write to the memoized copy and return its data."""
+        cached = self._docs.get(list_id)
+        data = dict(cached.data) if cached and cached.data is not None else {}
+        data.update(changes)
+        self._docs[list_id] = _CachedDoc(data, getattr(result, "update_time", None))
+        return data
+    
+    def _data_to_list(self, list_id: str, data: dict) -> UserList:
+        """Build a UserList from raw document data."""
+        items = [self._to_item(item) for item in data.get("items", [])]
         
         return UserList(
-            id=doc.id,
+            id=list_id,
             name=data.get("name", ""),
             owner_uid=data.get("owner_uid", ""),
             owner_name=data.get("owner_name"),
             items=items,
+            item_count=data.get("item_count", len(items)),
+            storage=_storage(data),
             created_at=data.get("created_at", datetime.utcnow()),
             updated_at=data.get("updated_at", datetime.utcnow()),
         )
     
-    def _doc_to_summary(self, doc: DocumentSnapshot) -> Optional[UserListSummary]:
+    @staticmethod
+    def _to_item(item: dict) -> ListItem:
+        return ListItem(
+            manga_id=item.get("manga_id", ""),
+            added_at=item.get("added_at", datetime.utcnow()),
+        )
+    
+    def _items_ref(self, list_id: str):
+        return self._collection.document(list_id).collection(ITEMS_SUBCOLLECTION)
+    
+    def _doc_to_summary(
+        self, doc: DocumentSnapshot, item_count: Optional[int] = None
+    ) -> Optional[UserListSummary]:
         """Convert Firestore document to UserListSummary."""
         if not doc.exists:
             return None
         
         data = doc.to_dict()
+        if item_count is None:
+            item_count = data.get("item_count")
+        if item_count is None:
+            item_count = len(data.get("items", []))
         return UserListSummary(
             id=doc.id,
             name=data.get("name", ""),
             owner_uid=data.get("owner_uid", ""),
             owner_name=data.get("owner_name"),
-            item_count=len(data.get("items", [])),
+            item_count=item_count,
             created_at=data.get("created_at", datetime.utcnow()),
             updated_at=data.get("updated_at", datetime.utcnow()),
         )
     
+    def _to_summaries(self, docs: List[DocumentSnapshot]) -> List[UserListSummary]:
+        """
+        Summaries from projected documents. Lists written before item_count
+        existed get their items counted with one extra batched read.
+        """
+        legacy = [doc.id for doc in docs if (doc.to_dict() or {}).get("item_count") is None]
+        counts: Dict[str, int] = {}
+        if legacy:
+            refs = [self._collection.document(list_id) for list_id in legacy]
+            for doc in self._db.get_all(refs, field_paths=["items"]):
+                self.reads += 1
+                if doc.exists:
+                    counts[doc.id] = len((doc.to_dict() or {}).get("items", []))
+        return [self._doc_to_summary(doc, counts.get(doc.id)) for doc in docs]
+    
+    # Owner index
+    
+    def _index_write(
+        self, batch, owner_uid: Optional[str], list_id: str, fields: Optional[Dict[str, Any]]
+    ) -> None:
+        """
+        Queue the owner's index entry for `list_id` in `batch`, so it commits
+        atomically with the list write. `fields` are merged into the entry;
+        None removes it.
+        """
+        if not owner_uid:
+            return
+        entry = admin_firestore.DELETE_FIELD if fields is None else fields
+        batch.set(self._index.document(owner_uid), {"lists": {list_id: entry}}, merge=True)
+    
+    def _index_to_summaries(self, owner_uid: str, entries: Dict[str, dict]) -> List[UserListSummary]:
+        return [
+            UserListSummary(
+                id=list_id,
+                name=entry.get("name", ""),
+                owner_uid=owner_uid,
+                owner_name=entry.get("owner_name"),
+                item_count=entry.get("item_count", 0),
+                created_at=entry.get("created_at", datetime.utcnow()),
+                updated_at=entry.get("updated_at", datetime.utcnow()),
+            )
+            for list_id, entry in entries.items()
+        ]
+    
+    def _query_by_owner(self, owner_uid: str) -> List[UserListSummary]:
+        query = self._collection.where("owner_uid", "==", owner_uid).select(SUMMARY_FIELDS)
+        docs = [doc for doc in query.stream() if doc.exists]
+        self.reads += max(1, len(docs))  # una consulta vacía también cuenta como lectura
+        return self._to_summaries(docs)
+    
+    def _read_owner_index(self, owner_uid: str) -> List[UserListSummary]:
+        """
+        The owner's lists from their index document (one read).
+        
+        Users whose index is missing or incomplete (lists created before the
+        index existed) are backfilled from the owner query. The backfill is
+        conditioned on the index not having changed since it was read, so a
+        concurrent list write is never overwritten; on conflict it starts over.
+        """
+        index_ref = self._index.document(owner_uid)
+        summaries: List[UserListSummary] = []
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            snap = index_ref.get()
+            self.reads += 1
+            data = (snap.to_dict() or {}) if snap.exists else None
+            if data is not None and data.get("complete"):
+                return self._index_to_summaries(owner_uid, data.get("lists", {}))
+            
+            summaries = self._query_by_owner(owner_uid)
+            index = {
+                "lists": {s.id: s.model_dump(include=set(INDEX_FIELDS)) for s in summaries},
+                "complete": True,
+            }
+            try:
+                if data is None:
+                    index_ref.create(index)
+                else:
+                    index_ref.update(
+                        index, option=self._db.write_option(last_update_time=snap.update_time)
+                    )
+            except (gexc.AlreadyExists, gexc.FailedPrecondition):
+                continue
+            logger.info(f"Backfilled list index for user {owner_uid} ({len(summaries)} lists)")
+            return summaries
+        
+        return summaries  # índice en disputa: servir el resultado de la consulta
+    
     # CRUD Operations
     
-    def create(self, name: str, owner_uid: str, owner_name: str = None) -> UserList:
-        """Create a new list."""
+    def create(
+        self, name: str, owner_uid: str, owner_name: str = None, storage: Optional[str] = None
+    ) -> UserList:
+        """Create a new list (item storage defaults to LISTS_ITEM_STORAGE)."""
+        storage = storage or NEW_LIST_STORAGE
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown item storage: {storage}")
         now = datetime.utcnow()
         data = {
             "name": name,
             "owner_uid": owner_uid,
             "owner_name": owner_name,
             "items": [],
+            "item_count": 0,
+            "storage": storage,
             "created_at": now,
             "updated_at": now,
         }
         doc_ref = self._collection.document()
-        doc_ref.set(data)
+        batch = self._db.batch()
+        batch.set(doc_ref, data)
+        self._index_write(batch, owner_uid, doc_ref.id, {k: data[k] for k in INDEX_FIELDS})
+        results = batch.commit()
+        self._stored(doc_ref.id, data, results[0])
+        _owner_lists.invalidate(owner_uid)
+        _public_total.adjust(+1)
+        public_feed.invalidate()
         
         logger.info(f"Created list {doc_ref.id} for user {owner_uid}")
         return UserList(id=doc_ref.id, **data)
     
-    def get_by_id(self, list_id: str) -> Optional[UserList]:
-        """Get a list by ID."""
-        doc = self._collection.document(list_id).get()
-        return self._doc_to_list(doc)
+    def get_by_id(self, list_id: str, with_items: bool = False) -> Optional[UserList]:
+        """
+        Get a list by ID.
+        
+        Lists stored in the items subcollection come without items unless
+        `with_items`, which loads their first page (see get_items).
+        """
+        cached = self._load(list_id)
+        if cached.data is None:
+            return None
+        lst = self._data_to_list(list_id, cached.data)
+        if with_items and lst.storage == STORAGE_SUBCOLLECTION:
+            lst.items, lst.next_items_cursor = self._subcollection_page(list_id, ITEMS_PAGE_SIZE)
+        return lst
+    
+    def get_items(
+        self, list_id: str, limit: int = ITEMS_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Optional[Tuple[List[ListItem], Optional[str]]]:
+        """
+        One page of a list's items in insertion order, for either storage mode.
+        Returns (items, next_cursor), or None if the list does not exist.
+        """
+        cached = self._load(list_id)
+        if cached.data is None:
+            return None
+        if _storage(cached.data) == STORAGE_SUBCOLLECTION:
+            return self._subcollection_page(list_id, limit, cursor)
+        
+        items = [self._to_item(item) for item in cached.data.get("items", [])]
+        if cursor:
+            after = _sort_key(*decode_cursor(cursor))
+            items = [i for i in items if _sort_key(i.added_at, i.manga_id) > after]
+        page = items[:limit]
+        next_cursor = None
+        if len(items) > limit:
+            next_cursor = encode_cursor(page[-1].added_at, page[-1].manga_id)
+        return page, next_cursor
+    
+    def _subcollection_page(
+        self, list_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[ListItem], Optional[str]]:
+        items_ref = self._items_ref(list_id)
+        query = items_ref.order_by("added_at").order_by("__name__")
+        if cursor:
+            added_at, manga_id = decode_cursor(cursor)
+            query = query.start_after({
+                "added_at": added_at,
+                "__name__": items_ref.document(manga_id),
+            })
+        docs = list(query.limit(limit).stream())
+        self.reads += max(1, len(docs))
+        items = [self._to_item(doc.to_dict() or {}) for doc in docs]
+        
+        next_cursor = None
+        if len(items) == limit:
+            next_cursor = encode_cursor(items[-1].added_at, items[-1].manga_id)
+        return items, next_cursor
     
     def get_by_owner(self, owner_uid: str) -> List[UserListSummary]:
-        """Get all lists owned by a user."""
-        docs = self._collection.where("owner_uid", "==", owner_uid).stream()
-        return [self._doc_to_summary(doc) for doc in docs if doc.exists]
+        """Get all lists owned by a user, newest first (cached per uid)."""
+        lists = _owner_lists.get(owner_uid)
+        if lists is MISSING:
+            lists = self._read_owner_index(owner_uid)
+            lists.sort(key=lambda s: _sort_key(s.created_at, s.id), reverse=True)
+            _owner_lists.set(owner_uid, lists)
+        return list(lists)
     
     def get_public(
         self, 
         page: int = 1, 
-        page_size: int = 20
-    ) -> Tuple[List[UserListSummary], int]:
-        """Get paginated public lists."""
-        # Get total count (inefficient but Firestore doesn't have count)
-        all_docs = list(self._collection.stream())
-        total = len(all_docs)
-        
-        # Get paginated results
-        offset = (page - 1) * page_size
-        docs = (
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[UserListSummary], int, Optional[str]]:
+        """
+        Get paginated public lists, newest first.
+        
+        With `cursor` the page starts right after the (created_at, id) it
+        encodes, so deep pages cost the same as the first one. Without it,
+        `page` falls back to offset pagination. Returns (lists, total, next_cursor).
+        """
+        total = _public_total.get(self.count_lists)
+        
+        query = (
             self._collection
             .order_by("created_at", direction=admin_firestore.Query.DESCENDING)
-            .offset(offset)
-            .limit(page_size)
-            .stream()
+            .order_by("__name__", direction=admin_firestore.Query.DESCENDING)
         )
+        if cursor:
+            created_at, list_id = decode_cursor(cursor)
+            query = query.start_after({
+                "created_at": created_at,
+                "__name__": self._collection.document(list_id),
+            })
+        elif page > 1:
+            query = query.offset((page - 1) * page_size)
         
-        lists = [self._doc_to_summary(doc) for doc in docs if doc.exists]
-        return lists, total
+        query = query.select(SUMMARY_FIELDS).limit(page_size)
+        docs = [doc for doc in query.stream() if doc.exists]
+        self.reads += max(1, len(docs))
+        lists = self._to_summaries(docs)
+        
+        next_cursor = None
+        if len(docs) == page_size:
+            next_cursor = encode_cursor(lists[-1].created_at, lists[-1].id)
+        return lists, total, next_cursor
+    
+    def count_lists(self) -> int:
+        """Total lists via a server-side count() aggregation (no document reads)."""
+        result = self._collection.count(alias="total").get()
+        self.reads += 1
+        return int(result[0][0].value)
     
     def update_name(self, list_id: str, name: str) -> Optional[UserList]:
         """Update list name."""
-        doc_ref = self._collection.document(list_id)
-        doc_ref.update({
+        data = self._load(list_id).data
+        if data is None:
+            return None
+        changes = {
             "name": name,
             "updated_at": datetime.utcnow(),
-        })
-        return self.get_by_id(list_id)
+        }
+        owner_uid = data.get("owner_uid")
+        batch = self._db.batch()
+        batch.update(self._collection.document(list_id), changes)
+        self._index_write(batch, owner_uid, list_id, changes)
+        results = batch.commit()
+        _owner_lists.invalidate(owner_uid)
+        public_feed.invalidate()
+        return self._data_to_list(list_id, self._stored(list_id, changes, results[0]))
     
     def delete(self, list_id: str) -> bool:
-        """Delete a list."""
+        """
+        Delete a list with its subcollections (items, likes, followers, counters).
+        The weight of its items is taken off the trending shards first.
+        """
         doc_ref = self._collection.document(list_id)
-        doc_ref.delete()
+        data = self._load(list_id).data or {}
+        owner_uid = data.get("owner_uid")
+        if _storage(data) == STORAGE_SUBCOLLECTION:
+            items = []
+            for doc in self._items_ref(list_id).select(["added_at"]).stream():
+                self.reads += 1
+                items.append({"manga_id": doc.id, **(doc.to_dict() or {})})
+        else:
+            items = data.get("items", [])
+        events = _item_events(items, [])
+        for start in range(0, len(events), BATCH_LIMIT):
+            batch = self._db.batch()
+            queue_item_events(batch, self._db, events[start:start + BATCH_LIMIT])
+            batch.commit()
+        batch = self._db.batch()
+        # Firestore no borra subcolecciones en cascada
+        self._db.recursive_delete(doc_ref)
+        self._index_write(batch, owner_uid, list_id, None)
+        batch.commit()
+        _owner_lists.invalidate(owner_uid)
+        self._docs[list_id] = _CachedDoc(data=None)
+        _public_total.adjust(-1)
+        public_feed.invalidate()
         logger.info(f"Deleted list {list_id}")
         return True
     
     # Item operations
     
-    def add_item(self, list_id: str, manga_id: str) -> Optional[UserList]:
-        """Add a manga to a list."""
+    def _update_items(
+        self,
+        list_id: str,
+        owner_uid: Optional[str],
+        mutate: Callable[[List[dict]], Optional[List[dict]]],
+        on_subcollection: Callable[[Dict[str, Any]], UserList],
+    ) -> Optional[UserList]:
+        """
+        Optimistic read-modify-write of a list's items.
+        
+        One read (none if this unit of work already has the document), then
+        one write guarded by the document's update_time, so a concurrent
+        change makes the write fail instead of being overwritten and the
+        whole step is retried with a fresh read. `mutate` returns the new
+        items, or None when there is nothing to write (the list is returned
+        as read). Lists in subcollection storage are handed to
+        `on_subcollection` with the document data instead.
+        
+        Raises:
+            ListPermissionError: owner_uid given and the list belongs to someone else
+        """
         doc_ref = self._collection.document(list_id)
-        doc = doc_ref.get()
+        refresh = False
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            cached = self._load(list_id, refresh=refresh)
+            data = cached.data
+            if data is None:
+                return None
+            
+            if owner_uid is not None and data.get("owner_uid") != owner_uid:
+                raise ListPermissionError(list_id)
+            
+            if _storage(data) == STORAGE_SUBCOLLECTION:
+                return on_subcollection(data)
+            
+            before = list(data.get("items", []))
+            items = mutate(list(before))
+            if items is None:
+                return self._data_to_list(list_id, data)
+            
+            changes = {
+                "items": items,
+                "item_count": len(items),
+                "updated_at": datetime.utcnow(),
+            }
+            batch = self._db.batch()
+            batch.update(
+                doc_ref,
+                changes,
+                option=self._db.write_option(last_update_time=cached.update_time),
+            )
+            self._index_write(batch, data.get("owner_uid"), list_id, {
+                "item_count": changes["item_count"],
+                "updated_at": changes["updated_at"],
+            })
+            queue_item_events(batch, self._db, _item_events(before, items))
+            try:
+                results = batch.commit()
+            except gexc.FailedPrecondition:
+                # Otra escritura llegó entre la lectura y el update: releer y reintentar
+                logger.info(f"Concurrent update on list {list_id}, retrying")
+                refresh = True
+                continue
+            
+            _owner_lists.invalidate(data.get("owner_uid"))
+            public_feed.invalidate()  # item_count aparece en el feed
+            return self._data_to_list(list_id, self._stored(list_id, changes, results[0]))
         
-        if not doc.exists:
-            return None
+        raise gexc.Aborted(f"Too many concurrent updates on list {list_id}")
+    
+    def add_item(
+        self, list_id: str, manga_id: str, owner_uid: Optional[str] = None
+    ) -> Optional[UserList]:
+        """Add a manga to a list (no-op if already present)."""
+        def mutate(items: List[dict]) -> Optional[List[dict]]:
+            if any(item.get("manga_id") == manga_id for item in items):
+                return None
+            items.append({
+                "manga_id": manga_id,
+                "added_at": datetime.utcnow(),
+            })
+            return items
         
-        data = doc.to_dict()
-        items = data.get("items", [])
+        lst = self._update_items(
+            list_id, owner_uid, mutate,
+            lambda data: self._write_subcollection_item(list_id, data, manga_id, add=True),
+        )
+        if lst is not None:
+            logger.info(f"Added manga {manga_id} to list {list_id}")
+        return lst
+    
+    def remove_item(
+        self, list_id: str, manga_id: str, owner_uid: Optional[str] = None
+    ) -> Optional[UserList]:
+        """Remove a manga from a list (no-op if not present)."""
+        def mutate(items: List[dict]) -> Optional[List[dict]]:
+            kept = [item for item in items if item.get("manga_id") != manga_id]
+            return kept if len(kept) != len(items) else None
+        
+        lst = self._update_items(
+            list_id, owner_uid, mutate,
+            lambda data: self._write_subcollection_item(list_id, data, manga_id, add=False),
+        )
+        if lst is not None:
+            logger.info(f"Removed manga {manga_id} from list {list_id}")
+        return lst
+    
+    def apply_items(
+        self,
+        list_id: str,
+        add: List[str],
+        remove: List[str],
+        owner_uid: Optional[str] = None,
+    ) -> Optional[UserList]:
+        """
+        Add and remove many mangas in one conditional write.
         
-        # Check if already exists
-        if any(item.get("manga_id") == manga_id for item in items):
-            return self.get_by_id(list_id)  # Already exists, return current
+        Duplicates are ignored, removes are applied before adds (an ID in
+        both sets ends up in the list) and IDs already present / absent are
+        no-ops. Same ownership and concurrency rules as add_item.
+        """
+        add = list(dict.fromkeys(add))
+        remove = list(dict.fromkeys(remove))
+        if len(add) + len(remove) > MAX_BATCH_ITEMS:
+            raise ValueError(f"At most {MAX_BATCH_ITEMS} items per batch")
         
-        items.append({
-            "manga_id": manga_id,
-            "added_at": datetime.utcnow(),
-        })
+        def mutate(items: List[dict]) -> Optional[List[dict]]:
+            drop = set(remove)
+            kept = [item for item in items if item.get("manga_id") not in drop]
+            present = {item.get("manga_id") for item in kept}
+            now = datetime.utcnow()
+            added = [{"manga_id": m, "added_at": now} for m in add if m not in present]
+            if not added and len(kept) == len(items):
+                return None
+            return kept + added
         
-        doc_ref.update({
-            "items": items,
-            "updated_at": datetime.utcnow(),
-        })
+        lst = self._update_items(
+            list_id, owner_uid, mutate,
+            lambda data: self._write_subcollection_items(list_id, data, add, remove),
+        )
+        if lst is not None:
+            logger.info(f"Applied batch to list {list_id}: +{len(add)} -{len(remove)}")
+        return lst
+    
+    def _write_subcollection_items(
+        self, list_id: str, data: Dict[str, Any], add: List[str], remove: List[str]
+    ) -> UserList:
+        """
+        Batch version of _write_subcollection_item: one get_all to see which
+        items exist, then one batch of conditional creates / deletes plus the
+        item_count increment. A concurrent change to any of those items fails
+        the batch, which is then recomputed.
+        """
+        for manga_id in add + remove:
+            if not manga_id or "/" in manga_id or manga_id in (".", ".."):
+                raise ValueError(f"Invalid manga_id: {manga_id!r}")
+        
+        items_ref = self._items_ref(list_id)
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            refs = [items_ref.document(m) for m in dict.fromkeys(add + remove)]
+            existing: Dict[str, Any] = {}  # manga_id -> added_at
+            for doc in self._db.get_all(refs, field_paths=["manga_id", "added_at"]):
+                self.reads += 1
+                if doc.exists:
+                    existing[doc.id] = (doc.to_dict() or {}).get("added_at")
+            
+            to_create = [m for m in add if m not in existing]
+            to_delete = [m for m in remove if m in existing and m not in add]
+            if not to_create and not to_delete:
+                return self._data_to_list(list_id, data)
+            
+            now = datetime.utcnow()
+            batch = self._db.batch()
+            for manga_id in to_create:
+                batch.create(items_ref.document(manga_id), {"manga_id": manga_id, "added_at": now})
+            for manga_id in to_delete:
+                batch.delete(items_ref.document(manga_id), option=self._db.write_option(exists=True))
+            delta = len(to_create) - len(to_delete)
+            counter = {
+                "item_count": admin_firestore.Increment(delta),
+                "updated_at": now,
+            }
+            batch.update(self._collection.document(list_id), counter)
+            self._index_write(batch, data.get("owner_uid"), list_id, counter)
+            queue_item_events(batch, self._db, [(m, now, 1) for m in to_create] + [
+                (m, existing[m], -1) for m in to_delete if existing[m]
+            ])
+            try:
+                results = batch.commit()
+            except (gexc.AlreadyExists, gexc.NotFound):
+                logger.info(f"Concurrent item change on list {list_id}, retrying batch")
+                continue
+            
+            _owner_lists.invalidate(data.get("owner_uid"))
+            public_feed.invalidate()
+            changes = {"item_count": max(0, data.get("item_count", 0) + delta), "updated_at": now}
+            return self._data_to_list(
+                list_id, self._stored(list_id, changes, results[len(to_create) + len(to_delete)])
+            )
+        
+        raise gexc.Aborted(f"Too many concurrent updates on list {list_id}")
+    
+    def _write_subcollection_item(
+        self, list_id: str, data: Dict[str, Any], manga_id: str, add: bool
+    ) -> UserList:
+        """
+        Add or remove one item document in a single batch with the list's
+        item_count increment. The item write is conditional (create / delete
+        if it exists), so a duplicate add or a missing remove fails the whole
+        batch and nothing changes. A remove first reads the item, whose
+        added_at is needed to take its weight off the trending score. Cost
+        does not depend on the list size.
+        """
+        if not manga_id or "/" in manga_id or manga_id in (".", ".."):
+            raise ValueError(f"Invalid manga_id: {manga_id!r}")
+        
+        now = datetime.utcnow()
+        item_ref = self._items_ref(list_id).document(manga_id)
+        batch = self._db.batch()
+        if add:
+            batch.create(item_ref, {"manga_id": manga_id, "added_at": now})
+            events = [(manga_id, now, 1)]
+        else:
+            snapshot = item_ref.get(field_paths=["added_at"])
+            self.reads += 1
+            if not snapshot.exists:
+                return self._data_to_list(list_id, data)
+            batch.delete(item_ref, option=self._db.write_option(last_update_time=snapshot.update_time))
+            added_at = (snapshot.to_dict() or {}).get("added_at")
+            events = [(manga_id, added_at, -1)] if added_at else []
+        delta = 1 if add else -1
+        counter = {
+            "item_count": admin_firestore.Increment(delta),
+            "updated_at": now,
+        }
+        batch.update(self._collection.document(list_id), counter)
+        self._index_write(batch, data.get("owner_uid"), list_id, counter)
+        queue_item_events(batch, self._db, events)
+        try:
+            results = batch.commit()
+        except (gexc.AlreadyExists, gexc.NotFound, gexc.FailedPrecondition):
+            return self._data_to_list(list_id, data)
         
-        logger.info(f"Added manga {manga_id} to list {list_id}")
-        return self.get_by_id(list_id)
+        _owner_lists.invalidate(data.get("owner_uid"))
+        public_feed.invalidate()
+        changes = {"item_count": max(0, data.get("item_count", 0) + delta), "updated_at": now}
+        return self._data_to_list(list_id, self._stored(list_id, changes, results[1]))
     
-    def remove_item(self, list_id: str, manga_id: str) -> Optional[UserList]:
-        """Remove a manga from a list."""
+    def migrate_items_to_subcollection(self, list_id: str) -> bool:
+        """
+        Move an embedded list's items into the items subcollection.
+        
+        Item documents are written first (idempotent sets), and item documents
+        no longer in the array (left by an earlier attempt or an interrupted
+        run) are deleted. The list is then switched to subcollection storage
+        with a write conditioned on the update_time read, so an item mutation
+        that lands in between makes the switch retry with the new items.
+        Returns False if there was nothing to migrate.
+        """
         doc_ref = self._collection.document(list_id)
-        doc = doc_ref.get()
+        items_ref = self._items_ref(list_id)
+        refresh = False
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            cached = self._load(list_id, refresh=refresh)
+            if cached.data is None or _storage(cached.data) == STORAGE_SUBCOLLECTION:
+                return False
+            
+            items = []
+            for item in cached.data.get("items", []):
+                manga_id = item.get("manga_id", "")
+                if not manga_id or "/" in manga_id:
+                    logger.warning(f"Skipping invalid item {manga_id!r} in list {list_id}")
+                    continue
+                items.append(item)
+            
+            keep = {item["manga_id"] for item in items}
+            writes = [(items_ref.document(item["manga_id"]), item) for item in items]
+            writes += [
+                (doc.reference, None)  # None: borrar
+                for doc in items_ref.select([]).stream()
+                if doc.id not in keep
+            ]
+            for start in range(0, len(writes), BATCH_LIMIT):
+                batch = self._db.batch()
+                for ref, item in writes[start:start + BATCH_LIMIT]:
+                    if item is None:
+                        batch.delete(ref)
+                    else:
+                        batch.set(ref, item)
+                batch.commit()
+            
+            changes = {
+                "storage": STORAGE_SUBCOLLECTION,
+                "items": admin_firestore.DELETE_FIELD,
+                "item_count": len(items),
+            }
+            try:
+                result = doc_ref.update(
+                    changes,
+                    option=self._db.write_option(last_update_time=cached.update_time),
+                )
+            except gexc.FailedPrecondition:
+                refresh = True
+                continue
+            
+            changes["items"] = []
+            self._stored(list_id, changes, result)
+            logger.info(f"Migrated {len(items)} items of list {list_id} to subcollection")
+            return True
         
-        if not doc.exists:
+        raise gexc.Aborted(f"Too many concurrent updates on list {list_id}")
+    
+    # Likes / follows
+    
+    def set_reaction(
+        self, list_id: str, kind: str, user_uid: str, active: bool
+    ) -> Optional[bool]:
+        """
+        Like / follow (active=True) or undo it, idempotently.
+        
+        The per-user record (likes/{uid}, followers/{uid}) is created or
+        deleted conditionally in one batch with a ±1 Increment on a random
+        counter shard, so a repeated call fails the batch and counts nothing,
+        and concurrent users of a hot list spread over COUNTER_SHARDS
+        documents instead of contending on one.
+        
+        Returns:
+            True if the state changed, False if it already was `active`,
+            None if the list does not exist
+        """
+        records, shards = REACTIONS[kind]
+        if self._load(list_id).data is None:
             return None
         
-        data = doc.to_dict()
-        items = [
-            item for item in data.get("items", [])
-            if item.get("manga_id") != manga_id
-        ]
+        doc_ref = self._collection.document(list_id)
+        record = doc_ref.collection(records).document(user_uid)
+        batch = self._db.batch()
+        if active:
+            batch.create(record, {"uid": user_uid, "created_at": datetime.utcnow()})
+        else:
+            batch.delete(record, option=self._db.write_option(exists=True))
+        delta = 1 if active else -1
+        shard = doc_ref.collection(shards).document(str(random.randrange(COUNTER_SHARDS)))
+        batch.set(shard, {"count": admin_firestore.Increment(delta)}, merge=True)
+        try:
+            batch.commit()
+        except (gexc.AlreadyExists, gexc.NotFound):
+            return False
         
-        doc_ref.update({
-            "items": items,
-            "updated_at": datetime.utcnow(),
-        })
+        cached = _reaction_totals.get((list_id, kind))
+        if cached is not MISSING:
+            _reaction_totals.set((list_id, kind), max(0, cached + delta))
+        return True
+    
+    def reaction_totals(self, list_id: str) -> Dict[str, int]:
+        """
+        Likes / follows of a list: the sum of its counter shards, one
+        aggregation per kind (not one read per shard), cached briefly.
+        """
+        totals: Dict[str, int] = {}
+        doc_ref = self._collection.document(list_id)
+        for kind, (_, shards) in REACTIONS.items():
+            total = _reaction_totals.get((list_id, kind))
+            if total is MISSING:
+                result = doc_ref.collection(shards).sum("count", alias="total").get()
+                self.reads += 1
+                total = max(0, int(result[0][0].value or 0))
+                _reaction_totals.set((list_id, kind), total)
+            totals[kind] = total
+        return totals
+    
+    def user_reactions(self, list_id: str, user_uid: str) -> Dict[str, bool]:
+        """Whether `user_uid` likes / follows the list (one get_all)."""
+        doc_ref = self._collection.document(list_id)
+        refs = {kind: doc_ref.collection(records).document(user_uid) for kind, (records, _) in REACTIONS.items()}
+        kinds = {ref.path: kind for kind, ref in refs.items()}
+        state = {kind: False for kind in REACTIONS}
+        for doc in self._db.get_all(list(refs.values()), field_paths=["uid"]):
+            self.reads += 1
+            if doc.exists:
+                state[kinds[doc.reference.path]] = True
+        return state
+    
+    def expand_mangas(self, items: List[Any]) -> None:
+        """
+        Attach catalog metadata to `items` in place (list items or trending
+        entries: anything with `manga_id` and `manga`).
         
-        logger.info(f"Removed manga {manga_id} from list {list_id}")
-        return self.get_by_id(list_id)
+        Served from a process-wide TTL cache; the misses are fetched from the
+        mangas collection with a single projected get_all.
+        """
+        found, missing = _manga_cache.get_many(dict.fromkeys(i.manga_id for i in items))
+        # IDs que no son un ID de documento válido no pueden estar en el catálogo
+        missing = [m for m in missing if m and "/" not in m]
+        if missing:
+            refs = [self._db.collection(MANGAS_COLLECTION).document(m) for m in missing]
+            loaded = {m: None for m in missing}
+            for doc in self._db.get_all(refs, field_paths=MANGA_FIELDS):
+                self.reads += 1
+                if doc.exists:
+                    loaded[doc.id] = self._to_manga_summary(doc.id, doc.to_dict() or {})
+            for manga_id, manga in loaded.items():
+                _manga_cache.set(manga_id, manga)
+            found.update(loaded)
+        
+        for item in items:
+            item.manga = found.get(item.manga_id)
+    
+    def manga_exists(self, manga_id: str) -> bool:
+        """Whether `manga_id` is in the catalog (see existing_mangas)."""
+        return manga_id in self.existing_mangas([manga_id])
+    
+    def existing_mangas(self, manga_ids_: List[str]) -> set:
+        """
+        The subset of `manga_ids_` that is in the catalog.
+        
+        IDs the ID filter says are "probably" there, or that the manga cache
+        knows, are answered locally; the rest are read with one projected
+        get_all. Those results are cached (and existing mangas added to the
+        filter).
+        """
+        found = set()
+        unknown = []
+        for manga_id in dict.fromkeys(manga_ids_):
+            if manga_ids.might_contain(manga_id):
+                found.add(manga_id)
+                continue
+            cached = _manga_cache.get(manga_id)
+            if cached is not MISSING:
+                if cached is not None:
+                    found.add(manga_id)
+            elif manga_id and "/" not in manga_id:
+                unknown.append(manga_id)
+        
+        if unknown:
+            refs = [self._db.collection(MANGAS_COLLECTION).document(m) for m in unknown]
+            loaded = {m: None for m in unknown}
+            for doc in self._db.get_all(refs, field_paths=MANGA_FIELDS):
+                self.reads += 1
+                if doc.exists:
+                    loaded[doc.id] = self._to_manga_summary(doc.id, doc.to_dict() or {})
+            for manga_id, manga in loaded.items():
+                _manga_cache.set(manga_id, manga)
+                if manga is not None:
+                    manga_ids.add(manga_id)
+                    found.add(manga_id)
+        return found
+    
+    @staticmethod
+    def _to_manga_summary(manga_id: str, data: dict) -> MangaSummary:
+        cover_path = data.get("cover_path") or ""
+        if cover_path.startswith(("http://", "https://")):
+            cover_url = cover_path
+        elif cover_path and COVER_BASE_URL:
+            cover_url = f"{COVER_BASE_URL}/{cover_path.lstrip('/')}"
+        else:
+            cover_url = None  # clave S3 privada: la URL firmada la da manga-service
+        return MangaSummary(
+            id=manga_id,
+            title=data.get("title", ""),
+            cover_path=cover_path,
+            cover_url=cover_url,
+            latest_chapter=data.get("latest_chapter"),
+        )
     
     def is_owner(self, list_id: str, user_uid: str) -> bool:
         """Check if user is owner of list."""
@@ -0,0 +1,169 @@
+"""
+"Most-listed mangas" ranking with exponential time decay.
+
+Item mutations add, in the same batch as the list write, an Increment to one
+random shard of manga_trending/{manga_id}/trending_shards/{n}. The increment is
+the listing's weight exp(λ·(t − EPOCH)), where t is when the item was added.
+A remove subtracts the weight its add contributed. Scores share the fixed
+epoch, so they compare directly without rewriting old counters. Multiply by
+exp(−λ·(now − EPOCH)) to get the current decayed value. Lists that are
+deleted are not subtracted; their weight decays away.
+
+TrendingBoard keeps the totals in memory. Each refresh reads only the shards
+written since the previous one, then recomputes the top K from memory, so a
+refresh costs as much as the writes made since the last one.
+
+Configuration (env):
+    TRENDING_SHARDS           Counter shards per manga (default 4)
+    TRENDING_HALF_LIFE_DAYS   Score half-life (default 7)
+    TRENDING_TOP_K            Mangas kept in the ranking (default 50)
+    TRENDING_REFRESH          Seconds between refreshes (default 60)
+
+Weights double every half-life, so with the default of 7 days they exceed
+float range about 19 years after EPOCH. Move EPOCH forward (and reset the
+counters) well before that.
+"""
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import heapq
+import logging
+import math
+import os
+import random
+import threading
+
+from firebase_admin import firestore as admin_firestore
+
+from .models import TrendingManga
+
+logger = logging.getLogger(__name__)
+
+TRENDING_COLLECTION = "manga_trending"
+SHARDS_SUBCOLLECTION = "trending_shards"
+
+TRENDING_SHARDS = int(os.getenv("TRENDING_SHARDS", "4"))
+HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", "7"))
+TOP_K = int(os.getenv("TRENDING_TOP_K", "50"))
+REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH", "60"))
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)
+
+REFRESH_PAGE_SIZE = 1000
+
+# (manga_id, added_at of the listing, +1 add / -1 remove)
+ItemEvent = Tuple[str, datetime, int]
+
+
+def _seconds_since_epoch(at: datetime) -> float:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.timestamp() - EPOCH.timestamp()
+
+
+def weight(at: datetime) -> float:
+    """Score contributed by a listing made at `at` (in epoch units)."""
+    return math.exp(DECAY_RATE * _seconds_since_epoch(at))
+
+
+def decayed(score: float, now: Optional[datetime] = None) -> float:
+    """Convert an epoch-unit score to its value at `now`."""
+    now = now or datetime.now(timezone.utc)
+    return score * math.exp(-DECAY_RATE * _seconds_since_epoch(now))
+
+
+def queue_item_events(batch, db, events: Iterable[ItemEvent]) -> None:
+    """Add the shard increments for `events` to a write batch."""
+    for manga_id, added_at, delta in events:
+        shard = db.collection(TRENDING_COLLECTION).document(manga_id) \
+            .collection(SHARDS_SUBCOLLECTION).document(str(random.randrange(TRENDING_SHARDS)))
+        batch.set(shard, {
+            "manga_id": manga_id,
+            "score": admin_firestore.Increment(delta * weight(added_at)),
+            "updated_at": admin_firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+
+
+class TrendingBoard:
+    """In-memory top K, refreshed from the shards changed since the last refresh."""
+
+    def __init__(self, k: int = TOP_K, interval: float = REFRESH_INTERVAL):
+        self.k = k
+        self.interval = interval
+        self._shards: Dict[str, float] = {}  # shard path -> score
+        self._totals: Dict[str, float] = {}  # manga_id -> score
+        self._top: List[Tuple[str, float]] = []
+        self._cursor = None  # último shard leído (updated_at, __name__)
+        self.refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self, db) -> int:
+        """Apply shards written since the last refresh. Returns how many were read."""
+        group = db.collection_group(SHARDS_SUBCOLLECTION)
+        read = 0
+        with self._lock:
+            while True:
+                # __name__ desempata shards con el mismo SERVER_TIMESTAMP (mismo commit)
+                query = group.order_by("updated_at").order_by("__name__")
+                if self._cursor is not None:
+                    query = query.start_after(self._cursor)
+                docs = list(query.limit(REFRESH_PAGE_SIZE).stream())
+                for doc in docs:
+                    data = doc.to_dict() or {}
+                    manga_id = data.get("manga_id") or doc.reference.parent.parent.id
+                    score = float(data.get("score", 0.0))
+                    previous = self._shards.get(doc.reference.path, 0.0)
+                    self._shards[doc.reference.path] = score
+                    self._totals[manga_id] = self._totals.get(manga_id, 0.0) + score - previous
+                if docs:
+                    self._cursor = docs[-1]
+                read += len(docs)
+                if len(docs) < REFRESH_PAGE_SIZE:
+                    break
+
+            if read or self.refreshed_at is None:
+                self._top = heapq.nlargest(
+                    self.k,
+                    ((m, s) for m, s in self._totals.items() if s > 1e-9),
+                    key=lambda entry: entry[1],
+                )
+            self.refreshed_at = datetime.now(timezone.utc)
+        if read:
+            logger.info("Trending refresh: %d changed shards", read)
+        return read
+
+    def top(self, limit: Optional[int] = None) -> List[TrendingManga]:
+        now = datetime.now(timezone.utc)
+        return [
+            TrendingManga(manga_id=manga_id, score=decayed(score, now))
+            for manga_id, score in self._top[: limit or self.k]
+        ]
+
+    def _run(self, db_factory: Callable[[], object]) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh(db_factory())
+            except Exception as e:
+                logger.warning(f"Trending refresh failed: {e}")
+
+    def start(self, db_factory: Callable[[], object]) -> None:
+        """Load now (best effort) and keep refreshing in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        try:
+            self.refresh(db_factory())
+        except Exception as e:
+            logger.warning(f"Initial trending load failed: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(db_factory,), name="trending-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+trending_board = TrendingBoard()
@@ -1,7 +1,9 @@
 # tests/conftest.py
 """Test fixtures for list-service."""
+import importlib.util
 import os
 import sys
+import types
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -12,6 +14,30 @@ THIS = Path(__file__).resolve()
 SRC_DIR = THIS.parents[1] / "src"
 sys.path.insert(0, str(SRC_DIR))
 
+# shared.auth is mocked below, but the pure-Python helpers in backend/shared
+# are used for real. Load them by path: `shared` is not importable as a
+# package on the CI PYTHONPATH, so a stand-in package is registered too
+# (`from shared import metrics` and relative imports inside shared resolve).
+SHARED_DIR = THIS.parents[2] / "shared"
+_shared = sys.modules.setdefault("shared", types.ModuleType("shared"))
+_shared.__path__ = [str(SHARED_DIR)]
+for _name in ("bloom", "google_keys", "metrics", "token_cache", "tracing"):
+    _spec = importlib.util.spec_from_file_location(f"shared.{_name}", SHARED_DIR / f"{_name}.py")
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_spec.name] = _module
+    _spec.loader.exec_module(_module)
+    setattr(_shared, _name, _module)
+
+@pytest.fixture
+def real_shared_auth():
+    """A fresh copy of the real backend/shared/auth.py (shared.auth itself is mocked)."""
+    spec = importlib.util.spec_from_file_location("shared.auth_under_test", SHARED_DIR / "auth.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    module._verify_executor.shutdown(wait=False)
+
+
 # Mock shared.auth before importing the app
 @pytest.fixture(scope="session", autouse=True)
 def mock_shared_auth():
@@ -27,6 +53,8 @@ def mock_shared_auth():
         mock_auth.init_firebase = MagicMock(return_value=MagicMock())
         mock_auth.get_current_user = MagicMock(return_value=mock_user)
         mock_auth.get_optional_user = MagicMock(return_value=mock_user)
+        mock_auth.get_current_user_async = MagicMock(return_value=mock_user)
+        mock_auth.get_optional_user_async = MagicMock(return_value=mock_user)
         
         sys.modules["shared"] = MagicMock()
         sys.modules["shared.auth"] = mock_auth
@@ -52,18 +80,28 @@ def app_client(mock_shared_auth):
         return mock_user
     
     # Import the actual dependency functions to override them
-    from shared.auth import get_current_user, get_optional_user
+    from shared.auth import (
+        get_current_user,
+        get_current_user_async,
+        get_optional_user,
+        get_optional_user_async,
+    )
     app.dependency_overrides[get_current_user] = fake_get_current_user
     app.dependency_overrides[get_optional_user] = fake_get_optional_user
+    app.dependency_overrides[get_current_user_async] = fake_get_current_user
+    app.dependency_overrides[get_optional_user_async] = fake_get_optional_user
     
     # Mock the repository
     from list_service.repository import FirestoreListRepo
     from list_service.main import get_repo
     
     mock_repo = MagicMock(spec=FirestoreListRepo)
-    mock_repo.get_public.return_value = ([], 0)
+    mock_repo.get_public.return_value = ([], 0, None)
     mock_repo.get_by_owner.return_value = []
     
     app.dependency_overrides[get_repo] = lambda: mock_repo
     
+    from list_service.feed_cache import public_feed
+    public_feed.invalidate()
+    
     return TestClient(app)
@@ -0,0 +1,77 @@
+# tests/test_auth_verify.py
+"""Tests for the async token verification in backend/shared/auth.py."""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+
+def _slow_verifier(calls, result=None, error=None):
+    lock = threading.Lock()
+
+    def verify(token, check_revoked):
+        with lock:
+            calls.append((token, check_revoked))
+        time.sleep(0.05)  # los demás llegan mientras tanto
+        if error is not None:
+            raise error
+        return result
+    return verify
+
+
+def test_concurrent_identical_tokens_share_one_verification(real_shared_auth, monkeypatch):
+    auth = real_shared_auth
+    calls = []
+    claims = {"uid": "u1", "exp": time.time() + 3600}
+    monkeypatch.setattr(auth, "_verify_uncached", _slow_verifier(calls, result=claims))
+
+    async def scenario():
+        return await asyncio.gather(*(auth.verify_firebase_token_async("tok") for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert calls == [("tok", False)]
+    assert results == [claims] * 5
+    assert results[0] is not results[1]  # cada llamador recibe su copia
+    assert auth._inflight == {}
+
+
+def test_failure_propagates_to_every_waiter(real_shared_auth, monkeypatch):
+    auth = real_shared_auth
+    calls = []
+    error = HTTPException(status_code=401, detail="Token has expired")
+    monkeypatch.setattr(auth, "_verify_uncached", _slow_verifier(calls, error=error))
+
+    async def scenario():
+        return await asyncio.gather(
+            *(auth.verify_firebase_token_async("tok") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(isinstance(r, HTTPException) and r.status_code == 401 for r in results)
+    assert auth._inflight == {}
+
+
+def test_different_tokens_verify_separately(real_shared_auth, monkeypatch):
+    auth = real_shared_auth
+    calls = []
+    monkeypatch.setattr(auth, "_verify_uncached", _slow_verifier(calls, result={"uid": "u"}))
+
+    async def scenario():
+        await asyncio.gather(auth.verify_firebase_token_async("a"), auth.verify_firebase_token_async("b"))
+
+    asyncio.run(scenario())
+
+    assert sorted(calls) == [("a", False), ("b", False)]
+
+
+def test_cached_token_skips_the_executor(real_shared_auth, monkeypatch):
+    auth = real_shared_auth
+    auth._token_cache.put("tok", {"uid": "u1", "exp": time.time() + 3600})
+    monkeypatch.setattr(auth, "_verify_uncached", pytest.fail)
+
+    assert asyncio.run(auth.verify_firebase_token_async("tok"))["uid"] == "u1"
@@ -0,0 +1,34 @@
+# tests/test_catalog.py
+"""Tests for the local manga ID filter."""
+from shared.bloom import BloomFilter
+
+from list_service.catalog import MangaIdFilter
+
+
+def _snapshot(*ids):
+    return BloomFilter.from_keys(ids).to_bytes()
+
+
+def test_filter_answers_locally_after_load():
+    id_filter = MangaIdFilter(fetcher=lambda etag: (_snapshot("m1", "m2"), '"v1"'))
+    assert id_filter.might_contain("m1") is None  # nada cargado todavía
+
+    assert id_filter.refresh() is True
+    assert id_filter.might_contain("m1") is True
+    assert id_filter.might_contain("nope") is False
+
+
+def test_refresh_is_conditional_and_keeps_local_adds():
+    etags = []
+
+    def fetcher(etag):
+        etags.append(etag)
+        return None if etag == '"v1"' else (_snapshot("m1"), '"v1"')
+
+    id_filter = MangaIdFilter(fetcher=fetcher)
+    id_filter.refresh()
+    id_filter.add("brand-new")
+
+    assert id_filter.refresh() is False
+    assert etags == [None, '"v1"']
+    assert id_filter.might_contain("brand-new") is True
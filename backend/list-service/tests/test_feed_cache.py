@@ -0,0 +1,58 @@
+# tests/test_feed_cache.py
+"""Tests for the public feed cache."""
+import threading
+import time
+
+from list_service.feed_cache import FeedCache, InMemoryStore
+
+
+def test_hit_until_invalidated():
+    cache = FeedCache(max_pages=5, ttl=60)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return b"page-%d" % len(calls)
+
+    assert cache.get_or_load("1:20", load) == b"page-1"
+    assert cache.get_or_load("1:20", load) == b"page-1"
+    cache.invalidate()
+    assert cache.get_or_load("1:20", load) == b"page-2"
+    assert len(calls) == 2
+
+
+def test_only_first_pages_without_cursor_are_cacheable():
+    cache = FeedCache(max_pages=2, ttl=60)
+    assert cache.cacheable(1, None)
+    assert not cache.cacheable(3, None)
+    assert not cache.cacheable(1, "cursor")
+
+
+def test_shared_store_propagates_pages_and_invalidation():
+    store = InMemoryStore()
+    replica_a = FeedCache(ttl=60, store=store)
+    replica_b = FeedCache(ttl=60, store=store)
+
+    replica_a.get_or_load("1:20", lambda: b"v1")
+    assert replica_b.get_or_load("1:20", lambda: b"unused") == b"v1"
+
+    replica_a.invalidate()
+    assert replica_b.get_or_load("1:20", lambda: b"v2") == b"v2"
+
+
+def test_concurrent_misses_load_once():
+    cache = FeedCache(ttl=60)
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        time.sleep(0.05)
+        return b"page"
+
+    threads = [threading.Thread(target=cache.get_or_load, args=("1:20", slow_load)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
@@ -0,0 +1,113 @@
+# tests/test_google_keys.py
+"""Tests for the Google signing key set, with a stub fetcher instead of HTTP."""
+import datetime
+import time
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from shared import google_keys
+from shared.google_keys import KeySet, verify_firebase_jwt
+
+PROJECT = "inku-test"
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    """RSA key and its self-signed certificate (PEM), like Google publishes."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class StubFetcher:
+    def __init__(self, certs, fail=False):
+        self.certs = certs
+        self.fail = fail
+        self.calls = 0
+        self.key_set = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.key_set is not None:
+            assert not self.key_set._lock.locked(), "fetch must run outside the lock"
+        if self.fail:
+            raise OSError("network down")
+        return self.certs, 600
+
+
+def _token(key, kid="k1", **claims):
+    now = int(time.time())
+    payload = {
+        "aud": PROJECT, "iss": f"https://securetoken.google.com/{PROJECT}",
+        "sub": "user-1", "iat": now, "exp": now + 3600, **claims,
+    }
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+
+def test_verifies_tokens_with_stub_keys(signing_key):
+    key, pem = signing_key
+    fetcher = StubFetcher({"k1": pem})
+    key_set = fetcher.key_set = KeySet(fetcher=fetcher)
+
+    claims = verify_firebase_jwt(_token(key), PROJECT, key_set)
+
+    assert claims["uid"] == "user-1"
+    assert fetcher.calls == 1
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_firebase_jwt(_token(key, aud="other"), PROJECT, key_set)
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(signing_key):
+    _, pem = signing_key
+    fetcher = StubFetcher({"k1": pem})
+    key_set = fetcher.key_set = KeySet(fetcher=fetcher)
+    key_set.refresh()
+
+    assert key_set.get_key("rotated") is None
+    assert key_set.get_key("rotated") is None
+    assert fetcher.calls == 1  # el refresh inicial; dentro del intervalo no se reintenta
+
+
+def test_failed_initial_fetch_backs_off(monkeypatch):
+    fetcher = StubFetcher({}, fail=True)
+    key_set = fetcher.key_set = KeySet(fetcher=fetcher)
+
+    assert key_set.get_key("k1") is None
+    assert key_set.get_key("k1") is None
+    assert fetcher.calls == 1
+
+    # Vencido el plazo se reintenta, y cada fallo dobla la espera
+    monkeypatch.setattr(key_set, "_next_attempt", 0.0)
+    assert key_set.get_key("k1") is None
+    assert fetcher.calls == 2
+    assert key_set._retry_delay() == 2 * google_keys.MIN_REFRESH_INTERVAL
+    assert key_set._next_attempt > time.time() + google_keys.MIN_REFRESH_INTERVAL
+
+
+def test_successful_fetch_resets_backoff(signing_key):
+    _, pem = signing_key
+    fetcher = StubFetcher({"k1": pem}, fail=True)
+    key_set = fetcher.key_set = KeySet(fetcher=fetcher)
+    with pytest.raises(OSError):
+        key_set.refresh()
+
+    fetcher.fail = False
+    key_set.refresh()
+
+    assert key_set.loaded
+    assert key_set._failures == 0
+    assert key_set._retry_delay() == google_keys.MIN_REFRESH_INTERVAL
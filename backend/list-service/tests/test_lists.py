@@ -20,3 +20,157 @@ def test_get_public_lists_with_pagination(app_client):
     data = response.json()
     assert data["page"] == 1
     assert data["page_size"] == 10
+
+
+def test_get_public_lists_rejects_deep_offset_pages(app_client):
+    """Deep offset pages are capped; clients must use the cursor."""
+    response = app_client.get("/api/lists/public?page=1000")
+    assert response.status_code == 422
+
+
+def test_get_public_lists_returns_next_cursor(app_client):
+    response = app_client.get("/api/lists/public?cursor=abc")
+    assert response.status_code == 200
+    assert "next_cursor" in response.json()
+
+
+def test_mutation_reports_firestore_reads(app_client, monkeypatch):
+    """The owner check and the rename share one document read."""
+    from unittest.mock import MagicMock
+    from list_service import main
+    from list_service.repository import FirestoreListRepo
+
+    db = MagicMock()
+    snap = db.collection.return_value.document.return_value.get.return_value
+    snap.exists = True
+    snap.to_dict.return_value = {"name": "Old", "owner_uid": "test-user-123", "items": []}
+    monkeypatch.setattr(main, "FirestoreListRepo", lambda: FirestoreListRepo(db))
+    app_client.app.dependency_overrides.pop(main.get_repo)
+
+    response = app_client.patch("/api/lists/list-1", json={"name": "New"})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "New"
+    assert response.headers[main.READS_HEADER] == "1"
+
+
+def test_get_list_items_page(app_client):
+    from list_service.main import get_repo
+    repo = app_client.app.dependency_overrides[get_repo]()
+    repo.get_items.return_value = ([], "next")
+
+    response = app_client.get("/api/lists/list-1/items?limit=10&cursor=abc")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": "next"}
+    repo.get_items.assert_called_once_with("list-1", limit=10, cursor="abc")
+
+
+def test_get_list_items_missing_list(app_client):
+    from list_service.main import get_repo
+    app_client.app.dependency_overrides[get_repo]().get_items.return_value = None
+
+    assert app_client.get("/api/lists/nope/items").status_code == 404
+
+
+def test_get_list_expand_manga(app_client):
+    from datetime import datetime
+    from list_service.main import get_repo
+    from list_service.models import UserList
+    repo = app_client.app.dependency_overrides[get_repo]()
+    repo.get_by_id.return_value = UserList(
+        id="list-1", name="Favs", owner_uid="u1",
+        created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1),
+    )
+
+    assert app_client.get("/api/lists/list-1?expand=manga").status_code == 200
+    repo.expand_mangas.assert_called_once()
+    assert app_client.get("/api/lists/list-1?expand=chapters").status_code == 422
+
+
+def test_public_feed_is_served_from_cache(app_client):
+    from list_service.main import get_repo
+    repo = app_client.app.dependency_overrides[get_repo]()
+
+    first = app_client.get("/api/lists/public?page_size=7")
+    second = app_client.get("/api/lists/public?page_size=7")
+
+    assert first.json() == second.json()
+    assert repo.get_public.call_count == 1
+
+
+def test_batch_items_reports_unknown_mangas(app_client):
+    from datetime import datetime
+    from list_service.main import get_repo
+    from list_service.models import UserList
+    repo = app_client.app.dependency_overrides[get_repo]()
+    repo.existing_mangas.return_value = {"m1"}
+    repo.apply_items.return_value = UserList(
+        id="list-1", name="Favs", owner_uid="test-user-123", item_count=1,
+        created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1),
+    )
+
+    response = app_client.post(
+        "/api/lists/list-1/items:batch", json={"add": ["m1", "ghost"], "remove": ["m9"]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["not_found"] == ["ghost"]
+    repo.apply_items.assert_called_once_with("list-1", ["m1"], ["m9"], owner_uid="test-user-123")
+
+
+def test_item_writes_report_conflicts_as_409(app_client, monkeypatch):
+    from google.api_core import exceptions as gexc
+    from list_service import main
+    from list_service.main import get_repo
+    monkeypatch.setattr(main, "VALIDATE_MANGA_IDS", False)
+    repo = app_client.app.dependency_overrides[get_repo]()
+    aborted = gexc.Aborted("Too many concurrent updates on list list-1")
+    repo.add_item.side_effect = repo.remove_item.side_effect = repo.apply_items.side_effect = aborted
+
+    responses = [
+        app_client.post("/api/lists/list-1/items", json={"manga_id": "m1"}),
+        app_client.delete("/api/lists/list-1/items/m1"),
+        app_client.post("/api/lists/list-1/items:batch", json={"add": ["m1"]}),
+    ]
+
+    assert [r.status_code for r in responses] == [409, 409, 409]
+    assert responses[0].headers["Retry-After"] == "1"
+
+
+def test_trending_mangas_served_from_board(app_client, monkeypatch):
+    from list_service import main
+    from unittest.mock import MagicMock
+    from list_service.models import TrendingManga
+    board = MagicMock()
+    board.top.return_value = [TrendingManga(manga_id="m1", score=2.5)]
+    board.refreshed_at = None
+    monkeypatch.setattr(main, "trending_board", board)
+
+    response = app_client.get("/api/lists/trending-mangas?limit=5")
+
+    assert response.status_code == 200
+    assert response.json()["mangas"][0] == {"manga_id": "m1", "score": 2.5, "manga": None}
+    board.top.assert_called_once_with(5)
+
+
+def test_like_returns_counts(app_client):
+    from list_service.main import app, get_repo
+    repo = app.dependency_overrides[get_repo]()
+    repo.set_reaction.return_value = True
+    repo.reaction_totals.return_value = {"like": 3, "follow": 1}
+
+    response = app_client.put("/api/lists/list-1/like")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "list_id": "list-1", "likes": 3, "followers": 1, "liked": True, "following": None,
+    }
+    repo.set_reaction.assert_called_once_with("list-1", "like", "test-user-123", True)
+
+
+def test_like_missing_list(app_client):
+    from list_service.main import app, get_repo
+    app.dependency_overrides[get_repo]().set_reaction.return_value = None
+
+    assert app_client.delete("/api/lists/nope/follow").status_code == 404
@@ -0,0 +1,64 @@
+# tests/test_metrics.py
+"""Tests for the shared Prometheus metrics module."""
+import pytest
+
+from shared.metrics import Registry, instrument_repo, register_cache
+from shared import metrics
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = Registry()
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    calls = registry.counter("op_total", "Ops", ("op",))
+    latency.observe(0.05, op="read")
+    latency.observe(0.5, op="read")
+    calls.inc(op="read")
+
+    text = registry.render()
+
+    assert '# TYPE op_seconds histogram' in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 2' in text
+    assert 'op_seconds_count{op="read"} 2' in text
+    assert 'op_total{op="read"} 1' in text
+
+
+def test_instrument_repo_counts_calls_and_errors():
+    @instrument_repo("FakeRepo")
+    class FakeRepo:
+        def get(self):
+            return 1
+
+        def fail(self):
+            raise ValueError("boom")
+
+    repo = FakeRepo()
+    repo.get()
+    with pytest.raises(ValueError):
+        repo.fail()
+
+    assert metrics.FIRESTORE_CALLS.value(repo="FakeRepo", method="get", outcome="ok") == 1
+    assert metrics.FIRESTORE_CALLS.value(repo="FakeRepo", method="fail", outcome="error") == 1
+    assert metrics.FIRESTORE_LATENCY.count(repo="FakeRepo", method="get") == 1
+
+
+def test_cache_stats_are_read_at_scrape_time():
+    stats = {"hits": 3, "misses": 1}
+    register_cache("test_cache", lambda: stats)
+    stats["hits"] = 9
+
+    text = metrics.REGISTRY.render()
+
+    assert 'cache_hits_total{cache="test_cache"} 9' in text
+    assert "# TYPE cache_hits_total counter" in text
+    assert "# TYPE cache_misses_total counter" in text
+    assert 'cache_hit_ratio{cache="test_cache"} 0.9' in text
+
+
+def test_list_service_exposes_metrics(app_client):
+    app_client.get("/api/lists/public")
+
+    text = app_client.get("/metrics").text
+
+    assert 'http_requests_total{service="list-service",method="GET",route="/api/lists/public",status="200"}' in text
+    assert 'cache_hit_ratio{cache="lists_public_feed"}' in text
@@ -0,0 +1,79 @@
+# tests/test_migrations.py
+"""Tests for list-service data migrations."""
+from unittest.mock import MagicMock
+
+from list_service.migrations import backfill_item_count, migrate_items
+
+
+def _doc(list_id, **fields):
+    doc = MagicMock()
+    doc.id = list_id
+    doc.to_dict.return_value = fields
+    return doc
+
+
+def test_backfill_item_count_updates_only_stale_lists():
+    db = MagicMock()
+    query = db.collection.return_value.select.return_value.order_by.return_value.limit.return_value
+    legacy = _doc("a", items=[{}, {}])
+    current = _doc("b", items=[{}], item_count=1)
+    query.stream.return_value = [legacy, current]
+
+    stats = backfill_item_count(db, batch_size=10)
+
+    assert (stats.scanned, stats.updated) == (2, 1)
+    batch = db.batch.return_value
+    batch.update.assert_called_once_with(legacy.reference, {"item_count": 2})
+    batch.commit.assert_called_once()
+
+
+def test_backfill_dry_run_writes_nothing():
+    db = MagicMock()
+    query = db.collection.return_value.select.return_value.order_by.return_value.limit.return_value
+    query.stream.return_value = [_doc("a", items=[{}])]
+
+    stats = backfill_item_count(db, dry_run=True)
+
+    assert stats.updated == 1
+    db.batch.return_value.commit.assert_not_called()
+
+
+def test_migrate_items_includes_lists_without_item_count(monkeypatch):
+    db = MagicMock()
+    query = db.collection.return_value.select.return_value.order_by.return_value.limit.return_value
+    legacy = _doc("legacy")
+    legacy.reference.get.return_value.to_dict.return_value = {"items": [{}, {}, {}]}
+    query.stream.return_value = [
+        legacy,
+        _doc("small", item_count=1),
+        _doc("big", item_count=5),
+        _doc("moved", item_count=9, storage="subcollection"),
+    ]
+    migrated = []
+    monkeypatch.setattr(
+        "list_service.migrations.FirestoreListRepo.migrate_items_to_subcollection",
+        lambda self, list_id: migrated.append(list_id) or True,
+    )
+
+    stats = migrate_items(db, min_items=2, batch_size=10)
+
+    assert migrated == ["legacy", "big"]
+    assert (stats.scanned, stats.updated) == (4, 2)
+    db.collection.return_value.where.assert_not_called()
+
+
+def test_migrate_items_skips_lists_that_keep_conflicting(monkeypatch):
+    from google.api_core import exceptions as gexc
+    db = MagicMock()
+    query = db.collection.return_value.select.return_value.order_by.return_value.limit.return_value
+    query.stream.return_value = [_doc("busy", item_count=3), _doc("calm", item_count=3)]
+
+    def migrate(self, list_id):
+        if list_id == "busy":
+            raise gexc.Aborted("Too many concurrent updates on list busy")
+        return True
+    monkeypatch.setattr("list_service.migrations.FirestoreListRepo.migrate_items_to_subcollection", migrate)
+
+    stats = migrate_items(db, batch_size=10)
+
+    assert (stats.updated, stats.skipped) == (1, 1)
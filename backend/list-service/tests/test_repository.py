@@ -0,0 +1,454 @@
+# tests/test_repository.py
+"""Tests for FirestoreListRepo against a mocked Firestore client."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from list_service import repository
+from list_service.cache import TTLCache
+from list_service.repository import CachedCount, FirestoreListRepo
+
+
+@pytest.fixture
+def db():
+    return MagicMock()
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(repository, "_public_total", CachedCount(ttl=60))
+    monkeypatch.setattr(repository, "_owner_lists", TTLCache(max_size=100, ttl=60))
+    monkeypatch.setattr(repository, "_reaction_totals", TTLCache(max_size=100, ttl=60))
+
+
+def _count_result(value):
+    agg = MagicMock()
+    agg.value = value
+    return [[agg]]
+
+
+def test_public_total_uses_count_aggregation(db):
+    col = db.collection.return_value
+    col.count.return_value.get.return_value = _count_result(42)
+    repo = FirestoreListRepo(db)
+
+    _, total, _ = repo.get_public()
+    _, total_again, _ = repo.get_public()
+
+    assert total == total_again == 42
+    col.count.return_value.get.assert_called_once()
+    col.stream.assert_not_called()
+
+
+def test_public_total_tracks_local_writes(db):
+    col = db.collection.return_value
+    col.count.return_value.get.return_value = _count_result(10)
+    col.document.return_value.id = "new-id"
+    repo = FirestoreListRepo(db)
+    repo.get_public()
+
+    repo.create(name="Favs", owner_uid="u1")
+    repo.create(name="Later", owner_uid="u1")
+    repo.delete("some-id")
+
+    assert repo.get_public()[1] == 11
+
+
+def test_public_cursor_uses_start_after_not_offset(db):
+    from datetime import datetime, timezone
+    col = db.collection.return_value
+    col.count.return_value.get.return_value = _count_result(0)
+    query = col.order_by.return_value.order_by.return_value
+    cursor = repository.encode_cursor(datetime(2025, 5, 1, tzinfo=timezone.utc), "list-9")
+
+    FirestoreListRepo(db).get_public(page_size=10, cursor=cursor)
+
+    query.start_after.assert_called_once()
+    query.offset.assert_not_called()
+    assert repository.decode_cursor(cursor)[1] == "list-9"
+
+
+def _list_snapshot(items, owner="u1", list_id="list-1"):
+    snap = MagicMock()
+    snap.exists = True
+    snap.id = list_id
+    snap.update_time = "t0"
+    snap.to_dict.return_value = {
+        "name": "Favs",
+        "owner_uid": owner,
+        "items": items,
+    }
+    return snap
+
+
+def test_add_item_is_one_read_and_one_conditional_write(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}])
+    repo = FirestoreListRepo(db)
+
+    lst = repo.add_item("list-1", "m2", owner_uid="u1")
+
+    assert [i.manga_id for i in lst.items] == ["m1", "m2"]
+    doc_ref.get.assert_called_once()
+    db.batch.return_value.update.assert_called_once()
+    db.batch.return_value.commit.assert_called_once()
+    db.write_option.assert_called_once_with(last_update_time="t0")
+
+
+def test_add_existing_item_does_not_write(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}])
+
+    lst = FirestoreListRepo(db).add_item("list-1", "m1", owner_uid="u1")
+
+    assert [i.manga_id for i in lst.items] == ["m1"]
+    db.batch.return_value.commit.assert_not_called()
+
+
+def test_item_update_rejects_other_owner(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([], owner="someone-else")
+
+    with pytest.raises(repository.ListPermissionError):
+        FirestoreListRepo(db).remove_item("list-1", "m1", owner_uid="u1")
+    db.batch.return_value.commit.assert_not_called()
+
+
+def test_item_update_retries_on_concurrent_write(db):
+    from google.api_core import exceptions as gexc
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.side_effect = [
+        _list_snapshot([{"manga_id": "m1"}]),
+        _list_snapshot([{"manga_id": "m1"}, {"manga_id": "m3"}]),
+    ]
+    db.batch.return_value.commit.side_effect = [gexc.FailedPrecondition("stale"), [MagicMock()]]
+
+    lst = FirestoreListRepo(db).remove_item("list-1", "m1", owner_uid="u1")
+
+    assert [i.manga_id for i in lst.items] == ["m3"]
+    assert db.batch.return_value.commit.call_count == 2
+
+
+def test_item_update_missing_list_returns_none(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value.exists = False
+
+    assert FirestoreListRepo(db).add_item("nope", "m1", owner_uid="u1") is None
+
+
+def test_unit_of_work_reads_each_list_once(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}])
+    repo = FirestoreListRepo(db)
+
+    assert repo.get_by_id("list-1").owner_uid == "u1"  # verify_owner
+    renamed = repo.update_name("list-1", "Renamed")
+    lst = repo.add_item("list-1", "m2", owner_uid="u1")
+
+    assert renamed.name == "Renamed"
+    assert lst.name == "Renamed"
+    assert [i.manga_id for i in lst.items] == ["m1", "m2"]
+    doc_ref.get.assert_called_once()
+    assert repo.reads == 1
+
+
+def _summary_snapshot(list_id, **fields):
+    snap = MagicMock()
+    snap.exists = True
+    snap.id = list_id
+    snap.to_dict.return_value = {"name": list_id, "owner_uid": "u1", **fields}
+    return snap
+
+
+def test_summaries_are_projected_and_use_item_count(db):
+    col = db.collection.return_value
+    col.document.return_value.get.return_value.exists = False
+    query = col.where.return_value.select.return_value
+    query.stream.return_value = [_summary_snapshot("a", item_count=3)]
+
+    [summary] = FirestoreListRepo(db).get_by_owner("u1")
+
+    col.where.return_value.select.assert_called_once_with(repository.SUMMARY_FIELDS)
+    assert summary.item_count == 3
+    db.get_all.assert_not_called()
+
+
+def test_summaries_count_items_of_legacy_lists(db):
+    col = db.collection.return_value
+    col.document.return_value.get.return_value.exists = False
+    col.where.return_value.select.return_value.stream.return_value = [
+        _summary_snapshot("new", item_count=1),
+        _summary_snapshot("old"),
+    ]
+    db.get_all.return_value = [_summary_snapshot("old", items=[{}, {}])]
+
+    counts = {s.id: s.item_count for s in FirestoreListRepo(db).get_by_owner("u1")}
+
+    assert counts == {"new": 1, "old": 2}
+    assert db.get_all.call_args.kwargs["field_paths"] == ["items"]
+
+
+def test_item_mutations_keep_item_count(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}])
+
+    FirestoreListRepo(db).add_item("list-1", "m2", owner_uid="u1")
+
+    assert db.batch.return_value.update.call_args.args[1]["item_count"] == 2
+
+
+def test_subcollection_add_is_one_batch_independent_of_size(db):
+    doc_ref = db.collection.return_value.document.return_value
+    snap = _list_snapshot([])
+    snap.to_dict.return_value.update(storage="subcollection", item_count=5000)
+    doc_ref.get.return_value = snap
+
+    lst = FirestoreListRepo(db).add_item("list-1", "m2", owner_uid="u1")
+
+    batch = db.batch.return_value
+    batch.create.assert_called_once()
+    assert batch.create.call_args.args[1]["manga_id"] == "m2"
+    batch.commit.assert_called_once()
+    doc_ref.update.assert_not_called()
+    assert lst.item_count == 5001
+
+
+def test_subcollection_duplicate_add_changes_nothing(db):
+    from google.api_core import exceptions as gexc
+    doc_ref = db.collection.return_value.document.return_value
+    snap = _list_snapshot([])
+    snap.to_dict.return_value.update(storage="subcollection", item_count=3)
+    doc_ref.get.return_value = snap
+    db.batch.return_value.commit.side_effect = gexc.AlreadyExists("dup")
+
+    lst = FirestoreListRepo(db).add_item("list-1", "m1", owner_uid="u1")
+
+    assert lst.item_count == 3
+
+
+def test_embedded_items_are_paginated_with_cursor(db):
+    from datetime import datetime, timedelta
+    base = datetime(2025, 1, 1)
+    items = [{"manga_id": f"m{i}", "added_at": base + timedelta(minutes=i)} for i in range(5)]
+    db.collection.return_value.document.return_value.get.return_value = _list_snapshot(items)
+    repo = FirestoreListRepo(db)
+
+    first, cursor = repo.get_items("list-1", limit=2)
+    second, cursor = repo.get_items("list-1", limit=2, cursor=cursor)
+    last, end = repo.get_items("list-1", limit=2, cursor=cursor)
+
+    assert [i.manga_id for i in first + second + last] == ["m0", "m1", "m2", "m3", "m4"]
+    assert end is None
+
+
+def test_migrate_items_moves_array_and_switches_storage(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}, {"manga_id": "m2"}])
+    repo = FirestoreListRepo(db)
+
+    assert repo.migrate_items_to_subcollection("list-1") is True
+
+    assert db.batch.return_value.set.call_count == 2
+    changes = doc_ref.update.call_args.args[0]
+    assert changes["storage"] == "subcollection"
+    assert changes["item_count"] == 2
+    assert repo.get_by_id("list-1").storage == "subcollection"
+
+
+def test_migrate_retry_deletes_items_removed_meanwhile(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}])
+    items_ref = doc_ref.collection.return_value
+    leftover = MagicMock(id="m2")  # escrito por un intento anterior, ya quitado de la lista
+    kept = MagicMock(id="m1")
+    items_ref.select.return_value.stream.return_value = [kept, leftover]
+
+    assert FirestoreListRepo(db).migrate_items_to_subcollection("list-1") is True
+
+    batch = db.batch.return_value
+    batch.delete.assert_called_once_with(leftover.reference)
+    assert batch.set.call_count == 1
+
+
+def test_expand_mangas_batches_misses_and_caches(db, monkeypatch):
+    from list_service.cache import TTLCache
+    from list_service.models import ListItem
+    monkeypatch.setattr(repository, "_manga_cache", TTLCache(max_size=100, ttl=60))
+    db.get_all.return_value = [
+        _summary_snapshot("m1", title="One Piece", cover_path="https://cdn/op.jpg"),
+    ]
+    repo = FirestoreListRepo(db)
+    items = [ListItem(manga_id="m1"), ListItem(manga_id="gone"), ListItem(manga_id="m1")]
+
+    repo.expand_mangas(items)
+    repo.expand_mangas([ListItem(manga_id="m1"), ListItem(manga_id="gone")])
+
+    db.get_all.assert_called_once()
+    refs = db.get_all.call_args.args[0]
+    assert len(refs) == 2
+    assert items[0].manga.title == "One Piece"
+    assert items[0].manga.cover_url == "https://cdn/op.jpg"
+    assert items[1].manga is None
+
+
+def test_expand_mangas_skips_invalid_ids_and_builds_cover_urls(db, monkeypatch):
+    from list_service.models import ListItem
+    monkeypatch.setattr(repository, "_manga_cache", TTLCache(max_size=100, ttl=60))
+    monkeypatch.setattr(repository, "COVER_BASE_URL", "https://cdn.example.com")
+    db.get_all.return_value = [_summary_snapshot("m1", cover_path="covers/m1.jpg")]
+    items = [ListItem(manga_id="m1"), ListItem(manga_id="a/b")]
+
+    FirestoreListRepo(db).expand_mangas(items)
+
+    db.collection.return_value.document.assert_called_once_with("m1")
+    assert items[0].manga.cover_url == "https://cdn.example.com/covers/m1.jpg"
+    assert items[1].manga is None
+
+
+def test_my_lists_is_one_index_read_then_cached(db):
+    from datetime import datetime
+    index = db.collection.return_value.document.return_value.get.return_value
+    index.exists = True
+    index.to_dict.return_value = {
+        "complete": True,
+        "lists": {
+            "old": {"name": "Old", "item_count": 1, "created_at": datetime(2024, 1, 1),
+                    "updated_at": datetime(2024, 1, 1)},
+            "new": {"name": "New", "item_count": 4, "created_at": datetime(2025, 1, 1),
+                    "updated_at": datetime(2025, 1, 1)},
+        },
+    }
+    repo = FirestoreListRepo(db)
+
+    lists = repo.get_by_owner("u1")
+    FirestoreListRepo(db).get_by_owner("u1")
+
+    assert [(l.id, l.item_count, l.owner_uid) for l in lists] == [("new", 4, "u1"), ("old", 1, "u1")]
+    assert repo.reads == 1
+    db.collection.return_value.document.return_value.get.assert_called_once()
+    db.collection.return_value.where.assert_not_called()
+
+
+def test_missing_index_is_backfilled_from_owner_query(db):
+    col = db.collection.return_value
+    col.document.return_value.get.return_value.exists = False
+    col.where.return_value.select.return_value.stream.return_value = [
+        _summary_snapshot("a", item_count=2),
+    ]
+
+    [summary] = FirestoreListRepo(db).get_by_owner("u1")
+
+    index = col.document.return_value.create.call_args.args[0]
+    assert index["complete"] is True
+    assert index["lists"]["a"]["item_count"] == 2
+    assert summary.id == "a"
+
+
+def test_list_writes_update_owner_index_in_same_batch(db):
+    col = db.collection.return_value
+    col.document.return_value.id = "new-id"
+    repo = FirestoreListRepo(db)
+    repository._owner_lists.set("u1", [])
+
+    repo.create(name="Favs", owner_uid="u1")
+
+    batch = db.batch.return_value
+    merged = batch.set.call_args_list[-1]
+    assert merged.args[1]["lists"]["new-id"]["name"] == "Favs"
+    assert merged.kwargs == {"merge": True}
+    batch.commit.assert_called_once()
+    assert repository._owner_lists.get("u1") is repository.MISSING
+
+
+def test_manga_exists_skips_firestore_on_filter_hit(db, monkeypatch):
+    from list_service.catalog import MangaIdFilter
+    from shared.bloom import BloomFilter
+    id_filter = MangaIdFilter(fetcher=lambda etag: (BloomFilter.from_keys(["m1"]).to_bytes(), None))
+    id_filter.refresh()
+    monkeypatch.setattr(repository, "manga_ids", id_filter)
+    monkeypatch.setattr(repository, "_manga_cache", TTLCache(max_size=100, ttl=60))
+    missing = MagicMock()
+    missing.exists = False
+    missing.id = "nope"
+    db.get_all.return_value = [missing]
+    repo = FirestoreListRepo(db)
+
+    assert repo.manga_exists("m1") is True
+    assert repo.reads == 0
+    assert repo.manga_exists("nope") is False
+    assert repo.manga_exists("nope") is False  # negativo cacheado
+    assert repo.reads == 1
+
+
+def test_apply_items_is_one_write_with_dedup(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([{"manga_id": "m1"}, {"manga_id": "m2"}])
+
+    lst = FirestoreListRepo(db).apply_items(
+        "list-1", add=["m3", "m3", "m1", "m4"], remove=["m2", "m4"], owner_uid="u1"
+    )
+
+    assert [i.manga_id for i in lst.items] == ["m1", "m3", "m4"]
+    assert lst.item_count == 3
+    db.batch.return_value.commit.assert_called_once()
+    doc_ref.get.assert_called_once()
+
+
+def test_apply_items_subcollection_creates_and_deletes_only_changes(db):
+    doc_ref = db.collection.return_value.document.return_value
+    snap = _list_snapshot([])
+    snap.to_dict.return_value.update(storage="subcollection", item_count=2)
+    doc_ref.get.return_value = snap
+    existing = [MagicMock(exists=True, id="m1"), MagicMock(exists=True, id="m2"),
+                MagicMock(exists=False, id="m3")]
+    db.get_all.return_value = existing
+
+    lst = FirestoreListRepo(db).apply_items("list-1", add=["m1", "m3"], remove=["m2"], owner_uid="u1")
+
+    batch = db.batch.return_value
+    assert batch.create.call_count == 1  # m3 (m1 ya existe)
+    assert batch.delete.call_count == 1  # m2
+    batch.commit.assert_called_once()
+    assert lst.item_count == 2
+
+
+def test_apply_items_rejects_oversized_batch(db):
+    with pytest.raises(ValueError):
+        FirestoreListRepo(db).apply_items("list-1", add=[f"m{i}" for i in range(repository.MAX_BATCH_ITEMS + 1)], remove=[])
+
+
+def test_like_is_one_batch_on_a_random_shard(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([])
+    repo = FirestoreListRepo(db)
+
+    assert repo.set_reaction("list-1", "like", "u2", active=True) is True
+
+    batch = db.batch.return_value
+    batch.create.assert_called_once()
+    assert batch.set.call_args.args[1]["count"].value == 1
+    assert batch.set.call_args.kwargs == {"merge": True}
+    batch.commit.assert_called_once()
+    doc_ref.update.assert_not_called()  # el documento de la lista no se toca
+
+
+def test_repeated_like_counts_nothing(db):
+    from google.api_core import exceptions as gexc
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([])
+    db.batch.return_value.commit.side_effect = gexc.AlreadyExists("liked")
+
+    assert FirestoreListRepo(db).set_reaction("list-1", "like", "u2", active=True) is False
+
+
+def test_reaction_totals_are_summed_once_then_cached(db):
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value = _list_snapshot([])
+    shards = doc_ref.collection.return_value
+    shards.sum.return_value.get.return_value = _count_result(7)
+    repo = FirestoreListRepo(db)
+
+    assert repo.reaction_totals("list-1") == {"like": 7, "follow": 7}
+    repo.set_reaction("list-1", "like", "u2", active=True)
+    assert repo.reaction_totals("list-1") == {"like": 8, "follow": 7}
+    assert shards.sum.call_count == 2  # una agregación por tipo, no una lectura por shard
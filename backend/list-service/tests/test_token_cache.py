@@ -0,0 +1,65 @@
+# tests/test_token_cache.py
+"""Tests for the verified token cache in backend/shared."""
+import time
+
+from shared.token_cache import TokenCache, token_key
+
+
+def _claims(ttl=3600, **extra):
+    return {"uid": "u1", "exp": time.time() + ttl, **extra}
+
+
+def test_hit_returns_a_copy_of_the_claims():
+    cache = TokenCache(max_size=10)
+    stored = _claims()
+    cache.put("tok", stored)
+
+    claims, stale = cache.get("tok")
+    claims["uid"] = "changed"
+
+    assert cache.get("tok") == (stored, False)
+    assert cache.get("other") == (None, False)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert token_key("tok") in cache._entries  # clave = hash, nunca el token
+
+
+def test_entry_expires_at_token_exp():
+    cache = TokenCache(max_size=10)
+    cache.put("tok", _claims(ttl=-1))
+
+    assert cache.get("tok") == (None, False)
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(max_size=2)
+    cache.put("a", _claims())
+    cache.put("b", _claims())
+    cache.get("a")
+    cache.put("c", _claims())
+
+    assert cache.get("b") == (None, False)
+    assert cache.get("a")[0] is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_old_entries_are_reported_stale_until_reverified():
+    cache = TokenCache(max_size=10, revocation_interval=0.01)
+    cache.put("tok", _claims())
+    time.sleep(0.02)
+
+    assert cache.get("tok")[1] is True
+    cache.put("tok", _claims())  # re-verificado
+    assert cache.get("tok")[1] is False
+
+
+def test_claims_without_exp_and_disabled_cache_are_not_stored():
+    cache = TokenCache(max_size=10)
+    cache.put("tok", {"uid": "u1"})
+    assert cache.stats()["size"] == 0
+
+    disabled = TokenCache(max_size=0)
+    disabled.put("tok", _claims())
+    assert disabled.get("tok") == (None, False)
@@ -0,0 +1,116 @@
+# tests/test_tracing.py
+"""Tests for the shared tracing helpers."""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared import tracing
+from shared.tracing import inject_headers, install_tracing, parse_traceparent, span, trace_repo
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def spans(tmp_path, monkeypatch):
+    """Record every trace to a file; returns a reader for the exported spans."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.tracer, "exporter", "file")
+    monkeypatch.setattr(tracing.tracer, "path", str(path))
+    monkeypatch.setattr(tracing.tracer, "ratio", 1.0)
+
+    def read():
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text().splitlines()]
+    return read
+
+
+def test_traceparent_parsing():
+    ctx = parse_traceparent(PARENT)
+    assert (ctx.trace_id, ctx.span_id, ctx.sampled) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    assert ctx.traceparent() == PARENT
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_sampling_depends_only_on_trace_id(monkeypatch):
+    monkeypatch.setattr(tracing.tracer, "ratio", 0.5)
+    low, high = "0" * 16 + "1" * 16, "0" * 16 + "f" * 16
+
+    assert tracing.tracer.should_sample(low)
+    assert not tracing.tracer.should_sample(high)
+    assert tracing.tracer.should_sample(high, parent_sampled=True)
+
+
+def test_nested_spans_share_the_trace(spans):
+    with span("outer") as outer:
+        with pytest.raises(ValueError):
+            with span("inner", key="a"):
+                raise ValueError("boom")
+        headers = inject_headers({})
+
+    inner, outer_json = spans()
+    assert inner["name"] == "inner"
+    assert inner["parent_id"] == outer_json["context"]["span_id"]
+    assert inner["context"]["trace_id"] == outer_json["context"]["trace_id"]
+    assert inner["status"]["status_code"] == "ERROR"
+    assert inner["attributes"]["key"] == "a"
+    assert outer_json["status"]["status_code"] == "OK"
+    assert headers["traceparent"] == outer.context.traceparent()
+
+
+def test_unsampled_traces_propagate_without_export(spans, monkeypatch):
+    monkeypatch.setattr(tracing.tracer, "ratio", 0.0)
+    parent = parse_traceparent(PARENT.replace("-01", "-00"))
+
+    with span("skipped", parent=parent) as recorded:
+        headers = inject_headers({})
+
+    assert recorded is None
+    assert headers["traceparent"] == PARENT.replace("-01", "-00")
+    assert spans() == []
+
+
+def test_disabled_tracer_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(tracing.tracer, "exporter", "none")
+
+    with span("anything") as recorded:
+        assert inject_headers({}) == {}
+    assert recorded is None
+
+
+def test_trace_repo_wraps_public_methods(spans):
+    @trace_repo("FakeRepo")
+    class FakeRepo:
+        def get(self, x):
+            return self._helper(x)
+
+        def _helper(self, x):
+            return x * 2
+
+    assert FakeRepo().get(2) == 4
+    assert [s["name"] for s in spans()] == ["FakeRepo.get"]
+
+
+def test_middleware_continues_incoming_trace(spans):
+    app = FastAPI()
+    install_tracing(app, "test-service")
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        with span("lookup"):
+            return {"id": item_id}
+
+    response = TestClient(app).get("/items/42", headers={"traceparent": PARENT})
+
+    lookup, server = spans()
+    assert server["name"] == "GET /items/{item_id}"
+    assert server["parent_id"] == "0x00f067aa0ba902b7"
+    assert server["context"]["trace_id"] == "0x4bf92f3577b34da6a3ce929d0e0e4736"
+    assert server["attributes"]["http.status_code"] == 200
+    assert server["resource"]["attributes"]["service.name"] == "test-service"
+    assert lookup["parent_id"] == server["context"]["span_id"]
+    assert response.headers["traceparent"].startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
@@ -0,0 +1,125 @@
+# tests/test_trending.py
+"""Tests for the trending counters and the in-memory ranking."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from list_service import trending
+from list_service.repository import FirestoreListRepo
+from list_service.trending import TrendingBoard, decayed, queue_item_events, weight
+
+
+def _shard(manga_id, shard, score, updated_at):
+    doc = MagicMock()
+    doc.reference.path = f"manga_trending/{manga_id}/trending_shards/{shard}"
+    doc.to_dict.return_value = {"manga_id": manga_id, "score": score, "updated_at": updated_at}
+    return doc
+
+
+def test_scores_decay_by_half_life():
+    now = datetime.now(timezone.utc)
+    half_life = timedelta(days=trending.HALF_LIFE_DAYS)
+
+    assert decayed(weight(now), now) == pytest.approx(1.0)
+    assert decayed(weight(now - half_life), now) == pytest.approx(0.5)
+
+
+def test_events_increment_one_shard_in_the_batch():
+    db, batch = MagicMock(), MagicMock()
+    added_at = datetime(2025, 6, 1)
+
+    queue_item_events(batch, db, [("m1", added_at, 1), ("m2", added_at, -1)])
+
+    assert batch.set.call_count == 2
+    data = batch.set.call_args_list[1].args[1]
+    assert data["manga_id"] == "m2"
+    assert data["score"].value == pytest.approx(-weight(added_at))
+    assert batch.set.call_args_list[1].kwargs == {"merge": True}
+
+
+def test_refresh_reads_only_changed_shards():
+    db = MagicMock()
+    query = db.collection_group.return_value.order_by.return_value.order_by.return_value
+    t1 = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    # Tres shards del mismo commit: mismo updated_at
+    first_page = [_shard("m1", 0, 3.0, t1), _shard("m1", 1, 1.0, t1), _shard("m2", 0, 2.0, t1)]
+    query.limit.return_value.stream.return_value = first_page
+    board = TrendingBoard(k=10)
+
+    assert board.refresh(db) == 3
+    assert [m for m, _ in board._top] == ["m1", "m2"]
+    db.collection_group.return_value.order_by.assert_called_with("updated_at")
+    db.collection_group.return_value.order_by.return_value.order_by.assert_called_with("__name__")
+
+    # Segunda pasada: continúa tras el último shard leído, no por updated_at > t1
+    changed = query.start_after.return_value.limit.return_value.stream
+    changed.return_value = [_shard("m2", 0, 6.0, t1 + timedelta(seconds=5))]
+    assert board.refresh(db) == 1
+    query.start_after.assert_called_with(first_page[-1])
+    assert board._top == [("m2", 6.0), ("m1", 4.0)]
+
+
+def test_embedded_item_changes_emit_trending_events():
+    db = MagicMock()
+    added_at = datetime(2025, 6, 1)
+    snap = MagicMock(exists=True, id="list-1")
+    snap.to_dict.return_value = {
+        "name": "L", "owner_uid": "u1", "created_at": added_at, "updated_at": added_at,
+        "items": [{"manga_id": "m1", "added_at": added_at}],
+    }
+    db.collection.return_value.document.return_value.get.return_value = snap
+
+    FirestoreListRepo(db).apply_items("list-1", add=["m2"], remove=["m1"], owner_uid="u1")
+
+    events = {
+        call.args[1]["manga_id"]: call.args[1]["score"].value
+        for call in db.batch.return_value.set.call_args_list
+        if "score" in call.args[1]
+    }
+    assert events["m1"] == pytest.approx(-weight(added_at))
+    assert events["m2"] > 0
+
+
+def _deleted_scores(db):
+    return {
+        call.args[1]["manga_id"]: call.args[1]["score"].value
+        for call in db.batch.return_value.set.call_args_list
+        if "score" in call.args[1]
+    }
+
+
+def test_deleting_a_list_takes_its_items_off_trending():
+    db = MagicMock()
+    added_at = datetime(2025, 6, 1)
+    snap = MagicMock(exists=True, id="list-1")
+    snap.to_dict.return_value = {
+        "name": "L", "owner_uid": "u1",
+        "items": [{"manga_id": "m1", "added_at": added_at}, {"manga_id": "m2", "added_at": added_at}],
+    }
+    db.collection.return_value.document.return_value.get.return_value = snap
+
+    FirestoreListRepo(db).delete("list-1")
+
+    assert _deleted_scores(db) == pytest.approx({"m1": -weight(added_at), "m2": -weight(added_at)})
+    # Los decrementos se escriben antes de borrar la lista
+    calls = [c[0] for c in db.mock_calls if c[0] in ("batch().commit", "recursive_delete")]
+    assert calls[0] == "batch().commit"
+    assert "recursive_delete" in calls
+
+
+def test_deleting_a_subcollection_list_reads_item_dates():
+    db = MagicMock()
+    added_at = datetime(2025, 6, 1)
+    snap = MagicMock(exists=True, id="list-1")
+    snap.to_dict.return_value = {"name": "L", "owner_uid": "u1", "storage": "subcollection"}
+    lists = db.collection.return_value.document.return_value
+    lists.get.return_value = snap
+    item = MagicMock(id="m3")
+    item.to_dict.return_value = {"added_at": added_at}
+    lists.collection.return_value.select.return_value.stream.return_value = [item]
+
+    FirestoreListRepo(db).delete("list-1")
+
+    lists.collection.return_value.select.assert_called_once_with(["added_at"])
+    assert _deleted_scores(db) == pytest.approx({"m3": -weight(added_at)})
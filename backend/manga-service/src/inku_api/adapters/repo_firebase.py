@@ -1,14 +1,66 @@
 from __future__ import annotations
+import base64
+import json
 import logging
-from typing import Iterable, Optional
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from firebase_admin import firestore as admin_firestore
+from google.api_core import exceptions as gexc
 
-from ..domain import Chapter, Manga
+from shared.metrics import instrument_repo
+from shared.tracing import trace_repo
+
+from ..domain import Chapter, ChapterWriteResult, Manga, ReadingProgress
 from ..ports import MangaRepository
 
 logger = logging.getLogger(__name__)
 
+# Firestore admite como máximo 500 escrituras por WriteBatch
+BATCH_LIMIT = 500
+BATCH_RETRIES = 3
+HASH_COLLECTION = "file_hashes"
+# reading_progress/{uid}/mangas/{manga_id}
+PROGRESS_COLLECTION = "reading_progress"
+# mangas/{manga_id}/chapter_stats/{chapter_id}: views, pages, completions
+CHAPTER_STATS_SUBCOLLECTION = "chapter_stats"
+PUBLIC_CHAPTER_STATUS = "approved"
+TRANSIENT_ERRORS = (
+    gexc.Aborted,
+    gexc.DeadlineExceeded,
+    gexc.InternalServerError,
+    gexc.ServiceUnavailable,
+)
+
+
+def _encode_cursor(created_at: datetime, path: str) -> str:
+    raw = json.dumps([created_at.isoformat(), path]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, path = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), path
+    except Exception:
+        raise ValueError("INVALID_CURSOR")
+
+
+def _commit_with_retry(batch, attempts: int = BATCH_RETRIES, backoff: float = 0.2) -> None:
+    """Commit a WriteBatch, retrying transient errors with exponential backoff."""
+    for attempt in range(1, attempts + 1):
+        try:
+            batch.commit()
+            return
+        except TRANSIENT_ERRORS as e:
+            if attempt == attempts:
+                raise
+            logger.warning("Batch commit falló (intento %d/%d): %s", attempt, attempts, e)
+            time.sleep(backoff * (2 ** (attempt - 1)))
+
+@trace_repo("FirestoreMangaRepo")
+@instrument_repo("FirestoreMangaRepo")
 class FirestoreMangaRepo(MangaRepository):
     def __init__(self, db: admin_firestore.Client):
         self._db = db
@@ -24,11 +76,17 @@ class FirestoreMangaRepo(MangaRepository):
                 cover_path=data.get("cover_path", "") or "",
                 recommended=data.get("recommended"),
                 tags=data.get("tags"),
+                latest_chapter=data.get("latest_chapter"),
             )
 
     def manga_exists(self, manga_id: str) -> bool:
         return self._db.collection("mangas").document(manga_id).get().exists
 
+    def list_manga_ids(self) -> Iterable[str]:
+        """IDs only: projection on __name__, no manga fields are transferred."""
+        for doc in self._db.collection("mangas").select(["__name__"]).stream():
+            yield doc.id
+
     def get_manga(self, manga_id: str) -> Optional[Manga]:
         """Get a single manga by ID."""
         doc = self._db.collection("mangas").document(manga_id).get()
@@ -42,32 +100,40 @@ class FirestoreMangaRepo(MangaRepository):
             cover_path=data.get("cover_path", "") or "",
             recommended=data.get("recommended"),
             tags=data.get("tags"),
+            latest_chapter=data.get("latest_chapter"),
         )
 
+    @staticmethod
+    def _manga_data(manga: Manga) -> dict:
+        return {
+            "title": manga.title,
+            "description": manga.description,
+            "cover_path": manga.cover_path,
+            "recommended": manga.recommended,
+            "tags": manga.tags,
+        }
+
     def create_manga(self, manga: Manga) -> Manga:
         """Create a new manga in Firestore."""
         doc_ref = self._db.collection("mangas").document(manga.id)
         if doc_ref.get().exists:
             raise ValueError(f"Manga with id '{manga.id}' already exists")
         
-        doc_ref.set({
-            "title": manga.title,
-            "description": manga.description,
-            "cover_path": manga.cover_path,
-            "recommended": manga.recommended,
-            "tags": manga.tags,
-        })
+        doc_ref.set(self._manga_data(manga))
         logger.info(f"Created manga {manga.id}")
         return manga
 
     def list_chapters(self, manga_id: str) -> Iterable[Chapter]:
+        """Public chapters only (status == approved, filtered in the query)."""
         col = self._db.collection("mangas").document(manga_id).collection("chapters")
+        query = col.where("status", "==", PUBLIC_CHAPTER_STATUS)
 
         try:
-            snaps = list(col.order_by("number").stream())
+            snaps = list(query.order_by("number").stream())
         except Exception as e:
+            # requiere el índice compuesto (status, number)
             logger.warning("No se pudo order_by(number): %s", e)
-            snaps = list(col.stream())
+            snaps = list(query.stream())
 
         for doc in snaps:
             data = doc.to_dict() or {}
@@ -133,22 +199,305 @@ class FirestoreMangaRepo(MangaRepository):
     def get_episode_by_number(self, manga_id: str, number: int) -> Optional[Chapter]:
         return self.get_chapter_by_number(manga_id, number)
 
-    def create_chapter(self, chapter: Chapter) -> Chapter:
-        """Create a new chapter in Firestore."""
-        doc_ref = (
-            self._db.collection("mangas")
-            .document(chapter.manga_id)
-            .collection("chapters")
-            .document(chapter.id)
-        )
-        doc_ref.set({
+    @staticmethod
+    def _chapter_data(chapter: Chapter) -> dict:
+        return {
             "manga_id": chapter.manga_id,
             "number": chapter.number,
             "title": chapter.title,
             "pdf_path": chapter.pdf_path,
             "thumb_path": chapter.thumb_path,
             "status": "pending_review",  # User uploads need review
-        })
+            "created_at": admin_firestore.SERVER_TIMESTAMP,
+        }
+
+    def create_chapter(self, chapter: Chapter) -> Chapter:
+        """Create a new chapter in Firestore and raise the manga's latest_chapter."""
+        manga_ref = self._db.collection("mangas").document(chapter.manga_id)
+        manga_ref.collection("chapters").document(chapter.id).set(self._chapter_data(chapter))
+        self._raise_latest_chapter(manga_ref, chapter.number)
         logger.info(f"Created chapter {chapter.id} for manga {chapter.manga_id}")
         return chapter
 
+    def _raise_latest_chapter(self, manga_ref, number: int) -> None:
+        """
+        Set the manga's denormalized latest_chapter to `number` if that is
+        higher than the stored value. The write carries a precondition on the
+        read, so a concurrent registration can never lower it; a lost race is
+        re-read and retried.
+        """
+        for attempt in range(1, BATCH_RETRIES + 1):
+            snap = manga_ref.get(["latest_chapter"])
+            if not snap.exists or ((snap.to_dict() or {}).get("latest_chapter") or 0) >= number:
+                return
+            try:
+                manga_ref.update(
+                    {"latest_chapter": number, "updated_at": admin_firestore.SERVER_TIMESTAMP},
+                    option=self._db.write_option(last_update_time=snap.update_time),
+                )
+                return
+            except (gexc.FailedPrecondition, gexc.Conflict):
+                if attempt == BATCH_RETRIES:
+                    raise
+                logger.info("latest_chapter modificado a la vez, reintentando (%d/%d)", attempt, BATCH_RETRIES)
+
+    def create_chapters(self, manga_id: str, chapters: List[Chapter]) -> List[ChapterWriteResult]:
+        """Create many chapters with chunked WriteBatch commits.
+
+        A chunk that still fails after retries marks all of its chapters as
+        failed. The manga's denormalized ``latest_chapter`` is then raised to
+        the highest chapter that was written, never lowered.
+        """
+        col = self._db.collection("mangas").document(manga_id).collection("chapters")
+        chunks = [chapters[i:i + BATCH_LIMIT] for i in range(0, len(chapters), BATCH_LIMIT)]
+
+        results: List[ChapterWriteResult] = []
+        for chunk in chunks:
+            batch = self._db.batch()
+            for chapter in chunk:
+                batch.set(col.document(chapter.id), self._chapter_data(chapter))
+
+            error = None
+            try:
+                _commit_with_retry(batch)
+            except Exception as e:
+                logger.error("Batch de capítulos falló para manga %s: %s", manga_id, e)
+                error = "WRITE_FAILED"
+
+            results.extend(
+                ChapterWriteResult(
+                    chapter_id=c.id, number=c.number, ok=error is None, error=error
+                )
+                for c in chunk
+            )
+
+        written = [r.number for r in results if r.ok]
+        if written:
+            try:
+                self._raise_latest_chapter(self._db.collection("mangas").document(manga_id), max(written))
+            except Exception as e:
+                # Los capítulos ya están escritos; el siguiente registro lo corrige
+                logger.error("No se pudo actualizar latest_chapter de %s: %s", manga_id, e)
+
+        logger.info(
+            f"Created {sum(r.ok for r in results)}/{len(chapters)} chapters for manga {manga_id}"
+        )
+        return results
+
+    # ---- Moderation ----
+
+    def list_chapters_by_status(
+        self,
+        status: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Chapter], Optional[str]]:
+        """
+        Chapters of every manga with the given status, oldest first.
+        Collection-group query backed by the (status, created_at) index.
+        Returns the page and an opaque cursor for the next one.
+        """
+        query = (
+            self._db.collection_group("chapters")
+            .where("status", "==", status)
+            .order_by("created_at")
+            .order_by("__name__")
+            .limit(limit)
+        )
+        if cursor:
+            created_at, path = _decode_cursor(cursor)
+            query = query.start_after({"created_at": created_at, "__name__": self._db.document(path)})
+
+        snaps = list(query.stream())
+        chapters = []
+        for doc in snaps:
+            data = doc.to_dict() or {}
+            if data.get("number") is None:
+                continue
+            chapters.append(Chapter(
+                id=doc.id,
+                manga_id=(data.get("manga_id") or doc.reference.parent.parent.id),
+                number=int(data["number"]),
+                pdf_path=data.get("pdf_path", "") or "",
+                thumb_path=data.get("thumb_path", "") or "",
+                title=data.get("title", "") or "",
+            ))
+
+        next_cursor = None
+        if len(snaps) == limit:
+            last = snaps[-1]
+            next_cursor = _encode_cursor(last.get("created_at"), last.reference.path)
+        return chapters, next_cursor
+
+    def set_chapters_status(
+        self, decisions: List[Tuple[str, str, str]]
+    ) -> List[ChapterWriteResult]:
+        """
+        Apply (manga_id, chapter_id, status) decisions in chunked batches.
+        Each chunk is checked with one get_all so missing chapters are reported
+        per item instead of failing the whole batch.
+        """
+        results: List[ChapterWriteResult] = []
+        for start in range(0, len(decisions), BATCH_LIMIT):
+            chunk = decisions[start:start + BATCH_LIMIT]
+            refs = [
+                self._db.collection("mangas").document(m).collection("chapters").document(c)
+                for m, c, _ in chunk
+            ]
+            snaps = {snap.reference.path: snap for snap in self._db.get_all(refs)}
+
+            batch = self._db.batch()
+            pending: List[ChapterWriteResult] = []
+            for ref, (_, chapter_id, status) in zip(refs, chunk):
+                snap = snaps.get(ref.path)
+                if snap is None or not snap.exists:
+                    results.append(ChapterWriteResult(
+                        chapter_id=chapter_id, number=0, ok=False, error="CHAPTER_NOT_FOUND"
+                    ))
+                    continue
+                batch.update(ref, {
+                    "status": status,
+                    "reviewed_at": admin_firestore.SERVER_TIMESTAMP,
+                })
+                number = int((snap.to_dict() or {}).get("number") or 0)
+                pending.append(ChapterWriteResult(chapter_id=chapter_id, number=number))
+                results.append(pending[-1])
+
+            if pending:
+                try:
+                    _commit_with_retry(batch)
+                except Exception as e:
+                    logger.error("Batch de moderación falló: %s", e)
+                    for r in pending:
+                        r.ok, r.error = False, "WRITE_FAILED"
+
+        logger.info(f"Moderated {sum(r.ok for r in results)}/{len(decisions)} chapters")
+        return results
+
+    def backfill_chapter_status(self, status: str = PUBLIC_CHAPTER_STATUS) -> int:
+        """
+        One-off: give chapters created before moderation an explicit status,
+        and a created_at (the document's create time) where it is missing,
+        since the moderation queue orders by it and skips documents without it.
+        """
+        batch, pending, updated = self._db.batch(), 0, 0
+        for doc in self._db.collection_group("chapters").stream():
+            data = doc.to_dict() or {}
+            changes = {}
+            if not data.get("status"):
+                changes["status"] = status
+            if data.get("created_at") is None:
+                changes["created_at"] = doc.create_time or doc.update_time
+            if not changes:
+                continue
+            batch.update(doc.reference, changes)
+            pending += 1
+            if pending == BATCH_LIMIT:
+                _commit_with_retry(batch)
+                updated += pending
+                batch, pending = self._db.batch(), 0
+        if pending:
+            _commit_with_retry(batch)
+            updated += pending
+        logger.info(f"Backfilled status on {updated} chapters")
+        return updated
+
+    # ---- Content-hash index ----
+
+    def find_object_by_hash(self, sha256: str) -> Optional[str]:
+        """Return the S3 key already stored for this SHA-256 (hex), if any."""
+        snap = self._db.collection(HASH_COLLECTION).document(sha256).get()
+        if not snap.exists:
+            return None
+        return (snap.to_dict() or {}).get("s3_key") or None
+
+    def save_object_hash(self, sha256: str, s3_key: str) -> str:
+        """Index an uploaded object by hash. The first key wins and is returned."""
+        doc_ref = self._db.collection(HASH_COLLECTION).document(sha256)
+        try:
+            doc_ref.create({
+                "s3_key": s3_key,
+                "created_at": admin_firestore.SERVER_TIMESTAMP,
+            })
+        except gexc.AlreadyExists:
+            return self.find_object_by_hash(sha256) or s3_key
+        return s3_key
+
+    # ---- Reading progress ----
+
+    def _progress_ref(self, uid: str):
+        return self._db.collection(PROGRESS_COLLECTION).document(uid).collection("mangas")
+
+    def get_progress(self, uid: str, manga_id: str) -> Optional[ReadingProgress]:
+        snap = self._progress_ref(uid).document(manga_id).get()
+        if not snap.exists:
+            return None
+        return ReadingProgress(**(snap.to_dict() or {}))
+
+    def list_progress(self, uid: str, limit: int = 50) -> List[ReadingProgress]:
+        """Most recently read mangas first."""
+        query = (
+            self._progress_ref(uid)
+            .order_by("updated_at", direction=admin_firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        return [ReadingProgress(**(s.to_dict() or {})) for s in query.stream()]
+
+    def save_progress(self, entries: List[Tuple[str, ReadingProgress]]) -> None:
+        """
+        Write (uid, progress) pairs, up to BATCH_LIMIT per batch.
+
+        Only entries newer than the stored `updated_at` are written, with a
+        precondition on the document read, so a replica flushing an older
+        report cannot move a reader back. A chunk that loses a race is
+        re-read and retried.
+        """
+        for start in range(0, len(entries), BATCH_LIMIT):
+            chunk = entries[start:start + BATCH_LIMIT]
+            for attempt in range(1, BATCH_RETRIES + 1):
+                try:
+                    self._save_progress_chunk(chunk)
+                    break
+                except (gexc.FailedPrecondition, gexc.Conflict):
+                    if attempt == BATCH_RETRIES:
+                        raise
+                    logger.info("Progreso modificado durante el flush, reintentando (%d/%d)", attempt, BATCH_RETRIES)
+
+    def _save_progress_chunk(self, chunk: List[Tuple[str, ReadingProgress]]) -> None:
+        refs = [self._progress_ref(uid).document(progress.manga_id) for uid, progress in chunk]
+        stored = {snap.reference.path: snap for snap in self._db.get_all(refs, field_paths=["updated_at"])}
+        batch = self._db.batch()
+        writes = 0
+        for ref, (_, progress) in zip(refs, chunk):
+            snap = stored.get(ref.path)
+            if snap is None or not snap.exists:
+                batch.create(ref, progress.model_dump())
+            else:
+                current = (snap.to_dict() or {}).get("updated_at")
+                if current is not None and current >= progress.updated_at:
+                    continue
+                batch.update(
+                    ref,
+                    progress.model_dump(),
+                    option=self._db.write_option(last_update_time=snap.update_time),
+                )
+            writes += 1
+        if writes:
+            _commit_with_retry(batch)
+
+    # ---- Reader analytics ----
+
+    def increment_chapter_stats(self, counts: Dict[Tuple[str, str], Dict[str, int]]) -> None:
+        """Add aggregated event counts to each chapter's stats document."""
+        items = list(counts.items())
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = self._db.batch()
+            for (manga_id, chapter_id), deltas in items[start:start + BATCH_LIMIT]:
+                ref = (
+                    self._db.collection("mangas").document(manga_id)
+                    .collection(CHAPTER_STATS_SUBCOLLECTION).document(chapter_id)
+                )
+                data = {field: admin_firestore.Increment(n) for field, n in deltas.items()}
+                data["updated_at"] = admin_firestore.SERVER_TIMESTAMP
+                batch.set(ref, data, merge=True)
+            _commit_with_retry(batch)
@@ -1,7 +1,11 @@
 from __future__ import annotations
 import logging
+from typing import Optional
 import boto3
 from botocore.client import Config
+from botocore.exceptions import ClientError
+from shared.metrics import timed_presign
+from shared.tracing import traced
 from ..config import settings
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,8 @@ class Boto3S3Presign:
             "S3 presign listo (bucket=%s, region=%s)", self._bucket, settings.aws_region
         )
 
+    @traced("s3.presign_get")
+    @timed_presign("get")
     def presign_get(self, key: str, expires: int = None, content_type: str = None, inline: bool = True) -> str:
         """Generate presigned URL for downloading (GET).
         
@@ -49,16 +55,42 @@ class Boto3S3Presign:
             ExpiresIn=exp,
         )
 
-    def presign_put(self, key: str, content_type: str = "application/pdf", expires: int = None) -> str:
-        """Generate presigned URL for uploading (PUT)."""
+    @traced("s3.presign_put")
+    @timed_presign("put")
+    def presign_put(
+        self,
+        key: str,
+        content_type: str = "application/pdf",
+        expires: int = None,
+        checksum_sha256: str = None,
+    ) -> str:
+        """Generate presigned URL for uploading (PUT).
+
+        Args:
+            checksum_sha256: Base64 SHA-256 of the body. When set, the client must
+                send it as `x-amz-checksum-sha256` and S3 rejects mismatching uploads.
+        """
         exp = expires or settings.s3_presign_expires_seconds
+        params = {
+            "Bucket": self._bucket,
+            "Key": key,
+            "ContentType": content_type,
+        }
+        if checksum_sha256:
+            params["ChecksumSHA256"] = checksum_sha256
         return self._s3.generate_presigned_url(
             ClientMethod="put_object",
-            Params={
-                "Bucket": self._bucket,
-                "Key": key,
-                "ContentType": content_type,
-            },
+            Params=params,
             ExpiresIn=exp,
         )
 
+    @traced("s3.head_object")
+    def object_checksum(self, key: str) -> Optional[str]:
+        """Base64 SHA-256 that S3 stored for the object (None if missing or without checksum)."""
+        try:
+            resp = self._s3.head_object(Bucket=self._bucket, Key=key, ChecksumMode="ENABLED")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return resp.get("ChecksumSHA256")
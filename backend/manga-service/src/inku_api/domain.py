@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any
 
 class Manga(BaseModel):
     id: str
@@ -8,6 +9,7 @@ class Manga(BaseModel):
     cover_path: str = ""
     recommended: Optional[str] = None  # en tu captura es texto
     tags: List[str] = Field(default_factory=list)
+    latest_chapter: Optional[int] = None  # denormalizado desde chapters
 
     @field_validator("tags", mode="before")
     @classmethod
@@ -28,3 +30,41 @@ class Chapter(BaseModel):
     pdf_path: str = ""
     thumb_path: str = ""
     title: str = ""
+
+class ChapterWriteResult(BaseModel):
+    """Per-item outcome of a batched chapter write."""
+    chapter_id: str
+    number: int
+    ok: bool = True
+    error: Optional[str] = None
+
+def _check_document_id(v: str) -> str:
+    # IDs de documento en Firestore: sin "." / ".." ni nombres reservados __x__
+    if v in (".", "..") or (v.startswith("__") and v.endswith("__")):
+        raise ValueError("invalid document id")
+    return v
+
+class ReadingProgress(BaseModel):
+    """Where a user left off in a manga ("continue reading")."""
+    manga_id: str = Field(..., min_length=1, max_length=200, pattern=r"^[^/]+$")
+    chapter_number: int
+    chapter_id: Optional[str] = None
+    page: int = 0
+    updated_at: datetime
+
+    @field_validator("manga_id")
+    @classmethod
+    def check_manga_id(cls, v: str):
+        return _check_document_id(v)
+
+class ReaderEvent(BaseModel):
+    """One reader analytics event (POST /api/events)."""
+    type: Literal["view", "page", "complete"]
+    manga_id: str = Field(..., min_length=1, max_length=200, pattern=r"^[^/]+$")
+    chapter_id: str = Field(..., min_length=1, max_length=200, pattern=r"^[^/]+$")
+    page: Optional[int] = Field(None, ge=0)
+
+    @field_validator("manga_id", "chapter_id")
+    @classmethod
+    def check_path_segment(cls, v: str):
+        return _check_document_id(v)
@@ -0,0 +1,274 @@
+"""
+inku-import - bulk catalog import.
+
+Streams mangas from a JSONL or CSV file, validates them against `Manga` in
+batches and writes them with Firestore BulkWriter under a rate limit.
+Existing mangas are skipped server-side (create precondition) instead of
+being read first.
+
+Usage:
+    python -m inku_api.importer catalog.jsonl --rate 300 --checkpoint import.ckpt
+    python -m inku_api.importer catalog.csv --dry-run
+
+Set FIRESTORE_EMULATOR_HOST to run against the Firestore emulator.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from .domain import Manga
+
+logger = logging.getLogger("inku.importer")
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_RATE = 500  # ops/s, el valor inicial por defecto de BulkWriter
+
+_GRPC_ALREADY_EXISTS = 6
+_MAX_WRITE_ATTEMPTS = 10
+
+_mangas_adapter = TypeAdapter(List[Manga])
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    imported: int = 0
+    skipped: int = 0  # ya existían
+    invalid: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class MangaSink(Protocol):
+    """Destination for validated mangas. `flush` blocks until writes settle."""
+
+    def write(self, mangas: List[Manga]) -> None: ...
+    def flush(self) -> Tuple[int, int, int]: ...  # (imported, skipped, failed)
+    def close(self) -> None: ...
+
+
+class BulkWriterSink:
+    """MangaSink backed by Firestore BulkWriter."""
+
+    def __init__(self, db, max_ops_per_second: int = DEFAULT_RATE):
+        from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+        from .adapters.repo_firebase import FirestoreMangaRepo
+
+        self._serialize = FirestoreMangaRepo._manga_data
+        self._collection = db.collection("mangas")
+        self._writer = db.bulk_writer(
+            BulkWriterOptions(
+                initial_ops_per_second=min(max_ops_per_second, DEFAULT_RATE),
+                max_ops_per_second=max_ops_per_second,
+            )
+        )
+        self._writer.on_write_result(self._on_result)
+        self._writer.on_write_error(self._on_error)
+        # Los callbacks llegan desde los hilos de BulkWriter
+        self._lock = threading.Lock()
+        self._imported = self._skipped = self._failed = 0
+
+    def _on_result(self, reference, result, bulk_writer) -> None:
+        with self._lock:
+            self._imported += 1
+
+    def _on_error(self, failure, bulk_writer) -> bool:
+        if failure.code == _GRPC_ALREADY_EXISTS:
+            with self._lock:
+                self._skipped += 1
+            return False
+        if failure.attempts < _MAX_WRITE_ATTEMPTS:
+            return True
+        logger.error(
+            "Write failed for %s: %s", failure.operation.reference.id, failure.message
+        )
+        with self._lock:
+            self._failed += 1
+        return False
+
+    def write(self, mangas: List[Manga]) -> None:
+        for manga in mangas:
+            self._writer.create(self._collection.document(manga.id), self._serialize(manga))
+
+    def flush(self) -> Tuple[int, int, int]:
+        self._writer.flush()
+        with self._lock:
+            counts = (self._imported, self._skipped, self._failed)
+            self._imported = self._skipped = self._failed = 0
+        return counts
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+# ---- Input ----
+
+def iter_rows(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a JSONL or CSV file (format inferred from extension)."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, encoding="utf-8", newline="") as fh:
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def validate_batch(rows: List[Dict[str, Any]]) -> Tuple[List[Manga], List[Tuple[Dict[str, Any], str]]]:
+    """Validate a batch of rows; only falls back to row-by-row on errors."""
+    try:
+        return _mangas_adapter.validate_python(rows), []
+    except ValidationError:
+        pass
+
+    mangas: List[Manga] = []
+    errors: List[Tuple[Dict[str, Any], str]] = []
+    for row in rows:
+        try:
+            mangas.append(Manga.model_validate(row))
+        except ValidationError as e:
+            errors.append((row, str(e.errors()[0]["msg"])))
+    return mangas, errors
+
+
+# ---- Checkpoint ----
+
+def load_checkpoint(path: Optional[str]) -> int:
+    """Return the number of input rows already processed."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as fh:
+        return int(json.load(fh).get("offset", 0))
+
+
+def save_checkpoint(path: Optional[str], offset: int) -> None:
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"offset": offset}, fh)
+    os.replace(tmp, path)
+
+
+# ---- Import ----
+
+def run_import(
+    rows: Iterable[Dict[str, Any]],
+    sink: Optional[MangaSink],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint: Optional[str] = None,
+    dry_run: bool = False,
+) -> ImportStats:
+    """
+    Import rows in batches. The checkpoint is only advanced once a batch has
+    been flushed with no failed writes, so an interrupted run can be resumed
+    without losing rows. After a batch with failures the checkpoint stays
+    before it; a resumed run retries from there and the rows that did get
+    written are skipped as existing.
+    With dry_run nothing is written and the checkpoint is left untouched.
+    """
+    stats = ImportStats()
+    offset = load_checkpoint(checkpoint)
+    if offset:
+        logger.info("Resuming from row %d", offset)
+    advance = True  # False tras el primer batch con fallos
+
+    it = itertools.islice(iter(rows), offset, None)
+    while True:
+        batch = list(itertools.islice(it, batch_size))
+        if not batch:
+            break
+
+        mangas, errors = validate_batch(batch)
+        stats.read += len(batch)
+        stats.invalid += len(errors)
+        for row, msg in errors:
+            logger.warning("Invalid row (id=%s): %s", row.get("id"), msg)
+
+        if dry_run or sink is None:
+            continue
+
+        sink.write(mangas)
+        imported, skipped, failed = sink.flush()
+        stats.imported += imported
+        stats.skipped += skipped
+        stats.failed += failed
+
+        if failed and advance:
+            advance = False
+            logger.warning("Checkpoint held at row %d: %d writes failed in this batch", offset, failed)
+        offset += len(batch)
+        if advance:
+            save_checkpoint(checkpoint, offset)
+        logger.info(
+            "%d rows | imported=%d skipped=%d invalid=%d failed=%d | %.0f rows/s",
+            stats.read, stats.imported, stats.skipped, stats.invalid, stats.failed,
+            stats.rows_per_second,
+        )
+
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="inku-import", description="Bulk import mangas into Firestore.")
+    parser.add_argument("source", help="JSONL or CSV file")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: by extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rate", type=int, default=DEFAULT_RATE, help="Max writes per second")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resumable imports")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    sink = None
+    if not args.dry_run:
+        from firebase_admin import firestore as admin_firestore
+        from .firebase_app import init_firebase
+
+        init_firebase()
+        sink = BulkWriterSink(admin_firestore.client(), max_ops_per_second=args.rate)
+
+    try:
+        stats = run_import(
+            iter_rows(args.source, args.format),
+            sink,
+            batch_size=args.batch_size,
+            checkpoint=args.checkpoint,
+            dry_run=args.dry_run,
+        )
+    finally:
+        if sink is not None:
+            sink.close()
+
+    print(
+        f"read={stats.read} imported={stats.imported} skipped={stats.skipped} "
+        f"invalid={stats.invalid} failed={stats.failed} "
+        f"elapsed={stats.elapsed:.1f}s throughput={stats.rows_per_second:.0f} rows/s"
+    )
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,24 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 from .config import settings
 from .logging_conf import setup_logging
-from .routers import health, mangas, uploads
+from firebase_admin import firestore as admin_firestore
+from .routers import events, health, mangas, moderation, progress, uploads
 from .firebase_app import init_firebase
+from .adapters.repo_firebase import TRANSIENT_ERRORS, FirestoreMangaRepo
+from .services.event_ingest import event_ingest
+from .services.progress_buffer import progress_buffer
+from shared.auth import start_key_refresh
+from shared.metrics import install_metrics
+from shared.tracing import install_tracing
+
+
+def _save_progress(entries):
+    FirestoreMangaRepo(admin_firestore.client()).save_progress(entries)
+
+
+def _save_chapter_stats(counts):
+    FirestoreMangaRepo(admin_firestore.client()).increment_chapter_stats(counts)
+
 
 def create_app() -> FastAPI:
     setup_logging(settings.debug)
@@ -19,13 +35,33 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    install_metrics(app, "manga-service")
+    install_tracing(app, "manga-service")
 
     @app.on_event("startup")
     def startup():
         init_firebase()
+        start_key_refresh()
+        progress_buffer.start(_save_progress, TRANSIENT_ERRORS)
+
+    @app.on_event("startup")
+    async def start_event_ingest():
+        event_ingest.start(_save_chapter_stats)
+
+    @app.on_event("shutdown")
+    def shutdown():
+        # Última escritura del progreso pendiente antes de salir
+        progress_buffer.stop()
+
+    @app.on_event("shutdown")
+    async def stop_event_ingest():
+        await event_ingest.stop(_save_chapter_stats)
     app.include_router(health.router, prefix=settings.api_prefix)
     app.include_router(mangas.router,  prefix=settings.api_prefix)
     app.include_router(uploads.router, prefix=settings.api_prefix)
+    app.include_router(moderation.router, prefix=settings.api_prefix)
+    app.include_router(progress.router, prefix=settings.api_prefix)
+    app.include_router(events.router, prefix=settings.api_prefix)
     return app
 
 # 👇 IMPORTANTE: expone 'app' a uvicorn
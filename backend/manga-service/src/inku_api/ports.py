@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import Iterable, Optional, Protocol
-from .domain import Manga, Chapter
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
+from .domain import Manga, Chapter, ChapterWriteResult, ReadingProgress
 
 class MangaRepository(Protocol):
     # Mangas
     def list_mangas(self) -> Iterable[Manga]: ...
     def manga_exists(self, manga_id: str) -> bool: ...
+    def list_manga_ids(self) -> Iterable[str]: ...
     def get_manga(self, manga_id: str) -> Optional[Manga]: ...
     def create_manga(self, manga: Manga) -> Manga: ...
 
@@ -14,8 +15,31 @@ class MangaRepository(Protocol):
     def get_chapter_by_id(self, manga_id: str, chapter_id: str) -> Optional[Chapter]: ...
     def get_chapter_by_number(self, manga_id: str, number: int) -> Optional[Chapter]: ...
     def create_chapter(self, chapter: Chapter) -> Chapter: ...
+    def create_chapters(self, manga_id: str, chapters: List[Chapter]) -> List[ChapterWriteResult]: ...
+
+    # Moderation
+    def list_chapters_by_status(
+        self, status: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Chapter], Optional[str]]: ...
+    def set_chapters_status(self, decisions: List[Tuple[str, str, str]]) -> List[ChapterWriteResult]: ...
+
+    # Content-hash index (sha256 hex -> S3 object key)
+    def find_object_by_hash(self, sha256: str) -> Optional[str]: ...
+    def save_object_hash(self, sha256: str, s3_key: str) -> str: ...
+
+    # Reading progress (per user and manga)
+    def get_progress(self, uid: str, manga_id: str) -> Optional[ReadingProgress]: ...
+    def list_progress(self, uid: str, limit: int = 50) -> List[ReadingProgress]: ...
+    def save_progress(self, entries: List[Tuple[str, ReadingProgress]]) -> None: ...
+
+    # Reader analytics: {(manga_id, chapter_id): {counter: delta}}
+    def increment_chapter_stats(self, counts: Dict[Tuple[str, str], Dict[str, int]]) -> None: ...
 
 class S3PresignService(Protocol):
     def presign_get(self, key: str, expires: int = 900, content_type: str = None, inline: bool = True) -> str: ...
-    def presign_put(self, key: str, content_type: str = "application/pdf", expires: int = 900) -> str: ...
+    def presign_put(
+        self, key: str, content_type: str = "application/pdf", expires: int = 900, checksum_sha256: str = None
+    ) -> str: ...
+    # Base64 SHA-256 stored by S3 for the object; None if missing or stored without one
+    def object_checksum(self, key: str) -> Optional[str]: ...
 
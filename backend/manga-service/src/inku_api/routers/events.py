@@ -0,0 +1,96 @@
+"""
+Events router - Reader analytics ingestion.
+"""
+from __future__ import annotations
+import asyncio
+import ipaddress
+from typing import Annotated, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from firebase_admin import firestore as admin_firestore
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from shared.auth import get_moderator_user, get_optional_user_async
+from ..adapters.repo_firebase import FirestoreMangaRepo
+from ..domain import ReaderEvent
+from ..firebase_app import init_firebase
+from ..services import event_ingest as ingest
+from ..services.id_filter import manga_id_filter
+from ..services.manga_services import MangaService
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+def get_service() -> MangaService:
+    """Dependency to get MangaService with the manga ID filter (no S3 needed)."""
+    init_firebase()
+    return MangaService(repo=FirestoreMangaRepo(admin_firestore.client()), id_filter=manga_id_filter)
+
+# Un solo pase de validación para todo el array
+_events_adapter = TypeAdapter(
+    Annotated[List[ReaderEvent], Field(max_length=ingest.EVENTS_MAX_PER_REQUEST)]
+)
+
+
+class EventsAccepted(BaseModel):
+    accepted: int
+    dropped: int
+
+
+def _is_trusted_proxy(host: Optional[str]) -> bool:
+    try:
+        addr = ipaddress.ip_address(host or "")
+    except ValueError:
+        return False
+    return any(addr in net for net in ingest.EVENTS_TRUSTED_PROXIES)
+
+
+def _client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else None
+    # X-Real-IP solo vale si lo pone nginx; si el puerto es accesible sin proxy se ignora
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip and _is_trusted_proxy(peer):
+        return real_ip.strip()
+    return peer or "-"
+
+
+@router.post(
+    "",
+    response_model=EventsAccepted,
+    status_code=202,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _events_adapter.json_schema()}},
+    }},
+)
+async def ingest_events(
+    request: Request,
+    user: Optional[dict] = Depends(get_optional_user_async),
+    svc: MangaService = Depends(get_service),
+):
+    """
+    Accept an array of reader events (view / page / complete) for counting.
+    Each client (signed-in uid, else IP) may send EVENTS_CLIENT_LIMIT events
+    per minute; events over that limit, for mangas that do not exist, or that
+    do not fit in the queue are dropped and reported in `dropped`.
+    """
+    try:
+        events = _events_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    client = f"uid:{user['uid']}" if user else f"ip:{_client_ip(request)}"
+    received = len(events)
+    events = events[:ingest.event_ingest.admit(client, received)]
+    # Cada par manga/capítulo nuevo sería un documento de chapter_stats: nada de IDs inventados
+    known = await asyncio.to_thread(svc.known_manga_ids, [e.manga_id for e in events])
+    valid = [e for e in events if e.manga_id in known]
+    ingest.event_ingest.reject_unknown(len(events) - len(valid))
+    accepted, _ = ingest.event_ingest.offer(valid)
+    return EventsAccepted(accepted=accepted, dropped=received - accepted)
+
+
+@router.get("/stats")
+def ingest_stats(user: dict = Depends(get_moderator_user)) -> Dict[str, int]:
+    """Queue depth, drops and flushed counters of this replica."""
+    return ingest.event_ingest.stats()
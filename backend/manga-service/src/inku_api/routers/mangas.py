@@ -2,28 +2,29 @@
 Manga router - Catalog, detail, and chapters endpoints.
 """
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
 from pydantic import BaseModel
 from firebase_admin import firestore as admin_firestore
 
 from ..firebase_app import init_firebase
 from ..services.manga_services import MangaService
+from ..services.id_filter import manga_id_filter
 from ..adapters.repo_firebase import FirestoreMangaRepo
 from ..adapters.s3_aws import Boto3S3Presign
 from ..domain import Manga, Chapter
-from shared.auth import get_current_user
+from shared.auth import get_current_user_async
 
 router = APIRouter(prefix="/mangas", tags=["mangas"])
 
 
 def get_service() -> MangaService:
-    """Dependency to get MangaService with repo and S3."""
+    """Dependency to get MangaService with repo, S3 and the manga ID filter."""
     init_firebase()
     db = admin_firestore.client()
     repo = FirestoreMangaRepo(db)
     s3 = Boto3S3Presign()
-    return MangaService(repo=repo, s3=s3)
+    return MangaService(repo=repo, s3=s3, id_filter=manga_id_filter)
 
 
 # Response models
@@ -62,7 +63,7 @@ class CreateMangaRequest(BaseModel):
 @router.post("", response_model=MangaWithCover, status_code=201)
 def create_manga(
     request: CreateMangaRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     svc: MangaService = Depends(get_service),
 ):
     """Create a new manga entry. Requires authentication. Used when uploading a new manga with its first chapter."""
@@ -125,6 +126,19 @@ def list_mangas(svc: MangaService = Depends(get_service)) -> List[MangaWithCover
     return result
 
 
+@router.get(":id-filter", response_class=Response)
+def get_manga_id_filter(request: Request, svc: MangaService = Depends(get_service)) -> Response:
+    """
+    Bloom filter of all manga IDs (shared.bloom binary format), used by
+    list-service to validate list items. Supports If-None-Match.
+    """
+    body, etag = svc.id_filter.snapshot(svc.repo.list_manga_ids)
+    headers = {"ETag": etag, "Cache-Control": f"max-age={int(svc.id_filter.ttl)}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/octet-stream", headers=headers)
+
+
 @router.get("/{manga_id}", response_model=MangaWithCover)
 def get_manga(
     manga_id: str,
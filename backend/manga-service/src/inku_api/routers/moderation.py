@@ -0,0 +1,105 @@
+"""
+Moderation router - Review queue for uploaded chapters.
+"""
+from __future__ import annotations
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+from shared.auth import get_moderator_user
+from ..services.manga_services import MAX_BATCH_CHAPTERS, MangaService
+from ..adapters.repo_firebase import FirestoreMangaRepo
+from ..firebase_app import init_firebase
+from ..domain import Chapter
+from firebase_admin import firestore as admin_firestore
+
+
+router = APIRouter(prefix="/moderation", tags=["moderation"])
+
+
+def get_service() -> MangaService:
+    """Dependency to get MangaService (no S3 needed)."""
+    init_firebase()
+    db = admin_firestore.client()
+    return MangaService(repo=FirestoreMangaRepo(db))
+
+
+# Request/Response models
+
+class ReviewQueueResponse(BaseModel):
+    status: str
+    chapters: List[Chapter]
+    next_cursor: Optional[str] = None
+
+
+class ModerationDecision(BaseModel):
+    manga_id: str
+    chapter_id: str
+    action: Literal["approve", "reject"]
+
+
+class ModerationBatchRequest(BaseModel):
+    decisions: List[ModerationDecision] = Field(..., min_length=1, max_length=MAX_BATCH_CHAPTERS)
+
+
+class ModerationItemResult(BaseModel):
+    id: str
+    status: str  # approved | rejected | failed
+    error: Optional[str] = None
+
+
+class ModerationBatchResponse(BaseModel):
+    updated: int
+    failed: int
+    results: List[ModerationItemResult]
+
+
+_ACTION_STATUS = {"approve": "approved", "reject": "rejected"}
+
+
+# ============================================
+# Moderator Endpoints
+# ============================================
+
+@router.get("/chapters", response_model=ReviewQueueResponse)
+def review_queue(
+    status: Literal["pending_review", "approved", "rejected"] = Query("pending_review"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    user: dict = Depends(get_moderator_user),
+    svc: MangaService = Depends(get_service),
+):
+    """Chapters awaiting review across all mangas, oldest first, cursor-paginated."""
+    try:
+        chapters, next_cursor = svc.list_chapters_for_review(status, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ReviewQueueResponse(status=status, chapters=chapters, next_cursor=next_cursor)
+
+
+@router.post("/chapters:batch", response_model=ModerationBatchResponse)
+def moderate_chapters(
+    request: ModerationBatchRequest,
+    user: dict = Depends(get_moderator_user),
+    svc: MangaService = Depends(get_service),
+):
+    """Approve or reject up to 500 chapters in chunked batched writes."""
+    decisions = [
+        (d.manga_id, d.chapter_id, _ACTION_STATUS[d.action]) for d in request.decisions
+    ]
+    results = svc.moderate_chapters(decisions)
+    
+    updated = sum(1 for r in results if r.ok)
+    return ModerationBatchResponse(
+        updated=updated,
+        failed=len(results) - updated,
+        results=[
+            ModerationItemResult(
+                id=r.chapter_id,
+                status=status if r.ok else "failed",
+                error=r.error,
+            )
+            for r, (_, _, status) in zip(results, decisions)
+        ],
+    )
@@ -0,0 +1,92 @@
+"""
+Progress router - "Continue reading" per user and manga.
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional
+
+from shared.auth import get_current_user_async
+from ..services.manga_services import MangaService
+from ..services.progress_buffer import progress_buffer
+from ..adapters.repo_firebase import FirestoreMangaRepo
+from ..firebase_app import init_firebase
+from ..domain import ReadingProgress
+from firebase_admin import firestore as admin_firestore
+
+
+router = APIRouter(prefix="/progress", tags=["progress"])
+
+
+def get_service() -> MangaService:
+    """Dependency to get MangaService with the progress buffer (no S3 needed)."""
+    init_firebase()
+    db = admin_firestore.client()
+    return MangaService(repo=FirestoreMangaRepo(db), progress=progress_buffer)
+
+
+class ProgressReport(BaseModel):
+    chapter_number: int = Field(..., ge=0)
+    chapter_id: Optional[str] = None
+    page: int = Field(0, ge=0)
+
+
+class ContinueReadingResponse(BaseModel):
+    items: List[ReadingProgress]
+
+
+# ============================================
+# Authenticated Endpoints
+# ============================================
+
+@router.get("", response_model=ContinueReadingResponse)
+def continue_reading(
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(get_current_user_async),
+    svc: MangaService = Depends(get_service),
+):
+    """Mangas the user is reading, most recent first."""
+    return ContinueReadingResponse(items=svc.list_progress(user["uid"], limit=limit))
+
+
+@router.get("/{manga_id}", response_model=ReadingProgress)
+def get_progress(
+    manga_id: str,
+    user: dict = Depends(get_current_user_async),
+    svc: MangaService = Depends(get_service),
+):
+    """Where the user left off in a manga."""
+    progress = svc.get_progress(user["uid"], manga_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="PROGRESS_NOT_FOUND")
+    return progress
+
+
+@router.put("/{manga_id}", response_model=ReadingProgress)
+def report_progress(
+    manga_id: str,
+    report: ProgressReport,
+    user: dict = Depends(get_current_user_async),
+    svc: MangaService = Depends(get_service),
+):
+    """
+    Record the reader's position. Reports are coalesced in memory and
+    written in batches, so calling this every few seconds is fine.
+    """
+    try:
+        progress = ReadingProgress(
+            manga_id=manga_id,
+            chapter_number=report.chapter_number,
+            chapter_id=report.chapter_id,
+            page=report.page,
+            updated_at=datetime.now(timezone.utc),
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    try:
+        return svc.report_progress(user["uid"], progress)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="MANGA_NOT_FOUND")
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="PROGRESS_BUFFER_FULL", headers={"Retry-After": "60"})
@@ -3,10 +3,10 @@ Upload router - Presigned URLs and chapter registration with auth.
 """
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
-from shared.auth import get_current_user
-from ..services.manga_services import MangaService
+from shared.auth import get_current_user_async
+from ..services.manga_services import MAX_BATCH_CHAPTERS, InvalidChecksum, MangaService
 from ..adapters.repo_firebase import FirestoreMangaRepo
 from ..adapters.s3_aws import Boto3S3Presign
 from ..firebase_app import init_firebase
@@ -25,20 +25,26 @@ def get_service() -> MangaService:
 
 # Request/Response models
 
+SHA256_PATTERN = r"^([0-9a-fA-F]{64}|[A-Za-z0-9+/]{43}=)$"
+
 class PresignRequest(BaseModel):
     manga_id: str = Field(..., description="Target manga ID")
     chapter_number: int = Field(..., ge=1, description="Chapter number")
     content_type: str = Field("application/pdf", description="File content type")
+    sha256: Optional[str] = Field(
+        None, pattern=SHA256_PATTERN, description="SHA-256 of the file (hex or base64)"
+    )
 
 
 class PresignResponse(BaseModel):
     manga_id: str
     chapter_number: int
     s3_key: str
-    upload_url: str
+    upload_url: Optional[str] = None  # None when the file is already stored
     thumb_key: str
     thumb_upload_url: str
     expires_in: int = 900
+    deduplicated: bool = False
 
 
 class RegisterChapterRequest(BaseModel):
@@ -47,6 +53,33 @@ class RegisterChapterRequest(BaseModel):
     title: str = Field("", max_length=200)
     s3_key: str
     thumb_key: str = ""
+    sha256: Optional[str] = Field(None, pattern=SHA256_PATTERN)
+
+
+class BatchChapterItem(BaseModel):
+    chapter_number: int = Field(..., ge=1)
+    title: str = Field("", max_length=200)
+    s3_key: str
+    thumb_key: str = ""
+
+
+class BatchRegisterRequest(BaseModel):
+    manga_id: str
+    chapters: List[BatchChapterItem] = Field(..., min_length=1, max_length=MAX_BATCH_CHAPTERS)
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    number: int
+    status: str  # pending_review | failed
+    error: Optional[str] = None
+
+
+class BatchRegisterResponse(BaseModel):
+    manga_id: str
+    registered: int
+    failed: int
+    results: List[BatchItemResult]
 
 
 class ChapterResponse(BaseModel):
@@ -64,7 +97,7 @@ class ChapterResponse(BaseModel):
 @router.post("/presign", response_model=PresignResponse)
 def get_upload_presign(
     request: PresignRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     svc: MangaService = Depends(get_service),
 ):
     """
@@ -72,15 +105,21 @@ def get_upload_presign(
     
     Returns S3 keys and presigned PUT URLs. Frontend uploads directly to S3,
     then calls /register to save metadata.
+    
+    If `sha256` is given and the same file was uploaded before, `upload_url`
+    is null and `s3_key` points at the existing object.
     """
     try:
         urls = svc.create_upload_urls(
             manga_id=request.manga_id,
             chapter_number=request.chapter_number,
             content_type=request.content_type,
+            sha256=request.sha256,
         )
     except KeyError:
         raise HTTPException(status_code=404, detail="MANGA_NOT_FOUND")
+    except InvalidChecksum as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -91,13 +130,14 @@ def get_upload_presign(
         upload_url=urls["upload_url"],
         thumb_key=urls["thumb_key"],
         thumb_upload_url=urls["thumb_upload_url"],
+        deduplicated=urls["deduplicated"],
     )
 
 
 @router.post("/register", response_model=ChapterResponse)
 def register_chapter(
     request: RegisterChapterRequest,
-    user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_async),
     svc: MangaService = Depends(get_service),
 ):
     """
@@ -112,9 +152,14 @@ def register_chapter(
             title=request.title,
             s3_key=request.s3_key,
             thumb_key=request.thumb_key,
+            sha256=request.sha256,
         )
     except KeyError:
         raise HTTPException(status_code=404, detail="MANGA_NOT_FOUND")
+    except InvalidChecksum as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
     return ChapterResponse(
         id=chapter.id,
@@ -125,6 +170,43 @@ def register_chapter(
     )
 
 
+@router.post("/register:batch", response_model=BatchRegisterResponse)
+def register_chapters_batch(
+    request: BatchRegisterRequest,
+    user: dict = Depends(get_current_user_async),
+    svc: MangaService = Depends(get_service),
+):
+    """
+    Register up to 500 chapters of the same manga in one request.
+    
+    The manga is validated once and chapters are written in batched commits.
+    Returns one result per chapter, in request order.
+    """
+    try:
+        results = svc.register_chapters(
+            manga_id=request.manga_id,
+            items=[item.model_dump() for item in request.chapters],
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="MANGA_NOT_FOUND")
+    
+    registered = sum(1 for r in results if r.ok)
+    return BatchRegisterResponse(
+        manga_id=request.manga_id,
+        registered=registered,
+        failed=len(results) - registered,
+        results=[
+            BatchItemResult(
+                id=r.chapter_id,
+                number=r.number,
+                status="pending_review" if r.ok else "failed",
+                error=r.error,
+            )
+            for r in results
+        ],
+    )
+
+
 # ============================================
 # Legacy endpoint (for backwards compatibility)
 # ============================================
@@ -138,7 +220,7 @@ class CreateEpisodeIn(BaseModel):
 def create_episode_legacy(
     manga_id: str,
     body: CreateEpisodeIn,
-    user: dict = Depends(get_current_user),  # Now requires auth
+    user: dict = Depends(get_current_user_async),  # Now requires auth
     svc: MangaService = Depends(get_service),
 ):
     """Legacy endpoint for episode creation."""
@@ -0,0 +1,197 @@
+"""
+Reader analytics ingestion: bounded queue, aggregation and batched flush.
+
+`POST /api/events` validates a whole array in one TypeAdapter pass and puts
+the events on a bounded asyncio queue without waiting. When the queue is
+full, the extra events are dropped and counted instead of slowing the
+request (load shedding). A consumer task folds the events into per-chapter
+counters. Every EVENTS_FLUSH_INTERVAL seconds it writes those counters in
+batches, so a chapter costs one write per interval however many views it
+gets. Counts still in memory when a replica dies are lost, which is
+acceptable for analytics.
+
+Configuration (env):
+    EVENTS_QUEUE_SIZE       Queued events before shedding (default 10000)
+    EVENTS_FLUSH_INTERVAL   Seconds between flushes (default 10)
+    EVENTS_MAX_PER_REQUEST  Events per POST (default 500)
+    EVENTS_CLIENT_LIMIT     Events per client (uid or IP) per minute (default 600)
+    EVENTS_TRUSTED_PROXIES  Peers whose X-Real-IP is used as the client IP,
+                            comma-separated IPs or CIDRs (default 127.0.0.1,::1)
+"""
+from __future__ import annotations
+import asyncio
+import ipaddress
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from ..domain import ReaderEvent
+
+logger = logging.getLogger(__name__)
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "10000"))
+EVENTS_FLUSH_INTERVAL = float(os.getenv("EVENTS_FLUSH_INTERVAL", "10"))
+EVENTS_MAX_PER_REQUEST = int(os.getenv("EVENTS_MAX_PER_REQUEST", "500"))
+EVENTS_CLIENT_LIMIT = int(os.getenv("EVENTS_CLIENT_LIMIT", "600"))
+EVENTS_TRUSTED_PROXIES = [
+    ipaddress.ip_network(p.strip(), strict=False)
+    for p in os.getenv("EVENTS_TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if p.strip()
+]
+CLIENT_WINDOW = 60.0
+
+# Tells the consumer to exit (queued after the real events)
+_STOP = object()
+
+# Event type -> counter field in chapter_stats
+COUNTER_FIELDS = {"view": "views", "page": "pages", "complete": "completions"}
+
+ChapterCounts = Dict[Tuple[str, str], Dict[str, int]]
+# Persists aggregated counts, e.g. FirestoreMangaRepo.increment_chapter_stats (blocking)
+Saver = Callable[[ChapterCounts], None]
+
+
+class EventIngest:
+    """Bounded event queue with a single aggregating consumer."""
+
+    def __init__(
+        self,
+        max_queue: int = EVENTS_QUEUE_SIZE,
+        interval: float = EVENTS_FLUSH_INTERVAL,
+        client_limit: int = EVENTS_CLIENT_LIMIT,
+    ):
+        self.interval = interval
+        self.client_limit = client_limit
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._counts: ChapterCounts = {}
+        self._clients: Dict[str, int] = {}  # eventos por cliente en la ventana actual
+        self._window_start = time.monotonic()
+        self.accepted = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.unknown = 0  # eventos de mangas que no existen
+        self.flushed = 0
+        self.flush_errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def admit(self, client: str, requested: int) -> int:
+        """How many of `requested` events `client` may still send this minute."""
+        now = time.monotonic()
+        if now - self._window_start >= CLIENT_WINDOW:
+            self._clients.clear()
+            self._window_start = now
+        used = self._clients.get(client, 0)
+        allowed = max(0, min(requested, self.client_limit - used))
+        self._clients[client] = used + allowed
+        self.rate_limited += requested - allowed
+        return allowed
+
+    def reject_unknown(self, count: int) -> None:
+        """Count events discarded because their manga does not exist."""
+        self.unknown += count
+
+    def offer(self, events: Iterable[ReaderEvent]) -> Tuple[int, int]:
+        """Enqueue without waiting. Returns (accepted, dropped)."""
+        accepted = dropped = 0
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+                accepted += 1
+            except asyncio.QueueFull:
+                dropped += 1
+        self.accepted += accepted
+        self.dropped += dropped
+        if dropped:
+            logger.warning("Event queue full: dropped %d events", dropped)
+        return accepted, dropped
+
+    def _aggregate(self, event: ReaderEvent) -> None:
+        counters = self._counts.setdefault((event.manga_id, event.chapter_id), {})
+        field = COUNTER_FIELDS[event.type]
+        counters[field] = counters.get(field, 0) + 1
+
+    def _drain(self) -> bool:
+        """Aggregate what is queued. Returns True if the stop marker was reached."""
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if event is _STOP:
+                return True
+            self._aggregate(event)
+
+    async def flush(self, save: Saver) -> int:
+        """Write the aggregated counters. Returns how many chapters were written."""
+        counts, self._counts = self._counts, {}
+        if not counts:
+            return 0
+        try:
+            await asyncio.to_thread(save, counts)
+        except Exception:
+            self.flush_errors += 1
+            # Sumar de vuelta para el próximo intento
+            for key, counters in counts.items():
+                pending = self._counts.setdefault(key, {})
+                for field, n in counters.items():
+                    pending[field] = pending.get(field, 0) + n
+            raise
+        self.flushed += len(counts)
+        return len(counts)
+
+    async def _run(self, save: Saver) -> None:
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + self.interval
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), max(0.0, next_flush - loop.time()))
+            except asyncio.TimeoutError:
+                event = None
+            if event is _STOP:
+                return
+            if event is not None:
+                self._aggregate(event)
+                if self._drain():
+                    return
+            if loop.time() >= next_flush:
+                next_flush = loop.time() + self.interval
+                try:
+                    await self.flush(save)
+                except Exception as e:
+                    logger.warning("Event flush failed: %s", e)
+
+    def start(self, save: Saver) -> None:
+        """Start the consumer on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(save))
+
+    async def stop(self, save: Saver) -> None:
+        """Stop the consumer, then aggregate and write whatever is left."""
+        if self._task is not None:
+            if not self._task.done():
+                # Un marcador en la cola en vez de cancel(): termina tras los eventos ya encolados
+                await self.queue.put(_STOP)
+                await self._task
+            self._task = None
+        self._drain()
+        try:
+            await self.flush(save)
+        except Exception as e:
+            logger.warning("Final event flush failed: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "pending_chapters": len(self._counts),
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "unknown": self.unknown,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+        }
+
+
+event_ingest = EventIngest()
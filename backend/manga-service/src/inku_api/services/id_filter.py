@@ -0,0 +1,65 @@
+"""
+Published snapshot of the catalog's manga IDs as a Bloom filter.
+
+list-service downloads it (`GET /api/mangas:id-filter`, conditional on the
+ETag) to validate list items without calling this service per add, and
+the events endpoint uses it to drop events for unknown mangas. The filter
+is rebuilt from a keys-only query every MANGA_ID_FILTER_TTL seconds; mangas
+created through this process are added to it immediately.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+from shared.bloom import BloomFilter
+
+MANGA_ID_FILTER_TTL = float(os.getenv("MANGA_ID_FILTER_TTL", "300"))
+MANGA_ID_FILTER_ERROR_RATE = float(os.getenv("MANGA_ID_FILTER_ERROR_RATE", "0.001"))
+
+
+class MangaIdFilter:
+    """Bloom filter of manga IDs with its serialized form and ETag."""
+
+    def __init__(self, ttl: float = MANGA_ID_FILTER_TTL, error_rate: float = MANGA_ID_FILTER_ERROR_RATE):
+        self.ttl = ttl
+        self.error_rate = error_rate
+        self._bloom: Optional[BloomFilter] = None
+        self._body: Optional[bytes] = None
+        self._etag = ""
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self, load_ids: Callable[[], Iterable[str]]) -> BloomFilter:
+        # Llamar con el lock tomado
+        if self._bloom is None or time.monotonic() - self._built_at >= self.ttl:
+            self._bloom = BloomFilter.from_keys(load_ids(), self.error_rate)
+            self._built_at = time.monotonic()
+            self._body = None
+        return self._bloom
+
+    def might_contain(self, manga_id: str, load_ids: Callable[[], Iterable[str]]) -> bool:
+        """False if the manga surely does not exist (rare false positives)."""
+        with self._lock:
+            return manga_id in self._refresh(load_ids)
+
+    def snapshot(self, load_ids: Callable[[], Iterable[str]]) -> Tuple[bytes, str]:
+        """Serialized filter and its ETag, rebuilding it when older than the TTL."""
+        with self._lock:
+            self._refresh(load_ids)
+            if self._body is None:
+                self._body = self._bloom.to_bytes()
+                self._etag = '"%s"' % hashlib.sha256(self._body).hexdigest()[:20]
+            return self._body, self._etag
+
+    def add(self, manga_id: str) -> None:
+        """Add a new manga to the current filter (no-op until the first build)."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(manga_id)
+                self._body = None
+
+
+manga_id_filter = MangaIdFilter()
@@ -1,9 +1,34 @@
 from __future__ import annotations
+import base64
+import binascii
 from dataclasses import dataclass, field
-from typing import Optional, List, Union, Dict, Any
+from typing import Optional, List, Set, Tuple, Union, Dict, Any, Iterable
 from urllib.parse import urlparse, unquote
-from ..domain import Chapter, Manga
+from ..domain import Chapter, ChapterWriteResult, Manga, ReadingProgress
 from ..ports import MangaRepository, S3PresignService
+from .id_filter import MangaIdFilter
+from .progress_buffer import ProgressBuffer
+
+MAX_BATCH_CHAPTERS = 500
+
+
+class InvalidChecksum(ValueError):
+    """The client's SHA-256 is malformed or does not match the stored object."""
+
+
+def normalize_sha256(value: str) -> Tuple[str, str]:
+    """Accept a SHA-256 as hex or base64 and return (hex, base64)."""
+    value = value.strip()
+    try:
+        if len(value) == 64:
+            digest = bytes.fromhex(value)
+        else:
+            digest = base64.b64decode(value, validate=True)
+    except (ValueError, binascii.Error):
+        raise InvalidChecksum("INVALID_SHA256")
+    if len(digest) != 32:
+        raise InvalidChecksum("INVALID_SHA256")
+    return digest.hex(), base64.b64encode(digest).decode("ascii")
 
 
 @dataclass
@@ -11,6 +36,8 @@ class MangaService:
     """Service layer for manga operations."""
     repo: MangaRepository
     s3: Optional[S3PresignService] = None
+    id_filter: Optional[MangaIdFilter] = None
+    progress: Optional[ProgressBuffer] = None
     
     # ---- Mangas ----
     
@@ -24,8 +51,46 @@ class MangaService:
     
     def create_manga(self, manga: Manga) -> Manga:
         """Create a new manga entry."""
-        return self.repo.create_manga(manga)
+        created = self.repo.create_manga(manga)
+        if self.id_filter is not None:
+            self.id_filter.add(created.id)
+        return created
+
+    def known_manga_ids(self, manga_ids: Iterable[str]) -> Set[str]:
+        """The IDs that exist in the catalog, checked against the ID filter."""
+        if self.id_filter is None:
+            raise ValueError("Manga ID filter not configured")
+        return {m for m in set(manga_ids) if self.id_filter.might_contain(m, self.repo.list_manga_ids)}
     
+    # ---- Reading progress ----
+
+    def _progress_buffer(self) -> ProgressBuffer:
+        if self.progress is None:
+            raise ValueError("Progress buffer not configured")
+        return self.progress
+
+    def report_progress(self, uid: str, progress: ReadingProgress) -> ReadingProgress:
+        """
+        Buffer a progress report; it reaches Firestore on the next flush.
+        The manga must exist (checked once per buffered entry).
+        """
+        buffer = self._progress_buffer()
+        if buffer.get(uid, progress.manga_id) is None and not self.repo.manga_exists(progress.manga_id):
+            raise KeyError("MANGA_NOT_FOUND")
+        if not buffer.put(uid, progress):
+            raise OverflowError("PROGRESS_BUFFER_FULL")
+        return progress
+
+    def get_progress(self, uid: str, manga_id: str) -> Optional[ReadingProgress]:
+        """Latest progress in a manga, buffered reports first."""
+        return self._progress_buffer().get(uid, manga_id) or self.repo.get_progress(uid, manga_id)
+
+    def list_progress(self, uid: str, limit: int = 50) -> List[ReadingProgress]:
+        """"Continue reading": stored progress overlaid with buffered reports, newest first."""
+        latest = {p.manga_id: p for p in self.repo.list_progress(uid, limit)}
+        latest.update((p.manga_id, p) for p in self._progress_buffer().pending_for(uid))
+        return sorted(latest.values(), key=lambda p: p.updated_at, reverse=True)[:limit]
+
     # ---- Chapters ----
 
     def list_chapters(self, manga_id: str) -> List[Chapter]:
@@ -97,10 +162,15 @@ class MangaService:
         manga_id: str, 
         chapter_number: int,
         content_type: str = "application/pdf",
+        sha256: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Generate presigned URLs for uploading a new chapter.
         Returns S3 key and upload URL.
+        
+        If `sha256` (hex or base64) matches an already uploaded file, the
+        existing key is returned with `upload_url=None` and `deduplicated=True`.
+        Otherwise the PUT URL is signed with `x-amz-checksum-sha256`.
         """
         if self.s3 is None:
             raise ValueError("S3 service not configured")
@@ -110,12 +180,36 @@ class MangaService:
         # Generate S3 key for the chapter
         s3_key = f"chapters/{manga_id}/{chapter_number}.pdf"
         thumb_key = f"thumbnails/{manga_id}/{chapter_number}.jpg"
+        thumb_upload_url = self.s3.presign_put(thumb_key, content_type="image/jpeg")
+        
+        if sha256 is None:
+            return {
+                "s3_key": s3_key,
+                "upload_url": self.s3.presign_put(s3_key, content_type=content_type),
+                "thumb_key": thumb_key,
+                "thumb_upload_url": thumb_upload_url,
+                "deduplicated": False,
+            }
+        
+        hex_digest, b64_digest = normalize_sha256(sha256)
+        existing_key = self.repo.find_object_by_hash(hex_digest)
+        if existing_key:
+            return {
+                "s3_key": existing_key,
+                "upload_url": None,
+                "thumb_key": thumb_key,
+                "thumb_upload_url": thumb_upload_url,
+                "deduplicated": True,
+            }
         
         return {
             "s3_key": s3_key,
-            "upload_url": self.s3.presign_put(s3_key, content_type=content_type),
+            "upload_url": self.s3.presign_put(
+                s3_key, content_type=content_type, checksum_sha256=b64_digest
+            ),
             "thumb_key": thumb_key,
-            "thumb_upload_url": self.s3.presign_put(thumb_key, content_type="image/jpeg"),
+            "thumb_upload_url": thumb_upload_url,
+            "deduplicated": False,
         }
     
     def register_chapter(
@@ -126,14 +220,32 @@ class MangaService:
         s3_key: str,
         thumb_key: str = "",
         status: str = "pending_review",
+        sha256: Optional[str] = None,
     ) -> Chapter:
         """
         Register chapter metadata after upload.
         Status can be: pending_review, approved, rejected
+        
+        With `sha256`, a file already indexed under that hash is reused as
+        `pdf_path`. Otherwise `s3_key` is indexed for future uploads, once
+        S3 confirms the stored object has that checksum (InvalidChecksum if not).
         """
         if not self.repo.manga_exists(manga_id):
             raise KeyError("MANGA_NOT_FOUND")
         
+        if sha256 is not None:
+            hex_digest, b64_digest = normalize_sha256(sha256)
+            existing_key = self.repo.find_object_by_hash(hex_digest)
+            if existing_key:
+                s3_key = existing_key
+            else:
+                # El hash lo manda el cliente: solo se indexa si S3 guardó ese mismo checksum
+                if self.s3 is None:
+                    raise ValueError("S3 service not configured")
+                if self.s3.object_checksum(s3_key) != b64_digest:
+                    raise InvalidChecksum("CHECKSUM_MISMATCH")
+                s3_key = self.repo.save_object_hash(hex_digest, s3_key)
+        
         chapter = Chapter(
             id=f"{manga_id}-ch{chapter_number}",
             manga_id=manga_id,
@@ -145,6 +257,75 @@ class MangaService:
         
         return self.repo.create_chapter(chapter)
 
+    def register_chapters(
+        self,
+        manga_id: str,
+        items: List[Dict[str, Any]],
+    ) -> List[ChapterWriteResult]:
+        """
+        Register many chapters of one manga in a single pass.
+        Each item has chapter_number, title, s3_key and optional thumb_key.
+        The parent manga is read once; duplicate numbers inside the request
+        are reported per item instead of failing the whole batch.
+        """
+        if len(items) > MAX_BATCH_CHAPTERS:
+            raise ValueError(f"Max {MAX_BATCH_CHAPTERS} chapters per batch")
+        manga = self.repo.get_manga(manga_id)
+        if manga is None:
+            raise KeyError("MANGA_NOT_FOUND")
+
+        results: List[Optional[ChapterWriteResult]] = []
+        chapters: List[Chapter] = []
+        seen = set()
+        for item in items:
+            number = int(item["chapter_number"])
+            chapter_id = f"{manga_id}-ch{number}"
+            if number in seen:
+                results.append(ChapterWriteResult(
+                    chapter_id=chapter_id,
+                    number=number,
+                    ok=False,
+                    error="DUPLICATE_CHAPTER_NUMBER",
+                ))
+                continue
+            seen.add(number)
+            chapters.append(Chapter(
+                id=chapter_id,
+                manga_id=manga_id,
+                number=number,
+                title=item.get("title", ""),
+                pdf_path=item["s3_key"],
+                thumb_path=item.get("thumb_key", ""),
+            ))
+            results.append(None)  # se rellena con el resultado del repo
+
+        if not chapters:
+            return results
+
+        # El repo sube latest_chapter con los capítulos que llegó a escribir
+        written = iter(self.repo.create_chapters(manga_id, chapters))
+        return [r if r is not None else next(written) for r in results]
+
+    # ---- Moderation ----
+
+    def list_chapters_for_review(
+        self,
+        status: str = "pending_review",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Chapter], Optional[str]]:
+        """Moderation queue page across all mangas, oldest first."""
+        return self.repo.list_chapters_by_status(status, limit=limit, cursor=cursor)
+
+    def moderate_chapters(
+        self,
+        decisions: List[Tuple[str, str, str]],
+    ) -> List[ChapterWriteResult]:
+        """Approve/reject chapters. Each decision is (manga_id, chapter_id, status)."""
+        if len(decisions) > MAX_BATCH_CHAPTERS:
+            raise ValueError(f"Max {MAX_BATCH_CHAPTERS} chapters per batch")
+        return self.repo.set_chapters_status(decisions)
+
     # Legacy method for compatibility
     def create_episode_with_presign(
         self, 
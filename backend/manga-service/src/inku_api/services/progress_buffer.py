@@ -0,0 +1,181 @@
+"""
+Write-behind buffer for reading progress.
+
+Readers report their position every few seconds. Reports are kept in memory
+keyed by (uid, manga_id), and a newer report replaces the older one. A
+background thread writes the pending entries to Firestore in batches every
+PROGRESS_FLUSH_INTERVAL seconds, sooner when PROGRESS_MAX_PENDING entries
+are waiting, and once more on shutdown. So each active reader costs one
+write per interval rather than one per report.
+
+Reads check the buffer (including an in-flight flush) before Firestore, so
+a user always sees their own latest report on this replica. Other replicas
+see it after the next flush.
+
+A flush that fails with a transient error keeps its entries for the next
+one. Any other error is retried entry by entry and the entries that still
+fail are dropped, so one bad document cannot block the buffer. While
+Firestore is down, new (uid, manga) keys are refused once the buffer holds
+PROGRESS_MAX_BUFFERED entries.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from ..domain import ReadingProgress
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "60"))
+PROGRESS_MAX_PENDING = int(os.getenv("PROGRESS_MAX_PENDING", "5000"))
+PROGRESS_MAX_BUFFERED = int(os.getenv("PROGRESS_MAX_BUFFERED", str(PROGRESS_MAX_PENDING * 4)))
+
+# Persists (uid, progress) pairs, e.g. FirestoreMangaRepo.save_progress
+Saver = Callable[[List[Tuple[str, ReadingProgress]]], None]
+# Errors worth retrying on the next flush, e.g. repo_firebase.TRANSIENT_ERRORS
+Transient = Tuple[Type[BaseException], ...]
+
+
+class ProgressBuffer:
+    """Latest progress per (uid, manga_id), flushed in batches."""
+
+    def __init__(
+        self,
+        interval: float = PROGRESS_FLUSH_INTERVAL,
+        max_pending: int = PROGRESS_MAX_PENDING,
+        max_buffered: int = PROGRESS_MAX_BUFFERED,
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self._pending: Dict[Tuple[str, str], ReadingProgress] = {}
+        self._flushing: Dict[Tuple[str, str], ReadingProgress] = {}
+        self.reports = 0
+        self.writes = 0
+        self.rejected = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, uid: str, progress: ReadingProgress) -> bool:
+        """Buffer a report. False if the buffer is full and this is a new key."""
+        key = (uid, progress.manga_id)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_buffered:
+                self.rejected += 1
+                return False
+            self._pending[key] = progress
+            self.reports += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+        return True
+
+    def get(self, uid: str, manga_id: str) -> Optional[ReadingProgress]:
+        key = (uid, manga_id)
+        with self._lock:
+            return self._pending.get(key) or self._flushing.get(key)
+
+    def pending_for(self, uid: str) -> List[ReadingProgress]:
+        """Buffered progress of one user (not yet in Firestore)."""
+        with self._lock:
+            merged = {**self._flushing, **self._pending}
+        return [p for (owner, _), p in merged.items() if owner == uid]
+
+    def flush(self, save: Saver, transient: Transient = ()) -> int:
+        """
+        Write everything pending. Returns the number of entries written.
+        Transient errors are raised after keeping the entries for the next
+        flush; other errors fall back to one save per entry.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                entries = [(uid, p) for (uid, _), p in self._flushing.items()]
+            if not entries:
+                return 0
+            try:
+                save(entries)
+                written = len(entries)
+            except transient:
+                self._requeue(self._flushing.items())
+                raise
+            except Exception as e:
+                logger.warning("Progress flush failed (%s), saving entries one by one", e)
+                written = self._save_each(save, transient)
+            with self._lock:
+                self._flushing = {}
+                self.writes += written
+            return written
+
+    def _save_each(self, save: Saver, transient: Transient) -> int:
+        written = 0
+        retry = []
+        for key, progress in self._flushing.items():
+            try:
+                save([(key[0], progress)])
+                written += 1
+            except transient:
+                retry.append((key, progress))
+            except Exception as e:
+                # Entrada envenenada: se descarta para no bloquear el resto
+                logger.error("Dropping progress %s/%s: %s", key[0], key[1], e)
+                with self._lock:
+                    self.dropped += 1
+        self._requeue(retry)
+        return written
+
+    def _requeue(self, items) -> None:
+        # Devolver al buffer lo no escrito, sin pisar reportes más nuevos
+        with self._lock:
+            for key, progress in items:
+                self._pending.setdefault(key, progress)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "reports": self.reports,
+                "writes": self.writes,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+            }
+
+    def _run(self, save: Saver, transient: Transient) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            stopping = self._stop.is_set()
+            try:
+                self.flush(save, transient)
+            except Exception as e:
+                logger.warning("Progress flush failed: %s", e)
+            if stopping:
+                return
+
+    def start(self, save: Saver, transient: Transient = ()) -> None:
+        """Flush in a background thread every `interval` seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(save, transient), name="progress-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop the thread after a final flush."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+progress_buffer = ProgressBuffer()
@@ -20,10 +20,12 @@ os.environ.setdefault("S3_BUCKET_NAME", "test-bucket")
 os.environ.setdefault("S3_PRESIGN_EXPIRES_SECONDS", "900")
 
 from inku_api.domain import Manga  # noqa: E402
+from inku_api.services.id_filter import MangaIdFilter  # noqa: E402
 from inku_api.services.manga_services import MangaService  # noqa: E402
+from inku_api.services.progress_buffer import ProgressBuffer  # noqa: E402
 from inku_api.adapters import repo_firebase as rf  # noqa: E402
 from inku_api.adapters import s3_presign as s3ps   # noqa: E402
-from inku_api.routers import mangas, uploads       # noqa: E402
+from inku_api.routers import events, mangas, progress, uploads  # noqa: E402
 
 
 # -------- Dobles de prueba --------
@@ -37,9 +39,15 @@ class InMemoryRepo:
     def list_mangas(self):
         return ["m1"]
 
+    def list_manga_ids(self):
+        return ["m1"]
+
     def get_manga(self, manga_id: str):
         return self._m1 if manga_id == "m1" else None
 
+    def manga_exists(self, manga_id: str):
+        return manga_id == "m1"
+
     def list_episodes(self, manga_id: str):
         return []
 
@@ -49,6 +57,12 @@ class InMemoryRepo:
     def get_episode_by_number(self, manga_id: str, number: int):
         return None
 
+    def get_progress(self, uid: str, manga_id: str):
+        return None
+
+    def list_progress(self, uid: str, limit: int = 50):
+        return []
+
 
 class FakeS3:
     def presign_put(self, key: str, content_type: str, expires: int = 900) -> str:
@@ -59,7 +73,17 @@ class FakeS3:
 
 
 @pytest.fixture
-def app_client(monkeypatch):
+def id_filter():
+    return MangaIdFilter(ttl=3600)
+
+
+@pytest.fixture
+def progress_buffer():
+    return ProgressBuffer(interval=3600)
+
+
+@pytest.fixture
+def app_client(monkeypatch, id_filter, progress_buffer):
     # Evitar tocar Firebase/S3 reales
     monkeypatch.setattr(rf, "FirestoreMangaRepo", InMemoryRepo, raising=True)
     monkeypatch.setattr(s3ps, "Boto3S3Presign", FakeS3, raising=True)
@@ -80,10 +104,12 @@ def app_client(monkeypatch):
     app = create_app()
 
     def _fake_service():
-        return MangaService(repo=InMemoryRepo(), s3=FakeS3())
+        return MangaService(repo=InMemoryRepo(), s3=FakeS3(), id_filter=id_filter, progress=progress_buffer)
 
     # Overrides explícitos por si el router usa Depends(get_service)
     app.dependency_overrides[getattr(mangas, "get_service")] = _fake_service
     app.dependency_overrides[getattr(uploads, "get_service")] = _fake_service
+    app.dependency_overrides[getattr(progress, "get_service")] = _fake_service
+    app.dependency_overrides[getattr(events, "get_service")] = _fake_service
 
     return TestClient(app)
@@ -0,0 +1,122 @@
+# src/test/test_events.py
+import asyncio
+import ipaddress
+from types import SimpleNamespace
+
+from shared.auth import get_moderator_user, get_optional_user_async
+from inku_api.domain import ReaderEvent
+from inku_api.routers import events
+from inku_api.services import event_ingest as ingest
+from inku_api.services.event_ingest import EventIngest
+
+
+def _event(type_="view", chapter="c1"):
+    return ReaderEvent(type=type_, manga_id="m1", chapter_id=chapter)
+
+
+def test_full_queue_sheds_load():
+    queue = EventIngest(max_queue=2, interval=3600)
+
+    assert queue.offer([_event(), _event(), _event()]) == (2, 1)
+    assert queue.stats()["queue_depth"] == 2
+    assert queue.stats()["dropped"] == 1
+
+
+def test_client_limit_caps_each_client():
+    queue = EventIngest(max_queue=100, interval=3600, client_limit=3)
+
+    assert queue.admit("ip:1.2.3.4", 2) == 2
+    assert queue.admit("ip:1.2.3.4", 2) == 1
+    assert queue.admit("uid:u1", 2) == 2
+    assert queue.stats()["rate_limited"] == 1
+
+
+def test_events_are_aggregated_per_chapter_and_flushed_once():
+    async def scenario():
+        queue = EventIngest(max_queue=100, interval=3600)
+        saved = []
+        queue.start(saved.append)
+        queue.offer([_event(), _event(), _event("page"), _event("complete", chapter="c2")])
+        await asyncio.sleep(0)
+        await queue.stop(saved.append)
+        return queue, saved
+
+    queue, saved = asyncio.run(scenario())
+
+    assert saved == [{("m1", "c1"): {"views": 2, "pages": 1}, ("m1", "c2"): {"completions": 1}}]
+    assert queue.stats()["flushed"] == 2
+
+
+def test_failed_flush_keeps_counts():
+    def failing(counts):
+        raise RuntimeError("firestore down")
+
+    async def scenario():
+        queue = EventIngest(max_queue=10, interval=3600)
+        queue.offer([_event()])
+        queue._drain()
+        try:
+            await queue.flush(failing)
+        except RuntimeError:
+            pass
+        queue.offer([_event()])
+        queue._drain()
+        saved = []
+        await queue.flush(saved.append)
+        return saved
+
+    assert asyncio.run(scenario()) == [{("m1", "c1"): {"views": 2}}]
+
+
+def test_post_events_validates_whole_array(app_client, monkeypatch):
+    monkeypatch.setattr(ingest, "event_ingest", EventIngest(max_queue=1, interval=3600))
+    app_client.app.dependency_overrides[get_moderator_user] = lambda: {"uid": "mod", "moderator": True}
+
+    body = [{"type": "view", "manga_id": "m1", "chapter_id": "c1"},
+            {"type": "page", "manga_id": "m1", "chapter_id": "c1", "page": 3}]
+    r = app_client.post("/api/events", json=body)
+    assert r.status_code == 202
+    assert r.json() == {"accepted": 1, "dropped": 1}
+    assert app_client.get("/api/events/stats").json()["queue_depth"] == 1
+
+    bad = app_client.post("/api/events", json=[{"type": "like", "manga_id": "m1", "chapter_id": "c1"}])
+    assert bad.status_code == 422
+    assert app_client.post("/api/events", json=[{"type": "view", "manga_id": "..", "chapter_id": "c"}]).status_code == 422
+
+
+def test_stats_require_moderator(app_client):
+    assert app_client.get("/api/events/stats").status_code in (401, 403)
+
+
+def test_anonymous_clients_are_limited_by_real_ip(app_client, monkeypatch):
+    monkeypatch.setattr(ingest, "event_ingest", EventIngest(max_queue=100, interval=3600, client_limit=1))
+    # El peer de TestClient ("testclient") hace de nginx
+    monkeypatch.setattr(events, "_is_trusted_proxy", lambda host: True)
+    app_client.app.dependency_overrides[get_optional_user_async] = lambda: None
+    body = [{"type": "view", "manga_id": "m1", "chapter_id": "c1"}]
+
+    assert app_client.post("/api/events", json=body, headers={"X-Real-IP": "1.1.1.1"}).json()["accepted"] == 1
+    assert app_client.post("/api/events", json=body, headers={"X-Real-IP": "1.1.1.1"}).json()["accepted"] == 0
+    assert app_client.post("/api/events", json=body, headers={"X-Real-IP": "2.2.2.2"}).json()["accepted"] == 1
+
+
+def test_real_ip_only_trusted_from_configured_proxies(monkeypatch):
+    monkeypatch.setattr(ingest, "EVENTS_TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+
+    def request(peer):
+        return SimpleNamespace(client=SimpleNamespace(host=peer), headers={"x-real-ip": "1.1.1.1"})
+
+    assert events._client_ip(request("10.0.0.5")) == "1.1.1.1"
+    assert events._client_ip(request("203.0.113.7")) == "203.0.113.7"
+
+
+def test_events_for_unknown_mangas_are_dropped(app_client, monkeypatch):
+    monkeypatch.setattr(ingest, "event_ingest", EventIngest(max_queue=100, interval=3600))
+    body = [{"type": "view", "manga_id": "m1", "chapter_id": "c1"},
+            {"type": "view", "manga_id": "junk-1", "chapter_id": "c1"},
+            {"type": "view", "manga_id": "junk-2", "chapter_id": "c1"}]
+
+    r = app_client.post("/api/events", json=body)
+
+    assert r.json() == {"accepted": 1, "dropped": 2}
+    assert ingest.event_ingest.stats()["unknown"] == 2
@@ -79,13 +79,14 @@ class TestFirestoreMangaRepo(unittest.TestCase):
                .document.return_value
                .collection.return_value)
         
-        # Simulamos éxito al ordenar
-        col.order_by.return_value.stream.return_value = [mock_doc]
+        # Simulamos éxito al ordenar (sobre el filtro status == approved)
+        col.where.return_value.order_by.return_value.stream.return_value = [mock_doc]
 
         results = list(self.repo.list_chapters("m1"))
 
         self.assertEqual(len(results), 1)
         MockChapterClass.assert_called() # Se instanció un capitulo
+        col.where.assert_called_once_with("status", "==", "approved")
 
     # -------------------------------------------------------------------------
     # TEST 4: Fallback (Error en order_by)
@@ -96,19 +97,21 @@ class TestFirestoreMangaRepo(unittest.TestCase):
                .document.return_value
                .collection.return_value)
 
+        query = col.where.return_value
+
         # Simulamos que Firestore falla al ordenar (falta índice)
-        col.order_by.side_effect = Exception("Falta índice compuesto")
+        query.order_by.side_effect = Exception("Falta índice compuesto")
         
         # Simulamos respuesta en el fallback (stream directo)
         mock_doc = MagicMock()
         mock_doc.id = "ch_1"
         mock_doc.to_dict.return_value = {"number": 1, "manga_id": "m1"}
-        col.stream.return_value = [mock_doc]
+        query.stream.return_value = [mock_doc]
 
         results = list(self.repo.list_chapters("m1"))
 
         self.assertEqual(len(results), 1)
-        col.stream.assert_called() # Verifica que usó el plan B (sin ordenar)
+        query.stream.assert_called() # Verifica que usó el plan B (sin ordenar)
 
     # -------------------------------------------------------------------------
     # TEST 5: Obtener Capítulo por ID
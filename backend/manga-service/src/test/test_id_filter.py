@@ -0,0 +1,26 @@
+# src/test/test_id_filter.py
+from shared.bloom import BloomFilter
+
+from inku_api.services.id_filter import MangaIdFilter
+
+
+def test_id_filter_snapshot_and_etag(app_client):
+    r = app_client.get("/api/mangas:id-filter")
+    assert r.status_code == 200
+    bloom = BloomFilter.from_bytes(r.content)
+    assert "m1" in bloom
+    assert "not-a-manga" not in bloom
+
+    again = app_client.get("/api/mangas:id-filter", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_id_filter_includes_new_mangas_without_rebuild():
+    id_filter = MangaIdFilter(ttl=3600)
+    body, etag = id_filter.snapshot(lambda: ["m1"])
+
+    id_filter.add("m2")
+    new_body, new_etag = id_filter.snapshot(lambda: [])
+
+    assert new_etag != etag
+    assert "m2" in BloomFilter.from_bytes(new_body)
@@ -0,0 +1,148 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from inku_api import importer
+from inku_api.domain import Manga
+
+
+class InMemorySink:
+    """Fake MangaSink: stores mangas by id and skips existing ones."""
+
+    def __init__(self, existing=(), failing=()):
+        self.docs = {m: None for m in existing}
+        self.failing = set(failing)
+        self._pending = []
+        self.flushes = 0
+
+    def write(self, mangas):
+        self._pending.extend(mangas)
+
+    def flush(self):
+        imported = skipped = failed = 0
+        for m in self._pending:
+            if m.id in self.failing:
+                failed += 1
+            elif m.id in self.docs:
+                skipped += 1
+            else:
+                self.docs[m.id] = m
+                imported += 1
+        self._pending = []
+        self.flushes += 1
+        return imported, skipped, failed
+
+    def close(self):
+        pass
+
+
+def _rows(n, start=0):
+    return [{"id": f"m{i}", "title": f"Manga {i}", "tags": "a, b"} for i in range(start, start + n)]
+
+
+def test_run_import_batches_and_skips_existing():
+    sink = InMemorySink(existing=["m0"])
+
+    stats = importer.run_import(_rows(25), sink, batch_size=10)
+
+    assert sink.flushes == 3
+    assert (stats.read, stats.imported, stats.skipped) == (25, 24, 1)
+    assert sink.docs["m3"].tags == ["a", "b"]
+
+
+def test_run_import_reports_invalid_rows():
+    rows = _rows(3) + [{"title": "no id"}]
+    stats = importer.run_import(rows, InMemorySink(), batch_size=10)
+    assert stats.invalid == 1
+    assert stats.imported == 3
+
+
+def test_run_import_resumes_from_checkpoint(tmp_path):
+    ckpt = tmp_path / "import.ckpt"
+    importer.save_checkpoint(str(ckpt), 20)
+    sink = InMemorySink()
+
+    stats = importer.run_import(_rows(25), sink, batch_size=10, checkpoint=str(ckpt))
+
+    assert stats.read == 5
+    assert sorted(sink.docs) == [f"m{i}" for i in range(20, 25)]
+    assert json.loads(ckpt.read_text())["offset"] == 25
+
+
+def test_checkpoint_stays_before_failed_batch(tmp_path):
+    ckpt = tmp_path / "import.ckpt"
+    sink = InMemorySink(failing=["m12"])
+
+    stats = importer.run_import(_rows(30), sink, batch_size=10, checkpoint=str(ckpt))
+
+    assert (stats.imported, stats.failed) == (29, 1)
+    assert json.loads(ckpt.read_text())["offset"] == 10
+
+    # Al reanudar se reintenta desde el batch con el fallo
+    sink.failing.clear()
+    stats = importer.run_import(_rows(30), sink, batch_size=10, checkpoint=str(ckpt))
+    assert (stats.read, stats.imported, stats.skipped) == (20, 1, 19)
+    assert json.loads(ckpt.read_text())["offset"] == 30
+
+
+def test_dry_run_writes_nothing(tmp_path, monkeypatch):
+    src = tmp_path / "catalog.jsonl"
+    src.write_text("\n".join(json.dumps(r) for r in _rows(5)))
+    ckpt = tmp_path / "import.ckpt"
+
+    def no_writes(*args, **kwargs):
+        raise AssertionError("dry run opened a writer")
+
+    monkeypatch.setattr(importer, "BulkWriterSink", no_writes)
+
+    assert importer.main([str(src), "--dry-run", "--checkpoint", str(ckpt)]) == 0
+    assert not ckpt.exists()
+
+
+def _failure(code, attempts, doc_id="m1"):
+    return SimpleNamespace(
+        code=code, attempts=attempts, message="boom",
+        operation=SimpleNamespace(reference=SimpleNamespace(id=doc_id)),
+    )
+
+
+@pytest.fixture
+def bulk_sink():
+    """BulkWriterSink over a mocked BulkWriter; flush() replays scripted callbacks."""
+    db = MagicMock()
+    writer = db.bulk_writer.return_value
+    sink = importer.BulkWriterSink(db, max_ops_per_second=100)
+    on_result = writer.on_write_result.call_args.args[0]
+    on_error = writer.on_write_error.call_args.args[0]
+    return sink, writer, on_result, on_error
+
+
+def test_bulk_writer_sink_counts_callbacks(bulk_sink):
+    sink, writer, on_result, on_error = bulk_sink
+    retries = []
+
+    def flush():
+        on_result(MagicMock(), MagicMock(), writer)
+        on_error(_failure(importer._GRPC_ALREADY_EXISTS, 1), writer)
+        retries.append(on_error(_failure(14, 1), writer))
+        retries.append(on_error(_failure(14, importer._MAX_WRITE_ATTEMPTS), writer))
+
+    writer.flush.side_effect = flush
+    sink.write([Manga(id="m1", title="One"), Manga(id="m2", title="Two")])
+
+    assert writer.create.call_count == 2
+    assert sink.flush() == (1, 1, 1)
+    assert retries == [True, False]
+    # Los contadores se reinician en cada flush
+    writer.flush.side_effect = None
+    assert sink.flush() == (0, 0, 0)
+
+
+def test_iter_rows_csv(tmp_path):
+    src = tmp_path / "catalog.csv"
+    src.write_text("id,title,tags\nm1,One,\"x, y\"\n")
+    mangas, errors = importer.validate_batch(list(importer.iter_rows(str(src))))
+    assert errors == []
+    assert mangas == [Manga(id="m1", title="One", tags=["x", "y"])]
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from inku_api.adapters import repo_firebase as rf
+from inku_api.adapters.repo_firebase import FirestoreMangaRepo
+
+
+def _snap(path, exists=True, data=None):
+    snap = MagicMock()
+    snap.exists = exists
+    snap.reference.path = path
+    snap.to_dict.return_value = data or {}
+    return snap
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+    cursor = rf._encode_cursor(ts, "mangas/m1/chapters/c1")
+    assert rf._decode_cursor(cursor) == (ts, "mangas/m1/chapters/c1")
+    with pytest.raises(ValueError):
+        rf._decode_cursor("not-a-cursor")
+
+
+def test_review_queue_uses_collection_group_and_returns_cursor():
+    db = MagicMock()
+    query = (db.collection_group.return_value.where.return_value
+             .order_by.return_value.order_by.return_value.limit.return_value)
+    doc = MagicMock()
+    doc.id = "m1-ch1"
+    doc.to_dict.return_value = {"number": 1, "manga_id": "m1"}
+    doc.get.return_value = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    doc.reference.path = "mangas/m1/chapters/m1-ch1"
+    query.stream.return_value = [doc]
+
+    chapters, cursor = FirestoreMangaRepo(db).list_chapters_by_status("pending_review", limit=1)
+
+    db.collection_group.assert_called_once_with("chapters")
+    db.collection_group.return_value.where.assert_called_once_with("status", "==", "pending_review")
+    assert [c.id for c in chapters] == ["m1-ch1"]
+    assert rf._decode_cursor(cursor)[1] == "mangas/m1/chapters/m1-ch1"
+
+
+def test_set_chapters_status_reports_missing_in_order():
+    db = MagicMock()
+    col = db.collection.return_value.document.return_value.collection.return_value
+    col.document.side_effect = lambda cid: MagicMock(path=f"mangas/m1/chapters/{cid}")
+    db.get_all.return_value = [
+        _snap("mangas/m1/chapters/a", data={"number": 1}),
+        _snap("mangas/m1/chapters/b", exists=False),
+        _snap("mangas/m1/chapters/c", data={"number": 3}),
+    ]
+
+    results = FirestoreMangaRepo(db).set_chapters_status([
+        ("m1", "a", "approved"), ("m1", "b", "approved"), ("m1", "c", "rejected"),
+    ])
+
+    assert [(r.chapter_id, r.ok, r.error) for r in results] == [
+        ("a", True, None), ("b", False, "CHAPTER_NOT_FOUND"), ("c", True, None),
+    ]
+    assert db.batch.return_value.update.call_count == 2
+    db.batch.return_value.commit.assert_called_once()
+
+
+def test_backfill_sets_missing_status_and_created_at():
+    db = MagicMock()
+    created = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    legacy = _snap("mangas/m1/chapters/c1", data={"number": 1})
+    legacy.create_time = created
+    no_date = _snap("mangas/m1/chapters/c2", data={"number": 2, "status": "approved"})
+    no_date.create_time = created
+    done = _snap("mangas/m1/chapters/c3", data={"status": "approved", "created_at": created})
+    db.collection_group.return_value.stream.return_value = [legacy, no_date, done]
+
+    assert FirestoreMangaRepo(db).backfill_chapter_status() == 2
+
+    updates = [c.args[1] for c in db.batch.return_value.update.call_args_list]
+    assert updates == [{"status": "approved", "created_at": created}, {"created_at": created}]
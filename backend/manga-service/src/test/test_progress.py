@@ -0,0 +1,118 @@
+# src/test/test_progress.py
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared.auth import get_current_user_async
+from inku_api.adapters.repo_firebase import FirestoreMangaRepo
+from inku_api.domain import ReadingProgress
+from inku_api.services.progress_buffer import ProgressBuffer
+
+
+def _progress(manga_id="m1", page=0, minutes=0):
+    at = datetime(2025, 6, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+    return ReadingProgress(manga_id=manga_id, chapter_number=1, page=page, updated_at=at)
+
+
+def test_buffer_keeps_latest_report_and_flushes_once():
+    buffer = ProgressBuffer(interval=3600)
+    for page in range(20):
+        buffer.put("u1", _progress(page=page))
+    buffer.put("u1", _progress("m2"))
+
+    saved = []
+    assert buffer.flush(saved.extend) == 2
+    assert sorted((uid, p.manga_id, p.page) for uid, p in saved) == [("u1", "m1", 19), ("u1", "m2", 0)]
+    assert buffer.stats() == {"pending": 0, "reports": 21, "writes": 2, "rejected": 0, "dropped": 0}
+    assert buffer.flush(saved.extend) == 0
+
+
+def test_failed_flush_keeps_entries_without_overwriting_newer():
+    buffer = ProgressBuffer(interval=3600)
+    buffer.put("u1", _progress(page=1))
+
+    def failing_save(entries):
+        buffer.put("u1", _progress(page=2))  # llega un reporte durante el flush
+        raise RuntimeError("firestore down")
+
+    with pytest.raises(RuntimeError):
+        buffer.flush(failing_save, transient=(RuntimeError,))
+    assert buffer.get("u1", "m1").page == 2
+
+
+def test_non_transient_failure_drops_only_the_bad_entry():
+    buffer = ProgressBuffer(interval=3600)
+    buffer.put("u1", _progress("m1"))
+    buffer.put("u1", _progress("bad"))
+    saved = []
+
+    def save(entries):
+        if any(p.manga_id == "bad" for _, p in entries):
+            raise ValueError("invalid document")
+        saved.extend(entries)
+
+    assert buffer.flush(save, transient=(RuntimeError,)) == 1
+    assert [p.manga_id for _, p in saved] == ["m1"]
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["pending"] == 0
+
+
+def test_full_buffer_refuses_new_keys():
+    buffer = ProgressBuffer(interval=3600, max_buffered=1)
+
+    assert buffer.put("u1", _progress("m1"))
+    assert buffer.put("u1", _progress("m1", page=5))  # misma clave: se reemplaza
+    assert not buffer.put("u1", _progress("m2"))
+    assert buffer.stats()["rejected"] == 1
+
+
+def test_stop_flushes_pending_progress():
+    buffer = ProgressBuffer(interval=3600)
+    saved = []
+    buffer.start(saved.extend)
+    buffer.put("u1", _progress())
+
+    buffer.stop()
+
+    assert [p.manga_id for _, p in saved] == ["m1"]
+
+
+def test_reader_sees_own_report_before_flush(app_client):
+    app_client.app.dependency_overrides[get_current_user_async] = lambda: {"uid": "u1"}
+
+    r = app_client.put("/api/progress/m1", json={"chapter_number": 3, "page": 12})
+    assert r.status_code == 200
+
+    r = app_client.get("/api/progress/m1")
+    assert r.status_code == 200
+    assert (r.json()["chapter_number"], r.json()["page"]) == (3, 12)
+    assert [p["manga_id"] for p in app_client.get("/api/progress").json()["items"]] == ["m1"]
+    assert app_client.get("/api/progress/m2").status_code == 404
+
+
+def test_report_rejects_unknown_or_reserved_manga(app_client, progress_buffer):
+    app_client.app.dependency_overrides[get_current_user_async] = lambda: {"uid": "u1"}
+
+    assert app_client.put("/api/progress/nope", json={"chapter_number": 1}).status_code == 404
+    assert app_client.put("/api/progress/__name__", json={"chapter_number": 1}).status_code == 422
+    assert app_client.put("/api/progress/" + "x" * 201, json={"chapter_number": 1}).status_code == 422
+    assert progress_buffer.stats()["pending"] == 0
+
+
+def test_save_progress_never_overwrites_newer_progress():
+    db = MagicMock()
+    mangas = db.collection.return_value.document.return_value.collection.return_value
+    mangas.document.side_effect = lambda mid: MagicMock(path=f"reading_progress/u1/mangas/{mid}")
+    newer = MagicMock(exists=True, reference=MagicMock(path="reading_progress/u1/mangas/m1"))
+    newer.to_dict.return_value = {"updated_at": _progress(minutes=10).updated_at}
+    missing = MagicMock(exists=False, reference=MagicMock(path="reading_progress/u1/mangas/m2"))
+    db.get_all.return_value = [newer, missing]
+
+    FirestoreMangaRepo(db).save_progress([("u1", _progress("m1")), ("u1", _progress("m2"))])
+
+    batch = db.batch.return_value
+    batch.update.assert_not_called()
+    assert [c.args[1]["manga_id"] for c in batch.create.call_args_list] == ["m2"]
+    batch.commit.assert_called_once()
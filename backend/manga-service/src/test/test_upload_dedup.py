@@ -0,0 +1,94 @@
+import base64
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+
+from inku_api.services.manga_services import InvalidChecksum, MangaService, normalize_sha256
+
+DIGEST = hashlib.sha256(b"chapter pdf").digest()
+HEX = DIGEST.hex()
+B64 = base64.b64encode(DIGEST).decode()
+
+
+def _svc(existing_key=None, stored_checksum=B64):
+    repo = MagicMock()
+    repo.manga_exists.return_value = True
+    repo.find_object_by_hash.return_value = existing_key
+    repo.save_object_hash.side_effect = lambda sha, key: key
+    repo.create_chapter.side_effect = lambda chapter: chapter
+    s3 = MagicMock()
+    s3.object_checksum.return_value = stored_checksum
+    return MangaService(repo=repo, s3=s3), repo
+
+
+def test_normalize_sha256_accepts_hex_and_base64():
+    assert normalize_sha256(HEX) == (HEX, B64)
+    assert normalize_sha256(B64) == (HEX, B64)
+    with pytest.raises(InvalidChecksum):
+        normalize_sha256("00" * 31)
+
+
+def test_presign_signs_checksum_for_new_file():
+    svc, repo = _svc()
+    urls = svc.create_upload_urls("m1", 3, sha256=HEX)
+
+    assert urls["deduplicated"] is False
+    assert urls["s3_key"] == "chapters/m1/3.pdf"
+    svc.s3.presign_put.assert_any_call(
+        "chapters/m1/3.pdf", content_type="application/pdf", checksum_sha256=B64
+    )
+
+
+def test_presign_skips_upload_for_known_hash():
+    svc, repo = _svc(existing_key="chapters/other/1.pdf")
+    urls = svc.create_upload_urls("m1", 3, sha256=B64)
+
+    repo.find_object_by_hash.assert_called_once_with(HEX)
+    assert urls["deduplicated"] is True
+    assert urls["upload_url"] is None
+    assert urls["s3_key"] == "chapters/other/1.pdf"
+
+
+def test_register_points_to_existing_object():
+    svc, repo = _svc(existing_key="chapters/other/1.pdf")
+    chapter = svc.register_chapter("m1", 3, "t", s3_key="chapters/m1/3.pdf", sha256=HEX)
+
+    assert chapter.pdf_path == "chapters/other/1.pdf"
+    repo.save_object_hash.assert_not_called()
+
+
+def test_register_indexes_new_object():
+    svc, repo = _svc()
+    chapter = svc.register_chapter("m1", 3, "t", s3_key="chapters/m1/3.pdf", sha256=HEX)
+
+    assert chapter.pdf_path == "chapters/m1/3.pdf"
+    repo.save_object_hash.assert_called_once_with(HEX, "chapters/m1/3.pdf")
+    svc.s3.object_checksum.assert_called_once_with("chapters/m1/3.pdf")
+
+
+@pytest.mark.parametrize("stored", [None, base64.b64encode(b"x" * 32).decode()])
+def test_register_rejects_unverified_hash(stored):
+    svc, repo = _svc(stored_checksum=stored)
+
+    with pytest.raises(InvalidChecksum, match="CHECKSUM_MISMATCH"):
+        svc.register_chapter("m1", 3, "t", s3_key="chapters/other/1.pdf", sha256=HEX)
+    repo.save_object_hash.assert_not_called()
+    repo.create_chapter.assert_not_called()
+
+
+def test_register_route_maps_checksum_and_config_errors(app_client):
+    from shared.auth import get_current_user_async
+    from inku_api.routers import uploads
+
+    app_client.app.dependency_overrides[get_current_user_async] = lambda: {"uid": "u1"}
+    body = {"manga_id": "m1", "chapter_number": 3, "s3_key": "chapters/m1/3.pdf", "sha256": HEX}
+
+    svc, _ = _svc(stored_checksum=None)
+    app_client.app.dependency_overrides[uploads.get_service] = lambda: svc
+    r = app_client.post("/api/uploads/register", json=body)
+    assert (r.status_code, r.json()["detail"]) == (400, "CHECKSUM_MISMATCH")
+
+    # Sin S3 configurado es un fallo del servidor, no del cliente
+    svc.s3 = None
+    assert app_client.post("/api/uploads/register", json=body).status_code == 500
@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from inku_api.adapters import repo_firebase as rf
+from inku_api.adapters.repo_firebase import FirestoreMangaRepo
+from inku_api.domain import Chapter, Manga
+from inku_api.services.manga_services import MangaService
+
+
+def _chapter(n: int) -> Chapter:
+    return Chapter(id=f"m1-ch{n}", manga_id="m1", number=n, pdf_path=f"chapters/m1/{n}.pdf")
+
+
+def _db(latest=10):
+    db = MagicMock()
+    manga_ref = db.collection.return_value.document.return_value
+    manga_ref.get.return_value.exists = True
+    manga_ref.get.return_value.to_dict.return_value = {"latest_chapter": latest}
+    return db, manga_ref
+
+
+def test_create_chapters_chunks_batches():
+    db, manga_ref = _db()
+    repo = FirestoreMangaRepo(db)
+
+    results = repo.create_chapters("m1", [_chapter(n) for n in range(1, 1001)])
+
+    assert len(results) == 1000
+    assert all(r.ok for r in results)
+    assert db.batch.call_count == 2
+    assert db.batch.return_value.commit.call_count == 2
+    assert manga_ref.update.call_args.args[0]["latest_chapter"] == 1000
+
+
+def test_create_chapters_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(rf.time, "sleep", lambda s: None)
+    db = MagicMock()
+    db.batch.return_value.commit.side_effect = [rf.gexc.Aborted("contention"), None]
+    repo = FirestoreMangaRepo(db)
+
+    results = repo.create_chapters("m1", [_chapter(1), _chapter(2)])
+
+    assert [r.ok for r in results] == [True, True]
+    assert db.batch.return_value.commit.call_count == 2
+
+
+def test_create_chapters_reports_failed_chunk(monkeypatch):
+    monkeypatch.setattr(rf.time, "sleep", lambda s: None)
+    db = MagicMock()
+    db.batch.return_value.commit.side_effect = rf.gexc.ServiceUnavailable("down")
+    repo = FirestoreMangaRepo(db)
+
+    results = repo.create_chapters("m1", [_chapter(1)])
+
+    assert results[0].ok is False
+    assert results[0].error == "WRITE_FAILED"
+
+
+def test_create_chapters_latest_ignores_failed_chunk():
+    db, manga_ref = _db()
+    batches = [MagicMock(), MagicMock(), MagicMock()]
+    db.batch.side_effect = batches
+    batches[1].commit.side_effect = rf.gexc.PermissionDenied("denied")
+    repo = FirestoreMangaRepo(db)
+
+    # 1-500 | 1000-1499 (falla) | 501-502
+    numbers = [*range(1, 501), *range(1000, 1500), 501, 502]
+    results = repo.create_chapters("m1", [_chapter(n) for n in numbers])
+
+    assert [r.ok for r in results].count(False) == 500
+    assert manga_ref.update.call_args.args[0]["latest_chapter"] == 502
+
+
+def test_latest_chapter_is_never_lowered():
+    db, manga_ref = _db(latest=20)
+    repo = FirestoreMangaRepo(db)
+
+    repo.create_chapters("m1", [_chapter(n) for n in range(1, 11)])
+
+    manga_ref.update.assert_not_called()
+
+
+def test_latest_chapter_retries_lost_race():
+    db, manga_ref = _db()
+    manga_ref.update.side_effect = [rf.gexc.FailedPrecondition("stale"), None]
+    repo = FirestoreMangaRepo(db)
+
+    repo.create_chapter(_chapter(12))
+
+    assert manga_ref.update.call_count == 2
+    # Cada intento lleva la precondición de la lectura
+    assert manga_ref.update.call_args.kwargs["option"] is db.write_option.return_value
+    db.write_option.assert_called_with(last_update_time=manga_ref.get.return_value.update_time)
+
+
+def test_register_chapters_validates_manga_once_and_flags_duplicates():
+    repo = MagicMock()
+    repo.get_manga.return_value = Manga(id="m1", latest_chapter=7)
+    repo.create_chapters.side_effect = lambda manga_id, chapters: [
+        rf.ChapterWriteResult(chapter_id=c.id, number=c.number) for c in chapters
+    ]
+    svc = MangaService(repo=repo)
+
+    results = svc.register_chapters("m1", [
+        {"chapter_number": 3, "s3_key": "a.pdf"},
+        {"chapter_number": 3, "s3_key": "b.pdf"},
+        {"chapter_number": 5, "s3_key": "c.pdf"},
+    ])
+
+    repo.get_manga.assert_called_once_with("m1")
+    assert [(r.number, r.ok, r.error) for r in results] == [
+        (3, True, None),
+        (3, False, "DUPLICATE_CHAPTER_NUMBER"),
+        (5, True, None),
+    ]
+
+
+def test_register_chapters_unknown_manga():
+    repo = MagicMock()
+    repo.get_manga.return_value = None
+    with pytest.raises(KeyError):
+        MangaService(repo=repo).register_chapters("nope", [{"chapter_number": 1, "s3_key": "x"}])
@@ -4,6 +4,7 @@ Shared Firebase Authentication Module
 Provides consistent Firebase token validation across all backend services.
 Usage:
     from shared.auth import init_firebase, get_current_user
+    from shared.auth import get_current_user_async  # async routes / no threadpool hop
 
 Convention:
     - Header: Authorization: Bearer <Firebase idToken>
@@ -11,9 +12,11 @@ Convention:
     - 403: Token valid but insufficient permissions
 """
 from __future__ import annotations
+import asyncio
 import os
 import logging
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -21,11 +24,35 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
 
+import jwt
+
+from .google_keys import Fetcher, KeySet, verify_firebase_jwt
+from .metrics import register_cache, register_executor
+from .tracing import span
+from .token_cache import TokenCache, cache_from_env, token_key
+
 logger = logging.getLogger(__name__)
 
 # Global Firebase app instance
 _firebase_app: Optional[firebase_admin.App] = None
 
+# Verified token claims, evicted at each token's `exp`
+_token_cache: TokenCache = cache_from_env()
+
+# Google signing keys for local ID token verification
+_key_set: KeySet = KeySet()
+
+# Dedicated pool for CPU-bound verification from async dependencies
+_verify_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AUTH_VERIFY_WORKERS", "4")),
+    thread_name_prefix="auth-verify",
+)
+register_cache("firebase_tokens", lambda: _token_cache.stats())
+register_executor("auth-verify", _verify_executor)
+
+# Verifications in progress: (loop id, token hash, check_revoked) -> future
+_inflight: Dict[Tuple[int, str, bool], "asyncio.Future[Dict[str, Any]]"] = {}
+
 # Bearer token extractor
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -79,6 +106,62 @@ def init_firebase(
         raise
 
 
+def start_key_refresh(fetcher: Optional[Fetcher] = None) -> None:
+    """
+    Load Google's signing keys now and keep them fresh in the background.
+    Call from each service's startup hook. `fetcher` replaces the HTTP fetch
+    (e.g. a local stub in tests and benchmarks).
+    """
+    global _key_set
+    if fetcher is not None:
+        _key_set.stop()
+        _key_set = KeySet(fetcher=fetcher)
+    _key_set.start()
+
+
+def _local_verification_enabled() -> bool:
+    # El emulador de Auth emite tokens sin firmar: se delega en firebase_admin
+    if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+        return False
+    return os.getenv("AUTH_LOCAL_VERIFY", "true").lower() not in ("0", "false", "no")
+
+
+def _project_id() -> Optional[str]:
+    if _firebase_app is not None and getattr(_firebase_app, "project_id", None):
+        return _firebase_app.project_id
+    return os.getenv("FIREBASE_PROJECT_ID") or os.getenv("GOOGLE_CLOUD_PROJECT")
+
+
+def _check_revoked(decoded: Dict[str, Any]) -> None:
+    """Same revocation rules as firebase_admin's check_revoked=True."""
+    user = firebase_auth.get_user(decoded["uid"], app=_firebase_app)
+    if user.disabled:
+        raise firebase_auth.UserDisabledError("The user record is disabled.")
+    valid_after = user.tokens_valid_after_timestamp  # ms
+    if valid_after and decoded["iat"] * 1000 < valid_after:
+        raise firebase_auth.RevokedIdTokenError("The Firebase ID token has been revoked.")
+
+
+def _decode_token(token: str, check_revoked: bool) -> Dict[str, Any]:
+    """Verify signature and claims locally with the managed key set."""
+    if not _local_verification_enabled():
+        return firebase_auth.verify_id_token(token, check_revoked=check_revoked)
+    
+    project_id = _project_id()
+    if not project_id:
+        raise ValueError("Firebase project ID unknown; set FIREBASE_PROJECT_ID")
+    try:
+        decoded = verify_firebase_jwt(token, project_id, _key_set)
+    except jwt.ExpiredSignatureError as e:
+        raise firebase_auth.ExpiredIdTokenError(str(e), e)
+    except jwt.InvalidTokenError as e:
+        raise firebase_auth.InvalidIdTokenError(str(e), e)
+    
+    if check_revoked:
+        _check_revoked(decoded)
+    return decoded
+
+
 def verify_firebase_token(
     token: str,
     check_revoked: bool = False,
@@ -86,9 +169,15 @@ def verify_firebase_token(
     """
     Verify a Firebase ID token.
     
+    Signatures are checked locally against Google keys kept fresh by
+    start_key_refresh() (AUTH_LOCAL_VERIFY=false falls back to firebase_admin).
+    Verified claims are cached until the token's `exp`, so repeated requests
+    with the same token skip signature verification. Cached entries older than
+    AUTH_REVOCATION_CHECK_INTERVAL are re-verified with a revocation check.
+    
     Args:
         token: The Firebase ID token to verify
-        check_revoked: Whether to check if token has been revoked
+        check_revoked: Whether to check if token has been revoked (bypasses cache)
     
     Returns:
         Decoded token claims (uid, email, etc.)
@@ -96,13 +185,29 @@ def verify_firebase_token(
     Raises:
         HTTPException: 401 if token is invalid or expired
     """
+    with span("firebase.verify_token") as verify_span:
+        stale = False
+        if not check_revoked:
+            cached, stale = _token_cache.get(token)
+            if cached is not None and not stale:
+                if verify_span is not None:
+                    verify_span.set_attribute("auth.cache_hit", True)
+                return cached
+        
+        return _verify_uncached(token, check_revoked or stale)
+
+
+def _verify_uncached(token: str, check_revoked: bool) -> Dict[str, Any]:
+    """Full verification (signature + claims), caching the result."""
     if _firebase_app is None:
         init_firebase()
     
     try:
-        decoded = firebase_auth.verify_id_token(token, check_revoked=check_revoked)
+        decoded = _decode_token(token, check_revoked=check_revoked)
+        _token_cache.put(token, decoded)
         return decoded
     except firebase_auth.RevokedIdTokenError:
+        _token_cache.invalidate(token)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
@@ -129,6 +234,66 @@ def verify_firebase_token(
         )
 
 
+async def verify_firebase_token_async(
+    token: str,
+    check_revoked: bool = False,
+) -> Dict[str, Any]:
+    """
+    Async variant of verify_firebase_token.
+    
+    Cache hits are answered on the event loop. Misses run in a dedicated,
+    size-limited executor (AUTH_VERIFY_WORKERS) so RSA verification never
+    blocks the loop or competes with the route threadpool, and concurrent
+    verifications of the same token share a single run.
+    """
+    with span("firebase.verify_token") as verify_span:
+        stale = False
+        if not check_revoked:
+            cached, stale = _token_cache.get(token)
+            if cached is not None and not stale:
+                if verify_span is not None:
+                    verify_span.set_attribute("auth.cache_hit", True)
+                return cached
+        
+        loop = asyncio.get_running_loop()
+        key = (id(loop), token_key(token), check_revoked or stale)
+        future = _inflight.get(key)
+        if future is None:
+            future = loop.run_in_executor(
+                _verify_executor, _verify_uncached, token, check_revoked or stale
+            )
+            _inflight[key] = future
+            future.add_done_callback(lambda _: _inflight.pop(key, None))
+        elif verify_span is not None:
+            verify_span.set_attribute("auth.shared_verification", True)
+        # shield: que un cliente que cancela no cancele a los demás que esperan
+        return dict(await asyncio.shield(future))
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and size of the verified token cache."""
+    return _token_cache.stats()
+
+
+def _bearer_token(credentials: Optional[HTTPAuthorizationCredentials]) -> str:
+    """Extract the bearer token or raise 401."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing Authorization header. Use: Authorization: Bearer <token>",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if credentials.scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication scheme. Use: Bearer <token>",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return credentials.credentials
+
+
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
 ) -> Dict[str, Any]:
@@ -152,21 +317,21 @@ def get_current_user(
     Raises:
         HTTPException 401: Missing or invalid Authorization header
     """
-    if credentials is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing Authorization header. Use: Authorization: Bearer <token>",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    if credentials.scheme.lower() != "bearer":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication scheme. Use: Bearer <token>",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    return verify_firebase_token(_bearer_token(credentials))
+
+
+async def get_current_user_async(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Dict[str, Any]:
+    """
+    Async drop-in for get_current_user (same claims, same 401s).
     
-    return verify_firebase_token(credentials.credentials)
+    Usage:
+        @router.get("/protected")
+        async def protected_endpoint(user: dict = Depends(get_current_user_async)):
+            return {"uid": user["uid"]}
+    """
+    return await verify_firebase_token_async(_bearer_token(credentials))
 
 
 def get_optional_user(
@@ -196,5 +361,40 @@ def get_optional_user(
         return None
 
 
+async def get_optional_user_async(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Optional[Dict[str, Any]]:
+    """Async drop-in for get_optional_user."""
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        return None
+    
+    try:
+        return await verify_firebase_token_async(credentials.credentials)
+    except HTTPException:
+        return None
+
+
+MODERATOR_CLAIMS = ("moderator", "admin")
+
+
+async def get_moderator_user(
+    user: Dict[str, Any] = Depends(get_current_user_async),
+) -> Dict[str, Any]:
+    """
+    FastAPI dependency for moderation endpoints.
+    Requires a `moderator` or `admin` custom claim on the Firebase token.
+    
+    Raises:
+        HTTPException 401: Missing or invalid token
+        HTTPException 403: Authenticated but not a moderator
+    """
+    if not any(user.get(claim) is True for claim in MODERATOR_CLAIMS):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Moderator permissions required",
+        )
+    return user
+
+
 # Convenience type alias
 UserClaims = Dict[str, Any]
@@ -0,0 +1,77 @@
+"""
+Bloom filter for compact set membership (e.g. the catalog's manga IDs).
+
+`key in bloom` is False only if the key was never added; True means
+"probably added", with a false-positive rate set at construction. The
+binary form (`to_bytes` / `from_bytes`) is what manga-service publishes
+and list-service loads, so both sides must use this module.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import struct
+from typing import Iterable
+
+_MAGIC = b"BLM1"
+_HEADER = struct.Struct(">4sIQQ")  # magic, num_hashes, size_bits, count
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over SHA-256."""
+
+    def __init__(self, size_bits: int, num_hashes: int, bits: bytes = None, count: int = 0):
+        if size_bits <= 0 or num_hashes <= 0:
+            raise ValueError("size_bits and num_hashes must be positive")
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        self._bits = bytearray(bits) if bits is not None else bytearray((size_bits + 7) // 8)
+        if len(self._bits) != (size_bits + 7) // 8:
+            raise ValueError("Bit array does not match size_bits")
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        """Size the filter for `capacity` keys at the given false-positive rate."""
+        capacity = max(1, capacity)
+        size_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits, num_hashes)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], error_rate: float = 0.001, headroom: float = 1.25) -> "BloomFilter":
+        """Build a filter holding `keys`, with room for some growth."""
+        keys = list(keys)
+        bloom = cls.for_capacity(int(len(keys) * headroom) + 1, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, self.num_hashes, self.size_bits, self.count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        if len(data) < _HEADER.size:
+            raise ValueError("Truncated Bloom filter")
+        magic, num_hashes, size_bits, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a Bloom filter snapshot")
+        return cls(size_bits, num_hashes, bits=data[_HEADER.size:], count=count)
@@ -0,0 +1,186 @@
+"""
+Google signing keys for Firebase ID tokens.
+
+Keeps the x509 certificates published by Google pre-parsed into public key
+objects and refreshes them in a background thread before their Cache-Control
+max-age expires, so token verification never waits on an HTTP fetch (except
+for the very first one if the refresher was not started).
+
+The fetcher is injectable: tests and benchmarks can serve keys from a stub,
+either by passing `fetcher=` or by pointing AUTH_CERTS_URL at a local server.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import jwt
+from cryptography.x509 import load_pem_x509_certificate
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+DEFAULT_MAX_AGE = 3600
+MIN_REFRESH_INTERVAL = 60  # seconds between refreshes (also forced ones)
+MAX_RETRY_BACKOFF = 900  # cap for the doubling delay after failed fetches
+
+# () -> ({kid: PEM certificate}, max_age_seconds)
+Fetcher = Callable[[], Tuple[Dict[str, str], int]]
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def parse_max_age(cache_control: Optional[str]) -> int:
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+def fetch_google_certs(url: Optional[str] = None, timeout: float = 10) -> Tuple[Dict[str, str], int]:
+    """Default fetcher: GET the certificate map and its max-age."""
+    url = url or os.getenv("AUTH_CERTS_URL", GOOGLE_CERTS_URL)
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        certs = json.loads(resp.read().decode("utf-8"))
+        max_age = parse_max_age(resp.headers.get("Cache-Control"))
+    return certs, max_age
+
+
+class KeySet:
+    """Public keys by `kid`, refreshed ahead of expiry in a daemon thread."""
+
+    def __init__(self, fetcher: Fetcher = fetch_google_certs):
+        self._fetcher = fetcher
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._next_attempt = 0.0  # no fetch (inline or forced) before this time
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._keys)
+
+    def refresh(self) -> None:
+        """
+        Fetch and parse certificates, then swap the key map atomically.
+        The fetch runs without the lock; a failure pushes the next allowed
+        attempt back (doubling up to MAX_RETRY_BACKOFF) and is re-raised.
+        """
+        try:
+            certs, max_age = self._fetcher()
+            keys = {
+                kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+                for kid, pem in certs.items()
+            }
+        except Exception:
+            with self._lock:
+                self._failures += 1
+                self._next_attempt = time.time() + self._retry_delay()
+            raise
+        with self._lock:
+            now = time.time()
+            self._keys = keys
+            self._expires_at = now + max_age
+            self._failures = 0
+            self._next_attempt = now + MIN_REFRESH_INTERVAL
+        logger.info("Loaded %d Google signing keys (max-age=%ss)", len(keys), max_age)
+
+    def _retry_delay(self) -> float:
+        return min(MAX_RETRY_BACKOFF, MIN_REFRESH_INTERVAL * 2 ** max(0, self._failures - 1))
+
+    def _claim_attempt(self) -> bool:
+        """Reserve an inline fetch; False while another one is allowed or running."""
+        with self._lock:
+            now = time.time()
+            if now < self._next_attempt:
+                return False
+            self._next_attempt = now + MIN_REFRESH_INTERVAL
+            return True
+
+    def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """
+        Key for `kid`. Only fetches inline when nothing is loaded yet or the
+        kid is unknown (key rotation), by one caller at a time, at most once
+        per MIN_REFRESH_INTERVAL and less often after failed fetches.
+        """
+        key = self._keys.get(kid) if kid else None
+        if key is None and self._claim_attempt():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to fetch Google signing keys: {e}")
+            key = self._keys.get(kid) if kid else None
+        return key
+
+    def _next_refresh_delay(self) -> float:
+        remaining = self._expires_at - time.time()
+        margin = min(300.0, remaining * 0.1)
+        return max(MIN_REFRESH_INTERVAL, remaining - margin)
+
+    def _run(self) -> None:
+        delay = self._next_refresh_delay()
+        while not self._stop.wait(delay):
+            try:
+                self.refresh()
+                delay = self._next_refresh_delay()
+            except Exception as e:
+                # Keep serving the previous keys and retry with backoff
+                logger.warning(f"Google signing key refresh failed: {e}")
+                delay = self._retry_delay()
+
+    def start(self) -> None:
+        """Fetch now (best effort) and keep refreshing in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not self.loaded:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Initial Google signing key fetch failed: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="google-keys-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def verify_firebase_jwt(token: str, project_id: str, key_set: KeySet) -> Dict[str, Any]:
+    """
+    Verify a Firebase ID token locally (RS256 signature, aud, iss, exp, iat, sub).
+
+    Returns the claims with `uid` set, like firebase_admin does.
+
+    Raises:
+        jwt.ExpiredSignatureError: token expired
+        jwt.InvalidTokenError: any other validation failure
+    """
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") != "RS256":
+        raise jwt.InvalidAlgorithmError("Firebase ID tokens must use RS256")
+    key = key_set.get_key(header.get("kid"))
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown signing key (kid)")
+
+    claims = jwt.decode(
+        token,
+        key=key,
+        algorithms=["RS256"],
+        audience=project_id,
+        issuer=f"https://securetoken.google.com/{project_id}",
+        options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+    )
+    sub = claims.get("sub")
+    if not isinstance(sub, str) or not sub or len(sub) > 128:
+        raise jwt.InvalidTokenError("Invalid 'sub' claim")
+    claims["uid"] = sub
+    return claims
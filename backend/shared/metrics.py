@@ -0,0 +1,385 @@
+"""
+Prometheus metrics shared by the backend services.
+
+    from shared.metrics import install_metrics, instrument_repo
+
+    install_metrics(app, "list-service")      # middleware + GET /metrics
+
+The metrics are rendered in the Prometheus text format by a small built-in
+registry, so scraping needs no extra package:
+
+    http_requests_total{service,method,route,status}
+    http_request_duration_seconds{service,method,route}     histogram
+    http_requests_in_flight{service}
+    firestore_calls_total{repo,method,outcome}               per repository method
+    firestore_call_duration_seconds{repo,method}             histogram
+    presign_duration_seconds{operation}                      histogram
+    threadpool_threads{pool,state}                           in_use / capacity / queued
+    cache_hits_total{cache}, cache_misses_total{cache}, cache_hit_ratio{cache}
+
+Routes are labelled with their template (/api/lists/{list_id}), never the
+raw path, to keep cardinality bounded.
+
+Configuration (env):
+    METRICS_ENABLED   "false" turns the middleware and endpoint off (default on)
+"""
+from __future__ import annotations
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Iterable[Tuple[Dict[str, Any], float]]]] = []
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def add_callback(self, callback: Callable[[], Iterable[Tuple[Dict[str, Any], float]]]) -> None:
+        """`callback()` yields (labels, value) pairs, read at scrape time."""
+        self._callbacks.append(callback)
+
+    def _collect(self, values: Dict[LabelValues, float]) -> Dict[LabelValues, float]:
+        for callback in list(self._callbacks):
+            try:
+                for labels, value in callback():
+                    values[self._key(labels)] = value
+            except Exception:
+                continue  # una fuente caída no rompe el scrape
+        return values
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in self._collect(values).items()
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in self._collect(values).items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = self._header()
+        for key, series in items:
+            for bound, n in zip(self.buckets, series):
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(n)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    """Named metrics of this process, rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests served", ("service", "method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("service", "method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being served", ("service",))
+FIRESTORE_CALLS = REGISTRY.counter(
+    "firestore_calls_total", "Repository method calls (Firestore RPCs)", ("repo", "method", "outcome")
+)
+FIRESTORE_LATENCY = REGISTRY.histogram(
+    "firestore_call_duration_seconds", "Repository method latency", ("repo", "method")
+)
+PRESIGN_LATENCY = REGISTRY.histogram(
+    "presign_duration_seconds", "S3 URL presigning latency", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+THREADPOOL = REGISTRY.gauge("threadpool_threads", "Worker threads by pool and state", ("pool", "state"))
+# Contadores acumulados de cada caché, leídos de su stats() en el scrape
+CACHE_HITS = REGISTRY.counter("cache_hits_total", "Cache hits", ("cache",))
+CACHE_MISSES = REGISTRY.counter("cache_misses_total", "Cache misses", ("cache",))
+CACHE_HIT_RATIO = REGISTRY.gauge("cache_hit_ratio", "Cache hits / lookups", ("cache",))
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+
+# ---- Repositories / presign ----
+
+def instrument_repo(repo: str):
+    """
+    Class decorator: count and time every public method of a repository.
+    Calls that raise are counted with outcome="error".
+    """
+    def decorate(cls):
+        for name, member in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(member):
+                continue
+            setattr(cls, name, _timed_method(repo, name, member))
+        return cls
+    return decorate
+
+
+def _timed_method(repo: str, method: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            FIRESTORE_LATENCY.observe(time.perf_counter() - start, repo=repo, method=method)
+            FIRESTORE_CALLS.inc(repo=repo, method=method, outcome=outcome)
+    return wrapper
+
+
+def timed_presign(operation: str):
+    """Decorator timing an S3 presign call."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with PRESIGN_LATENCY.time(operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---- Caches / thread pools ----
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Export a cache whose `stats()` returns at least `hits` and `misses`."""
+    def read(field: str):
+        def callback():
+            data = stats()
+            if field == "hit_ratio":
+                lookups = data.get("hits", 0) + data.get("misses", 0)
+                value = data.get("hit_ratio", data.get("hits", 0) / lookups if lookups else 0.0)
+            else:
+                value = data.get(field, 0)
+            return [({"cache": name}, value)]
+        return callback
+
+    CACHE_HITS.add_callback(read("hits"))
+    CACHE_MISSES.add_callback(read("misses"))
+    CACHE_HIT_RATIO.add_callback(read("hit_ratio"))
+
+
+def register_executor(name: str, executor) -> None:
+    """Export busy / capacity / queued threads of a ThreadPoolExecutor."""
+    def callback():
+        queued = executor._work_queue.qsize()
+        capacity = executor._max_workers
+        idle = getattr(executor, "_idle_semaphore", None)
+        idle_count = idle._value if idle is not None else 0
+        in_use = max(0, len(executor._threads) - idle_count)
+        return [
+            ({"pool": name, "state": "in_use"}, in_use),
+            ({"pool": name, "state": "capacity"}, capacity),
+            ({"pool": name, "state": "queued"}, queued),
+        ]
+    THREADPOOL.add_callback(callback)
+
+
+def _anyio_threadpool():
+    # Pool de Starlette para rutas y dependencias `def` (solo legible desde el event loop)
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return [
+        ({"pool": "anyio", "state": "in_use"}, stats.borrowed_tokens),
+        ({"pool": "anyio", "state": "capacity"}, stats.total_tokens),
+        ({"pool": "anyio", "state": "queued"}, stats.tasks_waiting),
+    ]
+
+
+# ---- FastAPI ----
+
+def install_metrics(app, service: str, path: str = "/metrics") -> None:
+    """Add the request middleware and the scrape endpoint to a FastAPI app."""
+    if not metrics_enabled():
+        return
+    from fastapi import Request
+    from fastapi.responses import Response
+
+    @app.middleware("http")
+    async def prometheus_middleware(request: Request, call_next):
+        if request.url.path == path:
+            return await call_next(request)
+        HTTP_IN_FLIGHT.inc(service=service)
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            route = request.scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start, service=service, method=request.method, route=template
+            )
+            HTTP_REQUESTS.inc(service=service, method=request.method, route=template, status=status)
+            HTTP_IN_FLIGHT.dec(service=service)
+
+    @app.get(path, include_in_schema=False)
+    async def metrics_endpoint():
+        # async: el pool de anyio solo se puede leer desde el event loop
+        try:
+            snapshot = _anyio_threadpool()
+        except Exception:
+            snapshot = []
+        for labels, value in snapshot:
+            THREADPOOL.set(value, **labels)
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
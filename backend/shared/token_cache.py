@@ -0,0 +1,121 @@
+"""
+Verified Firebase ID token cache.
+
+Decoded claims are kept in a bounded, thread-safe LRU keyed by the SHA-256 of
+the token, so the raw token is never stored. Each entry expires at the token's
+own `exp` claim. When a revocation interval is configured, entries older than
+that interval are reported as stale so the caller can re-check revocation.
+
+Configuration (env):
+    AUTH_TOKEN_CACHE_SIZE            Max cached tokens (default 10000, 0 disables)
+    AUTH_REVOCATION_CHECK_INTERVAL   Seconds between revocation checks (default 0 = off)
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 10_000
+
+
+def token_key(token: str) -> str:
+    """Cache key for a token (never store the token itself)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    claims: Dict[str, Any]
+    expires_at: float  # epoch seconds (claim `exp`)
+    checked_at: float  # last full verification / revocation check (set by put)
+
+
+class TokenCache:
+    """Bounded LRU of decoded token claims with per-entry expiry at `exp`."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, revocation_interval: float = 0):
+        self.max_size = max_size
+        self.revocation_interval = revocation_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, token: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Look up a token.
+
+        Returns:
+            (claims, stale). `claims` is None on a miss. `stale` is True when the
+            entry is older than the revocation interval and should be re-checked.
+        """
+        if self.max_size <= 0:
+            return None, False
+        key = token_key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            stale = (
+                self.revocation_interval > 0
+                and now - entry.checked_at >= self.revocation_interval
+            )
+            return dict(entry.claims), stale
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        """Cache verified claims until their `exp`."""
+        if self.max_size <= 0:
+            return
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = _Entry(dict(claims), float(exp), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token_key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def cache_from_env() -> TokenCache:
+    return TokenCache(
+        max_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", DEFAULT_MAX_SIZE)),
+        revocation_interval=float(os.getenv("AUTH_REVOCATION_CHECK_INTERVAL", 0)),
+    )
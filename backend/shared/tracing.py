@@ -0,0 +1,265 @@
+"""
+Request tracing with W3C trace context, exported as OpenTelemetry-style JSON.
+
+    from shared.tracing import install_tracing, span, trace_repo, traced
+
+    install_tracing(app, "list-service")     # one span per request
+
+    with span("s3.presign_get", key=key):
+        ...
+
+Each service continues the trace of an incoming `traceparent` header (nginx
+adds one when the client did not send it) and passes it on through
+`inject_headers()`. Finished spans are written one JSON object per line, in
+the same shape as OpenTelemetry's ConsoleSpanExporter (name, context.trace_id,
+context.span_id, parent_id, start_time, end_time, attributes, status,
+resource), either to stdout or to a file. No collector is needed, and the
+files can be merged by trace_id.
+
+Sampling is decided from the trace id (ratio TRACING_SAMPLE_RATIO), so every
+service keeps or drops the same traces; a parent flagged as sampled is always
+kept. Unsampled requests only carry the ids along, with no timing or output.
+
+Configuration (env):
+    TRACING_EXPORTER       none | stdout | file (default none: tracing off)
+    TRACING_FILE           Output path for the file exporter (default traces.jsonl)
+    TRACING_SAMPLE_RATIO   Fraction of traces recorded, 0..1 (default 0.01)
+"""
+from __future__ import annotations
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, MutableMapping, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: Optional[str]
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "UNSET"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_json(self, service: str) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.context.trace_id}", "span_id": f"0x{self.context.span_id}"},
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _iso(self.start_ns),
+            "end_time": _iso(self.end_ns or time.time_ns()),
+            "attributes": self.attributes,
+            "status": {"status_code": self.status},
+            "resource": {"attributes": {"service.name": service}},
+        }
+
+
+def _iso(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Tracer:
+    """Process-wide tracer: sampling decision and span export."""
+
+    def __init__(self, exporter: str = "none", path: str = "traces.jsonl", ratio: float = 0.01):
+        self.exporter = exporter
+        self.path = path
+        self.ratio = max(0.0, min(1.0, ratio))
+        self.service = "unknown"
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            exporter=os.getenv("TRACING_EXPORTER", "none").lower(),
+            path=os.getenv("TRACING_FILE", "traces.jsonl"),
+            ratio=float(os.getenv("TRACING_SAMPLE_RATIO", "0.01")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter in ("stdout", "file")
+
+    def should_sample(self, trace_id: str, parent_sampled: bool = False) -> bool:
+        if parent_sampled:
+            return True
+        # Mismo criterio en todos los servicios: depende solo del trace id
+        return int(trace_id[-16:], 16) < self.ratio * (1 << 64)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_json(self.service), default=str)
+        try:
+            with self._lock:
+                if self.exporter == "file":
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                else:
+                    sys.stdout.write(line + "\n")
+                    sys.stdout.flush()
+        except OSError as e:
+            logger.warning(f"Span export failed: {e}")
+
+
+tracer = Tracer.from_env()
+
+# Trace context of the code currently running (request, task or thread)
+_current: contextvars.ContextVar[Optional[SpanContext]] = contextvars.ContextVar("trace_context", default=None)
+# Recording span, if the current context is sampled
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+def current_context() -> Optional[SpanContext]:
+    return _current.get()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def inject_headers(headers: MutableMapping[str, str]) -> MutableMapping[str, str]:
+    """Add `traceparent` for an outgoing request to another service."""
+    ctx = _current.get()
+    if ctx is not None:
+        headers[TRACEPARENT] = ctx.traceparent()
+    return headers
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Run a block inside a child span of the current one (or of `parent`).
+    Yields the Span when it is recorded, None otherwise.
+    """
+    if not tracer.enabled:
+        yield None
+        return
+    parent = parent or _current.get()
+    if parent is None:
+        trace_id = secrets.token_hex(16)
+        sampled = tracer.should_sample(trace_id)
+        parent_id = None
+    else:
+        trace_id, sampled, parent_id = parent.trace_id, parent.sampled or tracer.should_sample(parent.trace_id), parent.span_id
+    if not sampled:
+        # Sin grabar: solo se propaga el contexto
+        token = _current.set(SpanContext(trace_id, parent.span_id if parent else secrets.token_hex(8), False))
+        try:
+            yield None
+        finally:
+            _current.reset(token)
+        return
+
+    recorded = Span(name, SpanContext(trace_id, secrets.token_hex(8), True), parent_id, attributes=dict(attributes))
+    token = _current.set(recorded.context)
+    span_token = _current_span.set(recorded)
+    try:
+        yield recorded
+        if recorded.status == "UNSET":
+            recorded.status = "OK"
+    except BaseException as e:
+        recorded.status = "ERROR"
+        recorded.attributes.setdefault("exception.type", type(e).__name__)
+        raise
+    finally:
+        recorded.end_ns = time.time_ns()
+        _current_span.reset(span_token)
+        _current.reset(token)
+        tracer.export(recorded)
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator: run a function (sync or async) inside a span."""
+    def decorate(func):
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_repo(repo: str):
+    """Class decorator: a span per public repository method (`{repo}.{method}`)."""
+    def decorate(cls):
+        for name, member in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(member):
+                continue
+            setattr(cls, name, traced(f"{repo}.{name}", **{"db.system": "firestore"})(member))
+        return cls
+    return decorate
+
+
+# ---- FastAPI ----
+
+def install_tracing(app, service: str) -> None:
+    """Open a server span per request, continuing the caller's `traceparent`."""
+    tracer.service = service
+    if not tracer.enabled:
+        return
+    from fastapi import Request
+
+    @app.middleware("http")
+    async def tracing_middleware(request: Request, call_next):
+        parent = parse_traceparent(request.headers.get(TRACEPARENT))
+        with span(f"{request.method} {request.url.path}", parent=parent, **{
+            "http.method": request.method,
+            "http.target": request.url.path,
+        }) as server_span:
+            response = await call_next(request)
+            ctx = _current.get()
+            if server_span is not None:
+                route = request.scope.get("route")
+                server_span.name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+                server_span.set_attribute("http.route", getattr(route, "path", None))
+                server_span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    server_span.status = "ERROR"
+            if ctx is not None:
+                response.headers[TRACEPARENT] = ctx.traceparent()
+            return response